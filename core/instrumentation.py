@@ -0,0 +1,227 @@
+"""core.instrumentation.py
+
+Per-request timing of the SQL queries, the template rendering and the
+view, reported in a `Server-Timing` header, which the browser developer
+tools show with the request, and in a structured log line per request.
+The hits and misses of the shared caches during the request, see
+`CACHE_STATS`, are reported with them.
+
+Requests over `REQUEST_TIMING_SLOW_MS` milliseconds or
+`REQUEST_TIMING_SLOW_QUERIES` queries are logged as warnings.
+
+The headers of a streaming response are sent before its content is
+generated, so streaming responses have no `Server-Timing` header. Their
+timings, including the queries run while streaming, are logged once the
+content is consumed or closed. Async streaming responses are logged
+when returned, without the streaming.
+
+The middleware is only installed with `REQUEST_TIMING_ENABLED`, without
+it Django leaves it out of the middleware chain altogether. The template
+rendering is timed by wrapping `Template.render` of the Django template
+backend, only while `REQUEST_TIMING_ENABLED` is set, see `time_templates`.
+"""
+from contextlib import ExitStack
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
+from django.template.backends.django import Template
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+# name and function returning the cumulative 'hits' and 'misses' in this
+# process of every shared cache
+CACHE_STATS = {
+    'relationships': 'registrar.relationships.get_cache_stats',
+    'catalog': 'order.catalog.get_cache_stats',
+}
+
+# timings of the request being handled, None outside of a request
+current_timings = ContextVar('request_timings', default=None)
+
+
+@dataclass
+class RequestTimings:
+    started: float = field(default_factory=time.perf_counter)
+    view_started: float = None
+    queries: int = 0
+    # all the durations in seconds
+    sql_time: float = 0.0
+    template_time: float = 0.0
+    template_depth: int = 0
+    view_time: float = 0.0
+    total_time: float = 0.0
+    # name: (hits, misses) of every shared cache, cumulative until the
+    # end of the request, see `count_cache_lookups`
+    cache_lookups: dict = field(default_factory=lambda: get_cache_lookups())
+
+    def count_cache_lookups(self):
+        """Replace the cumulative cache lookups by those of the request."""
+        self.cache_lookups = {
+            name: (hits - self.cache_lookups[name][0], misses - self.cache_lookups[name][1])
+            for name, (hits, misses) in get_cache_lookups().items()
+        }
+
+    def get_metrics(self):
+        """(name, milliseconds, description) of every timing."""
+        return [
+            ('db', self.sql_time * 1000, f'{self.queries} queries'),
+            ('tpl', self.template_time * 1000, 'templates'),
+            ('view', self.view_time * 1000, 'view'),
+            ('total', self.total_time * 1000, 'total'),
+        ]
+
+
+def get_cache_lookups():
+    lookups = {}
+    for name, get_cache_stats in CACHE_STATS.items():
+        stats = import_string(get_cache_stats)()
+        lookups[name] = (stats['hits'], stats['misses'])
+    return lookups
+
+
+def time_queries():
+    """Context manager timing the queries of every database connection."""
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(time_query))
+    return stack
+
+
+def time_query(execute, sql, params, many, context):
+    """Database execute wrapper adding the query to the timings of the request."""
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.sql_time += time.perf_counter() - started
+
+
+render_template = Template.render
+
+
+def time_template(self, context=None, request=None):
+    """`Template.render` of the Django template backend, adding the rendering to the timings of the request."""
+    timings = current_timings.get()
+    if timings is None:
+        return render_template(self, context, request)
+    # templates rendered from other templates are already timed
+    timings.template_depth += 1
+    started = time.perf_counter()
+    try:
+        return render_template(self, context, request)
+    finally:
+        timings.template_depth -= 1
+        if not timings.template_depth:
+            timings.template_time += time.perf_counter() - started
+
+
+def time_templates(enabled):
+    """Wrap `Template.render` in `time_template`, or restore it."""
+    Template.render = time_template if enabled else render_template
+
+
+@receiver(setting_changed)
+def update_template_timing(setting, value, **kwargs):
+    if setting == 'REQUEST_TIMING_ENABLED':
+        time_templates(value)
+
+
+class RequestTimingMiddleware:
+    """
+    Time the requests, see the module docstring. To be listed first in
+    MIDDLEWARE, so that the total time includes the other middleware.
+    """
+
+    def __init__(self, get_response):
+        time_templates(settings.REQUEST_TIMING_ENABLED)
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            with time_queries():
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        if response.streaming and not response.is_async:
+            response.streaming_content = self.stream(request, response, response.streaming_content, timings)
+            return response
+
+        self.finish(timings)
+        if response.streaming:
+            self.log(request, response, timings)
+            return response
+        response['Server-Timing'] = ', '.join(
+            [
+                f'{name};dur={milliseconds:.1f};desc="{description}"'
+                for name, milliseconds, description in timings.get_metrics()
+            ] + [
+                f'cache_{name};desc="{hits} hits, {misses} misses"'
+                for name, (hits, misses) in timings.cache_lookups.items()
+            ]
+        )
+        self.log(request, response, timings)
+        return response
+
+    def stream(self, request, response, content, timings):
+        """The content of a streaming response, timed up to its end."""
+        token = current_timings.set(timings)
+        try:
+            with time_queries():
+                yield from content
+        finally:
+            current_timings.reset(token)
+            self.finish(timings)
+            self.log(request, response, timings)
+
+    def finish(self, timings):
+        finished = time.perf_counter()
+        timings.total_time = finished - timings.started
+        if timings.view_started is not None:
+            timings.view_time = finished - timings.view_started
+        timings.count_cache_lookups()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # the view time runs up to the response, so it includes the
+        # rendering of TemplateResponses and the inner middleware
+        timings = current_timings.get()
+        if timings is not None:
+            timings.view_started = time.perf_counter()
+
+    def log(self, request, response, timings):
+        total_ms = timings.total_time * 1000
+        slow = []
+        if total_ms > settings.REQUEST_TIMING_SLOW_MS:
+            slow.append('time')
+        if timings.queries > settings.REQUEST_TIMING_SLOW_QUERIES:
+            slow.append('queries')
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': timings.queries,
+            **{f'{name}_ms': round(milliseconds, 1) for name, milliseconds, _ in timings.get_metrics()},
+            'cache': {
+                name: {'hits': hits, 'misses': misses}
+                for name, (hits, misses) in timings.cache_lookups.items()
+            },
+            'slow': slow,
+        }
+        logger.log(logging.WARNING if slow else logging.INFO, json.dumps(record))
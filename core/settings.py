@@ -45,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so that it times the other middleware too
+    'core.instrumentation.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -88,6 +90,33 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Shared by all gunicorn worker processes, e.g. for the relationship graph
+# of `registrar.relationships`. Point it to a Redis or Memcached server with
+# CACHE_BACKEND and CACHE_LOCATION when running on several hosts.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+    }
+}
+if CACHES['default']['BACKEND'] in [
+    'django.core.cache.backends.filebased.FileBasedCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+]:
+    # Django culls a third of the entries whenever there are more than
+    # MAX_ENTRIES, 300 by default, which the relationship graph and the
+    # catalog pages exceed. The other backends pass OPTIONS to their
+    # client instead.
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 20000)),
+    }
+
+# The tests use a local memory cache rather than the shared one
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
 # Custom user model for PITC
 
 AUTH_USER_MODEL = 'registrar.User'
@@ -136,6 +165,40 @@ MEDIA_URL = '/media/'
 # CHANGE to desired location for media files
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Report computation
+# Number of processes computing a single Report in parallel, 1 computes it serially
+REPORT_COMPUTATION_PROCESSES = int(os.environ.get('REPORT_COMPUTATION_PROCESSES', 1))
+# Seconds after which a running report task without a heartbeat of its
+# worker, e.g. a killed worker, is queued again
+REPORT_TASK_TIMEOUT = int(os.environ.get('REPORT_TASK_TIMEOUT', 3600))
+
+# Request timing
+# Server-Timing header and a log line per request, see `core.instrumentation`.
+# Requests over either threshold are logged as warnings.
+REQUEST_TIMING_ENABLED = os.environ.get('REQUEST_TIMING_ENABLED', '0') == '1'
+REQUEST_TIMING_SLOW_MS = float(os.environ.get('REQUEST_TIMING_SLOW_MS', 500))
+REQUEST_TIMING_SLOW_QUERIES = int(os.environ.get('REQUEST_TIMING_SLOW_QUERIES', 50))
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.instrumentation': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_TIMING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
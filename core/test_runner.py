@@ -0,0 +1,26 @@
+"""core.test_runner.py
+
+Test runner using a local memory cache instead of the shared cache of
+the settings, so that the tests neither read nor write the cache of the
+project.
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_settings = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'tests',
+                'OPTIONS': {'MAX_ENTRIES': 20000},
+            },
+        })
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        super().teardown_test_environment(**kwargs)
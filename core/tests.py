@@ -0,0 +1,111 @@
+import json
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.template.backends.django import Template
+from django.urls import reverse
+
+from core import instrumentation
+
+
+User = get_user_model()
+
+
+class RequestTimingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        self.user_customer = User.objects.create_user(
+            username='customer_1',
+            email="customer_1@tue.nl",
+            password="password123",
+            role='customer',
+        )
+
+    def get_timings(self, response):
+        return {
+            name: (float(duration), description)
+            for name, duration, description in re.findall(
+                r'(\w+);dur=([\d.]+);desc="([^"]*)"',
+                response['Server-Timing'],
+            )
+        }
+
+    def test_disabled(self):
+        self.client.force_login(self.user_customer)
+        response = self.client.get(reverse('customer_order_list'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertIs(Template.render, instrumentation.render_template)
+
+    def test_template_timing_restored(self):
+        """The rendering of the templates is only wrapped while the timing is enabled."""
+        self.client.force_login(self.user_customer)
+        with override_settings(REQUEST_TIMING_ENABLED=True):
+            self.client.get(reverse('customer_order_list'))
+            self.assertIs(Template.render, instrumentation.time_template)
+        self.assertIs(Template.render, instrumentation.render_template)
+
+    @override_settings(REQUEST_TIMING_ENABLED=True)
+    def test_server_timing(self):
+        self.client.force_login(self.user_customer)
+        with self.assertLogs('core.instrumentation', 'INFO') as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('customer_order_list'))
+
+        timings = self.get_timings(response)
+        self.assertEqual(set(timings), {'db', 'tpl', 'view', 'total'})
+        self.assertEqual(timings['db'][1], f'{len(queries)} queries')
+        self.assertGreater(timings['tpl'][0], 0)
+        self.assertLessEqual(timings['view'][0], timings['total'][0])
+
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], reverse('customer_order_list'))
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], len(queries))
+        self.assertEqual(record['slow'], [])
+        self.assertEqual(set(record['cache']), {'relationships', 'catalog'})
+
+    @override_settings(REQUEST_TIMING_ENABLED=True)
+    def test_cache_lookups(self):
+        self.client.force_login(self.user_customer)
+        self.client.get(reverse('customer_order_list'))
+        response = self.client.get(reverse('customer_order_list'))
+
+        caches = dict(re.findall(r'cache_(\w+);desc="([^"]*)"', response['Server-Timing']))
+        self.assertEqual(set(caches), {'relationships', 'catalog'})
+        self.assertRegex(caches['relationships'], r'^\d+ hits, 0 misses$')
+
+    @override_settings(REQUEST_TIMING_ENABLED=True)
+    def test_streaming_response(self):
+        """A streaming response is timed and logged once its content is consumed."""
+        admin = User.objects.create_superuser(
+            username='admin_1',
+            email="admin_1@tue.nl",
+            password="password123",
+        )
+        self.client.force_login(admin)
+        url = reverse('export', kwargs={'name': 'orders', 'file_format': 'csv'})
+        with self.assertLogs('core.instrumentation', 'INFO') as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+                self.assertEqual(logs.records, [])
+                streamed_queries = len(queries)
+                b''.join(response.streaming_content)
+                response.close()
+
+        self.assertNotIn('Server-Timing', response)
+        self.assertGreater(len(queries), streamed_queries)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], url)
+        self.assertEqual(record['queries'], len(queries))
+
+    @override_settings(REQUEST_TIMING_ENABLED=True, REQUEST_TIMING_SLOW_QUERIES=0)
+    def test_slow_request(self):
+        self.client.force_login(self.user_customer)
+        with self.assertLogs('core.instrumentation', 'WARNING') as logs:
+            self.client.get(reverse('customer_order_list'))
+        self.assertEqual(json.loads(logs.records[0].getMessage())['slow'], ['queries'])
@@ -22,6 +22,7 @@ from core import settings
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('order.urls')),
+    path('', include('stat_analysis.urls')),
 ]
 
 if settings.DEBUG:
@@ -1,8 +1,46 @@
 from django.contrib import admin
 from execution import models as execution_models
+from registrar.mixins.admin_pagination import KeysetPaginationMixin
 
 
-admin.site.register([
-    execution_models.Job,
-    execution_models.JobState,
-])
+@admin.register(execution_models.Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = [
+        'id',
+        'job_name',
+        'job_type',
+        'service_provider',
+        'current_state',
+        'started_at',
+        'ended_at',
+        'completion_time',
+    ]
+    list_select_related = ['service_provider__user']
+    list_filter = [
+        'job_type',
+        'current_state',
+        'started_at',
+        'ended_at',
+    ]
+    readonly_fields = [
+        'started_at',
+        'ended_at',
+        'current_state',
+    ]
+    date_hierarchy = 'started_at'
+    ordering = ['-started_at']
+
+
+@admin.register(execution_models.JobState)
+class JobStateAdmin(KeysetPaginationMixin, admin.ModelAdmin):
+    list_display = [
+        'id',
+        'job',
+        'state',
+        'state_date',
+    ]
+    list_select_related = ['job']
+    list_filter = [
+        'state',
+    ]
+    ordering = ['-state_date']
@@ -0,0 +1,175 @@
+"""execution.ingest.py
+
+Streaming import of jobs with their state histories.
+
+The records are read lazily and imported in chunks, each chunk in its
+own transaction with one bulk insert for the jobs and one for their
+states, so that memory use does not depend on the size of the input.
+A failed chunk is rolled back on its own, the import can be resumed by
+skipping the records of the chunks already imported. The lines of a file
+are parsed one at a time with the records, so that an invalid line fails
+its chunk, with its line number, like an invalid record.
+
+JSONL input has one job per line:
+
+    {"job_name": "...", "job_type": "regular", "service_provider": 1,
+     "completion_time": 2.5,
+     "states": [{"state": "created", "state_date": "2024-01-01T10:00:00"}, ...]}
+
+CSV input has one job per row, with its lifecycle dates as columns:
+
+    job_name,job_type,service_provider,completion_time,created_at,active_at,completed_at
+"""
+import csv
+import datetime
+from itertools import islice
+import json
+import math
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from execution.models import Job, JobState
+from execution.signals import job_states_bulk_created
+from registrar.models import ServiceProviderProfile
+
+
+class JobImportError(Exception):
+    """A chunk failed to import, `imported` records were imported before it."""
+
+    def __init__(self, message, imported):
+        super().__init__(message)
+        self.imported = imported
+
+
+def read_jsonl(file):
+    """The non-blank lines of a JSONL file with their line numbers, see `parse_jsonl`."""
+    for line_number, line in enumerate(file, start=1):
+        if line.strip():
+            yield line_number, line
+
+
+def parse_jsonl(line):
+    return json.loads(line)
+
+
+def read_csv(file):
+    """The rows of a CSV file with their line numbers, see `parse_csv`."""
+    reader = csv.DictReader(file)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def parse_csv(row):
+    return {
+        'job_name': row['job_name'],
+        'job_type': row['job_type'],
+        'service_provider': row['service_provider'],
+        'completion_time': row.get('completion_time') or None,
+        'states': [
+            {'state': state, 'state_date': row[f'{state}_at']}
+            for state, _ in JobState.STATE_CHOICES
+            if row.get(f'{state}_at')
+        ],
+    }
+
+
+def to_datetime(value):
+    if isinstance(value, datetime.datetime):
+        date_time = value
+    else:
+        date_time = parse_datetime(value)
+        if date_time is None:
+            date = parse_date(value)
+            if date is None:
+                raise ValueError(f"Invalid date: {value!r}")
+            date_time = datetime.datetime.combine(date, datetime.time.min)
+    return timezone.make_aware(date_time) if timezone.is_naive(date_time) else date_time
+
+
+def build_job(record):
+    """The unsaved Job of a record and its JobStates in chronological order."""
+    job_type = record['job_type']
+    if job_type not in dict(Job.JOB_TYPE_CHOICES):
+        raise ValueError(f"Invalid job type: {job_type!r}")
+
+    job = Job(
+        job_name=record['job_name'],
+        job_type=job_type,
+        service_provider_id=int(record['service_provider']),
+        completion_time=record.get('completion_time'),
+    )
+
+    states = []
+    for state in record.get('states') or []:
+        if state['state'] not in dict(JobState.STATE_CHOICES):
+            raise ValueError(f"Invalid job state: {state['state']!r}")
+        states.append(JobState(job=job, state=state['state'], state_date=to_datetime(state['state_date'])))
+    states.sort(key=lambda state: state.state_date)
+
+    # every job has a created state, as with `Job.save()`
+    if not states or states[0].state != 'created':
+        if any(state.state == 'created' for state in states):
+            raise ValueError("The created state must be the first state of the job.")
+        created_at = states[0].state_date if states else timezone.now()
+        states.insert(0, JobState(job=job, state='created', state_date=created_at))
+
+    if job.completion_time is not None:
+        job.completion_time = float(job.completion_time)
+        if not math.isfinite(job.completion_time):
+            raise ValueError(f"Invalid completion time: {record['completion_time']!r}")
+    elif states[-1].state == 'completed':
+        job.completion_time = (states[-1].state_date - states[0].state_date).total_seconds() / 86400
+
+    return job, states
+
+
+def import_jobs(records, chunk_size=1000, skip=0, on_chunk=None, parse=None):
+    """
+    Import the jobs of an iterable of records, skipping the first `skip`
+    records. With `parse`, the records are (line number, line) pairs of a
+    file, as read by `read_jsonl` or `read_csv`, parsed with it.
+    `on_chunk` is called with the number of records imported so
+    far after every committed chunk. Returns the number of records
+    imported, including the skipped ones.
+    """
+    records = islice(records, skip, None)
+    imported = skip
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return imported
+        try:
+            with transaction.atomic():
+                jobs = []
+                job_states = []
+                for index, record in enumerate(chunk, start=imported + 1):
+                    position = f"Record {index}"
+                    try:
+                        if parse:
+                            line_number, line = record
+                            position += f" (line {line_number})"
+                            record = parse(line)
+                        job, states = build_job(record)
+                    except (KeyError, TypeError, ValueError) as error:
+                        raise ValueError(f"{position}: {error!r}") from error
+                    jobs.append(job)
+                    job_states.extend(states)
+                service_provider_ids = {job.service_provider_id for job in jobs}
+                unknown_ids = service_provider_ids - set(
+                    ServiceProviderProfile.objects.filter(id__in=service_provider_ids).values_list('id', flat=True)
+                )
+                if unknown_ids:
+                    raise ValueError(f"Unknown service providers: {sorted(unknown_ids)}")
+                Job.objects.bulk_create(jobs)
+                JobState.objects.bulk_create(job_states)
+                job_states_bulk_created.send(sender=JobState, job_ids=[job.id for job in jobs])
+        except Exception as error:
+            raise JobImportError(
+                f"Failed to import the records {imported + 1} to {imported + len(chunk)}: {error}",
+                imported,
+            ) from error
+        imported += len(chunk)
+        if on_chunk:
+            on_chunk(imported)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+from execution.models import Job
+
+
+class Command(BaseCommand):
+    help = "Backfill the de-normalized lifecycle columns of Job from the JobState history."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help="Number of jobs updated per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        bounds = Job.objects.aggregate(min_id=Min('id'), max_id=Max('id'))
+        if bounds['min_id'] is None:
+            self.stdout.write("No jobs to backfill.")
+            return
+
+        updated = 0
+        for batch_start in range(bounds['min_id'], bounds['max_id'] + 1, batch_size):
+            with transaction.atomic():
+                updated += Job.objects.filter(
+                    id__gte=batch_start,
+                    id__lt=batch_start + batch_size,
+                ).update(**Job.lifecycle_values())
+            self.stdout.write(f"Backfilled {updated} jobs (up to id {batch_start + batch_size - 1})")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled lifecycle columns of {updated} jobs."))
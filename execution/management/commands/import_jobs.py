@@ -0,0 +1,78 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from execution.ingest import JobImportError, import_jobs, parse_csv, parse_jsonl, read_csv, read_jsonl
+
+
+class Command(BaseCommand):
+    help = "Import jobs with their state histories from a JSONL or CSV file, in chunked bulk inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSONL or CSV file to import.")
+        parser.add_argument(
+            '--format',
+            choices=['jsonl', 'csv'],
+            help="Format of the file, guessed from its extension by default.",
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help="Number of jobs imported per transaction.",
+        )
+        parser.add_argument(
+            '--skip',
+            type=int,
+            default=0,
+            help="Number of records to skip, e.g. those imported before a failed chunk.",
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help=(
+                "File keeping the number of records imported. An import with "
+                "an existing checkpoint resumes after the last imported chunk."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        checkpoint = options['checkpoint']
+        skip = options['skip']
+        if checkpoint and os.path.exists(checkpoint):
+            with open(checkpoint) as checkpoint_file:
+                skip = int(checkpoint_file.read().strip() or 0)
+            self.stdout.write(f"Resuming after record {skip}.")
+
+        started = time.perf_counter()
+
+        def on_chunk(imported):
+            if checkpoint:
+                with open(checkpoint, 'w') as checkpoint_file:
+                    checkpoint_file.write(str(imported))
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"Imported {imported} records ({(imported - skip) / elapsed:.0f} rows/sec)"
+            )
+
+        with open(path, newline='' if file_format == 'csv' else None, encoding='utf-8') as file:
+            read, parse = (read_csv, parse_csv) if file_format == 'csv' else (read_jsonl, parse_jsonl)
+            try:
+                imported = import_jobs(
+                    read(file),
+                    chunk_size=options['chunk_size'],
+                    skip=skip,
+                    on_chunk=on_chunk,
+                    parse=parse,
+                )
+            except JobImportError as error:
+                resume = f"--checkpoint {checkpoint}" if checkpoint else f"--skip {error.imported}"
+                raise CommandError(f"{error}\nRun the import again with {resume} to resume.")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported - skip} jobs in {elapsed:.1f}s "
+            f"({(imported - skip) / elapsed:.0f} rows/sec)."
+        ))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('execution', '0008_alter_jobstate_state_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='current_state',
+            field=models.CharField(blank=True, db_index=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='ended_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Date on which the job was completed.', null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='started_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Date of the first state of the job.', null=True),
+        ),
+    ]
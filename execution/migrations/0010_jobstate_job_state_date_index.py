@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('execution', '0009_job_lifecycle_columns'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobstate',
+            index=models.Index(fields=['job', 'state_date'], name='jobstate_job_date_idx'),
+        ),
+    ]
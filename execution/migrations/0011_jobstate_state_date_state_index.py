@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 15:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('execution', '0010_jobstate_job_state_date_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobstate',
+            index=models.Index(fields=['state_date', 'state'], name='jobstate_date_state_idx'),
+        ),
+    ]
@@ -5,6 +5,9 @@ the execution progress of customer orders.
 """
 import datetime
 from django.db import models
+from django.db.models import Case, F, OuterRef, Subquery, When, Window
+from django.db.models.functions import RowNumber
+from django.db.models.lookups import Exact
 
 from registrar.models import ServiceProviderProfile
 
@@ -32,29 +35,101 @@ class Job(models.Model):
         related_name='jobs',
     )
 
+    # De-normalized from JobState so that reports can filter and sort
+    # jobs by their lifecycle in SQL. Kept in sync by the JobState
+    # signal handlers, see `execution.signals`.
+    LIFECYCLE_FIELDS = ['started_at', 'ended_at', 'current_state']
+
+    started_at = models.DateTimeField(
+        help_text="Date of the first state of the job.",
+        null=True,
+        blank=True,
+        db_index=True,
+    )
+    ended_at = models.DateTimeField(
+        help_text="Date on which the job was completed.",
+        null=True,
+        blank=True,
+        db_index=True,
+    )
+    current_state = models.CharField(
+        max_length=20,
+        null=True,
+        blank=True,
+        db_index=True,
+    )
+
     @property
     def starting_date(self):
-        first_state = self.job_states.first()
-        return first_state.state_date or None
+        return self.started_at
     
     @property
     def end_date(self):
-        last_state = self.job_states.last()
-        if last_state and last_state.state == 'completed':
-            return last_state.state_date
-        return None
+        return self.ended_at
+
+    @staticmethod
+    def lifecycle_values():
+        """
+        Expressions computing the de-normalized lifecycle columns from
+        the job states, to be used with `Job.objects.filter(...).update()`.
+        """
+        job_states = JobState.objects.filter(job=OuterRef('pk'))
+        # by state date, as states can be backdated
+        last_state = job_states.order_by('-state_date', '-id')
+        last_state_name = Subquery(last_state.values('state')[:1])
+        return {
+            'started_at': Subquery(job_states.order_by('state_date', 'id').values('state_date')[:1]),
+            'current_state': last_state_name,
+            'ended_at': Case(
+                When(
+                    Exact(last_state_name, 'completed'),
+                    then=Subquery(last_state.values('state_date')[:1]),
+                ),
+                default=None,
+            ),
+        }
 
     def save(self, *args, **kwargs):
         created = not self.id
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # The lifecycle columns are maintained from the JobState writes,
+            # do not overwrite them with possibly stale in-memory values.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.LIFECYCLE_FIELDS
+            ]
         super().save(*args, **kwargs)
         if created:
             # Create initial job status
-            JobState.objects.create(job=self, state='created')
+            initial_state = JobState.objects.create(job=self, state='created')
+            self.started_at = initial_state.state_date
+            self.current_state = initial_state.state
+            self.ended_at = None
 
     def __str__(self):
         return self.job_name
     
 
+class JobStateQuerySet(models.QuerySet):
+
+    def as_of(self, timestamp, since=None):
+        """
+        The state of each job as of the given timestamp, i.e. its latest
+        state by `state_date` up to the timestamp. With `since`, only jobs
+        with a state change since then are included.
+        """
+        job_states = self.filter(state_date__lte=timestamp)
+        if since is not None:
+            job_states = job_states.filter(state_date__gte=since)
+        return job_states.annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=[F('job')],
+                order_by=[F('state_date').desc(), F('id').desc()],
+            )
+        ).filter(row_number=1)
+
+
 class JobState(models.Model):
     """
     Keep track of the job state changes so that when we create a report
@@ -77,5 +152,13 @@ class JobState(models.Model):
         related_name='job_states',
     )
 
+    objects = JobStateQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['job', 'state_date'], name='jobstate_job_date_idx'),
+            models.Index(fields=['state_date', 'state'], name='jobstate_date_state_idx'),
+        ]
+
     def __str__(self):
         return f"Job:#{self.job.id} changed to {self.state} on {self.state_date}"
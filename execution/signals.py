@@ -0,0 +1,26 @@
+"""execution.signals.py
+
+Keep the de-normalized lifecycle columns on Job in sync
+with its JobState history.
+
+Bulk inserts do not send `post_save`, `job_states_bulk_created` is sent
+instead with the ids of the jobs whose states were inserted.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from execution.models import Job, JobState
+
+
+job_states_bulk_created = Signal()
+
+
+@receiver(post_save, sender=JobState)
+@receiver(post_delete, sender=JobState)
+def update_job_lifecycle(sender, instance, **kwargs):
+    Job.objects.filter(pk=instance.job_id).update(**Job.lifecycle_values())
+
+
+@receiver(job_states_bulk_created, sender=JobState)
+def update_jobs_lifecycle(sender, job_ids, **kwargs):
+    Job.objects.filter(pk__in=job_ids).update(**Job.lifecycle_values())
@@ -1,3 +1,323 @@
+from io import StringIO
+import datetime
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from execution.admin import JobStateAdmin
+from execution.models import Job, JobState
+from registrar.mixins.admin_pagination import KeysetChangeList
+from registrar.models import ServiceProviderProfile
+
+
+User = get_user_model()
+
+
+class JobLifecycleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        user = User.objects.create_user(
+            username='service_provider_1',
+            email="service_1@tue.nl",
+            password="password123",
+            role='service_provider',
+        )
+        self.service_provider = ServiceProviderProfile.objects.get(user=user)
+
+    def create_job(self):
+        job = Job.objects.create(
+            job_name="Job 1",
+            job_type="regular",
+            service_provider=self.service_provider,
+        )
+        job.job_states.all().delete()
+        return job
+
+    def test_initial_state(self):
+        job = Job.objects.create(
+            job_name="Job 1",
+            job_type="regular",
+            service_provider=self.service_provider,
+        )
+        job.refresh_from_db()
+        self.assertEqual(job.current_state, 'created')
+        self.assertIsNotNone(job.started_at)
+        self.assertIsNone(job.ended_at)
+
+    def test_lifecycle_follows_job_states(self):
+        job = self.create_job()
+        created = job.job_states.create(state_date=timezone.make_aware(datetime.datetime(2024, 10, 26)), state='created')
+        completed = job.job_states.create(state_date=timezone.make_aware(datetime.datetime(2024, 12, 26)), state='completed')
+
+        job.refresh_from_db()
+        self.assertEqual(job.started_at, created.state_date)
+        self.assertEqual(job.ended_at, completed.state_date)
+        self.assertEqual(job.current_state, 'completed')
+
+        completed.state_date = timezone.make_aware(datetime.datetime(2024, 12, 27))
+        completed.save()
+        job.refresh_from_db()
+        self.assertEqual(job.ended_at, completed.state_date)
+
+        completed.delete()
+        job.refresh_from_db()
+        self.assertEqual(job.current_state, 'created')
+        self.assertIsNone(job.ended_at)
+
+    def test_lifecycle_with_backdated_state(self):
+        job = self.create_job()
+        job.job_states.create(state_date=timezone.make_aware(datetime.datetime(2024, 12, 26)), state='completed')
+        # created last, but the earliest and not the latest by date
+        created = job.job_states.create(state_date=timezone.make_aware(datetime.datetime(2024, 10, 26)), state='created')
+
+        job.refresh_from_db()
+        self.assertEqual(job.current_state, 'completed')
+        self.assertEqual(job.started_at, created.state_date)
+        self.assertEqual(job.ended_at, timezone.make_aware(datetime.datetime(2024, 12, 26)))
+
+    def test_save_keeps_lifecycle(self):
+        job = self.create_job()
+        job.job_states.create(state_date=timezone.make_aware(datetime.datetime(2024, 10, 26)), state='completed')
+        job.job_name = "Renamed"
+        job.save()
+
+        job.refresh_from_db()
+        self.assertEqual(job.job_name, "Renamed")
+        self.assertEqual(job.current_state, 'completed')
+
+    def test_backfill_job_lifecycle(self):
+        job = self.create_job()
+        job.job_states.create(state_date=timezone.make_aware(datetime.datetime(2024, 10, 26)), state='created')
+        Job.objects.update(started_at=None, ended_at=None, current_state=None)
+
+        call_command('backfill_job_lifecycle', batch_size=1, stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.started_at, timezone.make_aware(datetime.datetime(2024, 10, 26)))
+        self.assertEqual(job.current_state, 'created')
+
+    def test_state_as_of(self):
+        job = self.create_job()
+        job.job_states.create(state_date=timezone.make_aware(datetime.datetime(2024, 10, 26)), state='created')
+        job.job_states.create(state_date=timezone.make_aware(datetime.datetime(2024, 12, 26)), state='completed')
+        # backdated state, created last but not the latest by date
+        job.job_states.create(state_date=timezone.make_aware(datetime.datetime(2024, 11, 26)), state='active')
+
+        self.assertEqual(
+            list(JobState.objects.as_of(timezone.make_aware(datetime.datetime(2024, 12, 31))).values_list('state', flat=True)),
+            ['completed'],
+        )
+        self.assertEqual(
+            list(JobState.objects.as_of(timezone.make_aware(datetime.datetime(2024, 12, 1))).values_list('state', flat=True)),
+            ['active'],
+        )
+        self.assertFalse(
+            JobState.objects.as_of(
+                timezone.make_aware(datetime.datetime(2024, 12, 31)),
+                since=timezone.make_aware(datetime.datetime(2025, 1, 1)),
+            ).exists()
+        )
+
+
+class JobImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        user = User.objects.create_user(
+            username='service_provider_1',
+            email="service_1@tue.nl",
+            password="password123",
+            role='service_provider',
+        )
+        self.service_provider = ServiceProviderProfile.objects.get(user=user)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_file(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def job_record(self, job_name, service_provider_id=None, states=()):
+        return json.dumps({
+            'job_name': job_name,
+            'job_type': 'regular',
+            'service_provider': service_provider_id or self.service_provider.id,
+            'states': list(states),
+        })
+
+    def test_import_jsonl(self):
+        path = self.write_file('jobs.jsonl', '\n'.join([
+            self.job_record("Job 1", states=[
+                {'state': 'completed', 'state_date': '2024-12-26T12:00:00'},
+                {'state': 'created', 'state_date': '2024-10-26T12:00:00'},
+            ]),
+            self.job_record("Job 2", states=[{'state': 'active', 'state_date': '2024-11-02'}]),
+            self.job_record("Job 3"),
+        ]))
+        call_command('import_jobs', path, chunk_size=2, stdout=StringIO())
+
+        job_1, job_2, job_3 = Job.objects.order_by('id')
+        self.assertEqual(job_1.current_state, 'completed')
+        self.assertEqual(job_1.started_at, timezone.make_aware(datetime.datetime(2024, 10, 26, 12)))
+        self.assertEqual(job_1.ended_at, timezone.make_aware(datetime.datetime(2024, 12, 26, 12)))
+        self.assertEqual(job_1.completion_time, 61)
+        # every job has a created state
+        self.assertEqual(
+            list(job_2.job_states.order_by('state_date').values_list('state', flat=True)),
+            ['created', 'active'],
+        )
+        self.assertEqual(job_2.started_at, timezone.make_aware(datetime.datetime(2024, 11, 2)))
+        self.assertEqual(job_3.current_state, 'created')
+
+    def test_import_csv(self):
+        path = self.write_file('jobs.csv', '\n'.join([
+            'job_name,job_type,service_provider,completion_time,created_at,active_at,completed_at',
+            f'Job 1,wafer_run,{self.service_provider.id},3.5,2024-10-01,2024-10-02,2024-10-05',
+            f'Job 2,regular,{self.service_provider.id},,2024-10-01,,',
+        ]))
+        call_command('import_jobs', path, stdout=StringIO())
+
+        job_1, job_2 = Job.objects.order_by('id')
+        self.assertEqual(job_1.job_type, 'wafer_run')
+        self.assertEqual(job_1.completion_time, 3.5)
+        self.assertEqual(job_1.job_states.count(), 3)
+        self.assertEqual(job_1.current_state, 'completed')
+        self.assertEqual(job_2.current_state, 'created')
+        self.assertIsNone(job_2.completion_time)
+
+    def test_resume_after_failed_chunk(self):
+        checkpoint = os.path.join(self.directory.name, 'checkpoint')
+        records = [self.job_record("Job 1"), self.job_record("Job 2", service_provider_id=-1), self.job_record("Job 3")]
+        path = self.write_file('jobs.jsonl', '\n'.join(records))
+
+        with self.assertRaisesMessage(CommandError, '--checkpoint'):
+            call_command('import_jobs', path, chunk_size=1, checkpoint=checkpoint, stdout=StringIO())
+        self.assertEqual(list(Job.objects.values_list('job_name', flat=True)), ["Job 1"])
+        self.assertEqual(JobState.objects.count(), 1)
+
+        records[1] = self.job_record("Job 2")
+        self.write_file('jobs.jsonl', '\n'.join(records))
+        call_command('import_jobs', path, chunk_size=1, checkpoint=checkpoint, stdout=StringIO())
+        self.assertEqual(
+            list(Job.objects.order_by('id').values_list('job_name', flat=True)),
+            ["Job 1", "Job 2", "Job 3"],
+        )
+
+    def test_import_invalid_lines(self):
+        checkpoint = os.path.join(self.directory.name, 'checkpoint')
+        path = self.write_file('jobs.jsonl', '\n'.join([
+            self.job_record("Job 1"),
+            '',
+            '{"job_name": ',
+            self.job_record("Job 3"),
+        ]))
+        with self.assertRaisesMessage(CommandError, "Record 2 (line 3): JSONDecodeError"):
+            call_command('import_jobs', path, chunk_size=1, checkpoint=checkpoint, stdout=StringIO())
+        self.assertEqual(list(Job.objects.values_list('job_name', flat=True)), ["Job 1"])
+        with open(checkpoint) as checkpoint_file:
+            self.assertEqual(checkpoint_file.read(), '1')
+
+        path = self.write_file('jobs.csv', '\n'.join(['job_name,job_type', 'Job 4,regular']))
+        with self.assertRaisesMessage(CommandError, "Record 1 (line 2): KeyError('service_provider')"):
+            call_command('import_jobs', path, stdout=StringIO())
+
+        path = self.write_file('jobs.jsonl', json.dumps({
+            'job_name': "Job 5",
+            'job_type': 'regular',
+            'service_provider': self.service_provider.id,
+            'completion_time': float('nan'),
+        }))
+        with self.assertRaisesMessage(CommandError, "Invalid completion time: nan"):
+            call_command('import_jobs', path, stdout=StringIO())
+        self.assertEqual(Job.objects.count(), 1)
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        self.user_admin = User.objects.create_superuser(
+            username='admin_1',
+            email="admin_1@tue.nl",
+            password="password123",
+        )
+        user_service_provider = User.objects.create_user(
+            username='service_provider_1',
+            email="service_provider_1@tue.nl",
+            password="password123",
+            role='service_provider',
+        )
+        job = Job.objects.create(
+            job_name="Job 1",
+            job_type='regular',
+            service_provider=ServiceProviderProfile.objects.get(user=user_service_provider),
+        )
+        JobState.objects.bulk_create([JobState(job=job, state='active') for _ in range(12)])
+        # the dates are set on insert, pairs of states share a date and are ordered by id
+        start = timezone.now()
+        for index, job_state in enumerate(JobState.objects.order_by('id')):
+            JobState.objects.filter(pk=job_state.pk).update(
+                state_date=start + timezone.timedelta(microseconds=index // 2),
+            )
+        self.url = reverse('admin:execution_jobstate_changelist')
+
+    def get_page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.context['cl']
+
+    @mock.patch.object(JobStateAdmin, 'list_count_cap', 10)
+    @mock.patch.object(JobStateAdmin, 'list_per_page', 5)
+    def test_keyset_pages(self):
+        self.client.force_login(self.user_admin)
+        expected_ids = list(JobState.objects.order_by('-state_date', '-id').values_list('id', flat=True))
+
+        pages = [self.get_page(self.url)]
+        while pages[-1].next_url:
+            pages.append(self.get_page(self.url + pages[-1].next_url))
+
+        self.assertIsInstance(pages[0], KeysetChangeList)
+        self.assertEqual([job_state.id for cl in pages for job_state in cl.result_list], expected_ids)
+        self.assertEqual([len(cl.result_list) for cl in pages], [5, 5, 3])
+        self.assertEqual((pages[0].result_count, pages[0].result_count_capped), (10, True))
+        self.assertIsNone(pages[0].previous_url)
+
+        previous_page = self.get_page(self.url + pages[2].previous_url)
+        self.assertEqual(list(previous_page.result_list), list(pages[1].result_list))
+        first_page = self.get_page(self.url + pages[1].previous_url)
+        self.assertEqual(list(first_page.result_list), list(pages[0].result_list))
+        self.assertIsNone(first_page.previous_url)
+
+    @mock.patch.object(JobStateAdmin, 'list_per_page', 5)
+    def test_no_offset_or_full_count(self):
+        self.client.force_login(self.user_admin)
+        next_url = self.get_page(self.url).next_url
+        with CaptureQueriesContext(connection) as queries:
+            self.get_page(self.url + next_url)
+        job_state_queries = [query['sql'] for query in queries if 'execution_jobstate' in query['sql']]
+        self.assertTrue(job_state_queries)
+        for sql in job_state_queries:
+            self.assertNotIn('OFFSET', sql)
+            if 'COUNT(' in sql:
+                self.assertIn('LIMIT', sql)
 
-# Create your tests here.
+    def test_sorted_by_related_column_falls_back(self):
+        self.client.force_login(self.user_admin)
+        # sorted by job
+        cl = self.get_page(self.url + '?o=2')
+        self.assertIsNone(cl.keyset)
+        self.assertEqual(len(cl.result_list), JobState.objects.count())
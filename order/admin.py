@@ -5,6 +5,7 @@ from order.mixins.admin_permissions import (
     OrderItemPermissionMixin,
     ProductAndServicePermissionMixin,
 )
+from registrar.mixins.admin_pagination import KeysetPaginationMixin
 
 
 @admin.register(order_models.ProductAndService)
@@ -16,6 +17,7 @@ class ProductAndServiceAdmin(ProductAndServicePermissionMixin, admin.ModelAdmin)
         'price',
         'service_provider__user__email',
     ]
+    list_select_related = ['service_provider__user']
     ordering = ['-created_at']
 
 
@@ -25,13 +27,24 @@ class OrderAdmin(OrderPermissionMixin, admin.ModelAdmin):
         'id', 
         'customer__user__email',
         'account_manager__user__email',
+        'current_state',
         'created_at',
     ]
+    list_select_related = ['customer__user', 'account_manager__user']
+    list_filter = [
+        'current_state',
+    ]
+    readonly_fields = [
+        'amount',
+        'current_state',
+        'started_at',
+        'completed_at',
+    ]
     ordering = ['-created_at']
 
 
 @admin.register(order_models.OrderItem)
-class OrderItemAdmin(OrderItemPermissionMixin, admin.ModelAdmin):
+class OrderItemAdmin(OrderItemPermissionMixin, KeysetPaginationMixin, admin.ModelAdmin):
     list_display = [
         'id', 
         'order__id',
@@ -42,11 +55,16 @@ class OrderItemAdmin(OrderItemPermissionMixin, admin.ModelAdmin):
         'order__customer__user__email',
         'order__account_manager__user__email',
     ]
+    list_select_related = [
+        'order__customer__user',
+        'order__account_manager__user',
+        'product__service_provider__user',
+    ]
     ordering = ['-created_at']
 
 
 @admin.register(order_models.OrderState)
-class OrderStateAdmin(admin.ModelAdmin):
+class OrderStateAdmin(KeysetPaginationMixin, admin.ModelAdmin):
     list_display = [
         'id', 
         'order__id',
@@ -55,4 +73,5 @@ class OrderStateAdmin(admin.ModelAdmin):
         'order__account_manager__user__email',
         'state_date',
     ]
+    list_select_related = ['order__customer__user', 'order__account_manager__user']
     ordering = ['-state_date']
@@ -0,0 +1,128 @@
+"""order.catalog.py
+
+Cached pages of the catalog of an account manager, i.e. of the products
+and services of the service providers they manage, which customers can
+add to their orders.
+
+Every page of a catalog, for a given search, is cached in the shared
+cache under a key including both the version of the relationship graph,
+see `registrar.relationships`, and a version of the catalogs, which any
+write to the products replaces with a new unique one once committed
+(see `order.signals`). The rows of the page are cached rather than the
+rendered partial, which holds the order and the CSRF token of the user.
+
+Pages are cached under their actual number, so that out of range page
+numbers do not fill the cache with copies of the last page. The pages
+of searches, which are free text, expire after `SEARCH_TIMEOUT`, the
+other pages after `PAGE_TIMEOUT`.
+
+Lookups inside a transaction always read the database, as they may see
+uncommitted products, which must not end up in the shared cache.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.db.models import Q
+
+from order.models import ProductAndService
+from registrar import relationships
+
+
+VERSION_KEY = 'order:catalog:version'
+
+PER_PAGE = 20
+
+# seconds
+PAGE_TIMEOUT = 24 * 60 * 60
+SEARCH_TIMEOUT = 5 * 60
+
+# per process, see `get_cache_stats`
+cache_stats = {'hits': 0, 'misses': 0, 'renders': 0, 'render_time': 0.0}
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, relationships.new_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def increment_version():
+    # see `registrar.relationships.increment_version`
+    cache.set(VERSION_KEY, relationships.new_version(), timeout=None)
+
+
+def invalidate():
+    """Invalidate the cached catalogs once the current transaction, if any, is committed."""
+    transaction.on_commit(increment_version)
+
+
+def record_render(seconds):
+    """Record the time taken to serve a page of a catalog, cached or not."""
+    cache_stats['renders'] += 1
+    cache_stats['render_time'] += seconds
+
+
+def get_cache_stats():
+    """Cache hits and misses, and render count and time, of the catalog pages of this process."""
+    stats = dict(cache_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    stats['average_render_time'] = stats['render_time'] / stats['renders'] if stats['renders'] else 0.0
+    return stats
+
+
+def load_page(account_manager_id, page_number, search):
+    products = ProductAndService.objects.filter(
+        service_provider_id__in=relationships.get_service_provider_ids(account_manager_id),
+    ).order_by('name', 'id')
+    if search:
+        products = products.filter(Q(name__icontains=search) | Q(description__icontains=search))
+    paginator = Paginator(products.values('id', 'type', 'name', 'description', 'price'), PER_PAGE)
+    page = paginator.get_page(page_number)
+    return {
+        'products': list(page.object_list),
+        'number': page.number,
+        'num_pages': paginator.num_pages,
+        'count': paginator.count,
+    }
+
+
+def get_page_key(account_manager_id, page_number, search):
+    search_key = hashlib.sha256(search.lower().encode()).hexdigest()[:16]
+    return (
+        f'order:catalog:{relationships.get_version()}:{get_version()}'
+        f':{account_manager_id}:{page_number}:{search_key}'
+    )
+
+
+def get_page(account_manager_id, page_number=1, search=''):
+    """
+    A page of the catalog of an account manager, optionally only of the
+    products whose name or description contains `search`, as a dict with
+    the `products` of the page as dicts, the page `number`, `num_pages`
+    and the `count` of products.
+    """
+    search = (search or '').strip()
+    try:
+        page_number = max(int(page_number), 1)
+    except (TypeError, ValueError):
+        page_number = 1
+    if connection.in_atomic_block:
+        return load_page(account_manager_id, page_number, search)
+
+    page = cache.get(get_page_key(account_manager_id, page_number, search))
+    if page is None:
+        cache_stats['misses'] += 1
+        page = load_page(account_manager_id, page_number, search)
+        cache.set(
+            get_page_key(account_manager_id, page['number'], search),
+            page,
+            timeout=SEARCH_TIMEOUT if search else PAGE_TIMEOUT,
+        )
+    else:
+        cache_stats['hits'] += 1
+    return page
@@ -1,6 +1,7 @@
 from django import forms
 from order import models as order_models
 from registrar import models as registrar_models
+from registrar import relationships
 
 
 class CustomerOrderForm(forms.ModelForm):
@@ -18,10 +19,8 @@ class CustomerOrderForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         customer = kwargs.pop('customer', None)
-        account_manager_ids = registrar_models.CustomerAccountManager.objects.filter(
-            customer=customer
-        ).values_list('account_manager__user_id', flat=True)
+        account_manager_ids = relationships.get_account_manager_ids(customer.id) if customer else []
         super().__init__(*args, **kwargs)
         self.fields['account_manager'].queryset = registrar_models.AccountManagerProfile.objects.filter(
-            user__id__in=account_manager_ids
-        )
+            id__in=account_manager_ids
+        ).select_related('user')
@@ -0,0 +1,244 @@
+"""order.ingest.py
+
+Batched import of orders with their items.
+
+`Order.save()` and `OrderItem.save()` check the customer - account
+manager and account manager - service provider relationships with one
+query per row. The import checks them for a whole chunk of records with
+a few set-based queries instead, and inserts the valid orders, their
+initial states and their items with bulk inserts. Invalid records are
+rejected with the reasons, the other records of the chunk are imported.
+
+The input has one order per line, as JSON:
+
+    {"customer": 1, "account_manager": 2, "description": "...",
+     "amount": "120.00", "created_at": "2024-01-01T10:00:00",
+     "items": [{"product": 3, "quantity": 2}, ...]}
+
+The amount of an order with items is the total price of its items, as
+maintained by `order.signals`, `amount` is only used for orders without
+items. `created_at`, the date of the order and of its initial state,
+defaults to now. Ids are integers or their strings, and the amount
+a finite decimal number. A line which is not valid JSON is rejected
+like an invalid record.
+"""
+from dataclasses import dataclass, field
+import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+import json
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from order.models import Order, OrderItem, OrderState, ProductAndService
+from order.signals import order_states_bulk_created
+from registrar import models as registrar_models
+
+
+@dataclass
+class OrderImportResult:
+    imported: int = 0
+    # (record number, record, errors) of every rejected record
+    rejected: list = field(default_factory=list)
+
+
+def read_jsonl(file):
+    """The non-blank lines of a JSONL file, see `parse_jsonl`."""
+    for line in file:
+        if line.strip():
+            yield line.rstrip('\n')
+
+
+def parse_jsonl(line):
+    return json.loads(line)
+
+
+def to_datetime(value):
+    date_time = parse_datetime(value)
+    if date_time is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValueError(f"Invalid date: {value!r}")
+        date_time = datetime.datetime.combine(date, datetime.time.min)
+    return timezone.make_aware(date_time) if timezone.is_naive(date_time) else date_time
+
+
+def to_id(value):
+    """The id a record refers to, as an int, None if it is not a positive integer or its string."""
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+        return value
+    return None
+
+
+def get_relationships(records):
+    """
+    Look up everything the records of a chunk refer to with set-based
+    queries: the customer - account manager links, the account manager -
+    service provider links and the service provider and price of every product.
+    """
+    customer_ids = set()
+    account_manager_ids = set()
+    product_ids = set()
+    for record in records:
+        if isinstance(record, dict):
+            customer_ids.add(to_id(record.get('customer')))
+            account_manager_ids.add(to_id(record.get('account_manager')))
+            if isinstance(record.get('items'), list):
+                product_ids.update(
+                    to_id(item.get('product')) for item in record['items'] if isinstance(item, dict)
+                )
+    customer_ids.discard(None)
+    account_manager_ids.discard(None)
+    product_ids.discard(None)
+
+    customer_account_managers = set(
+        registrar_models.CustomerAccountManager.objects.filter(
+            customer_id__in=customer_ids,
+            account_manager_id__in=account_manager_ids,
+        ).values_list('customer_id', 'account_manager_id')
+    )
+    account_manager_service_providers = set(
+        registrar_models.AccountManagerServiceProvider.objects.filter(
+            account_manager_id__in=account_manager_ids,
+        ).values_list('account_manager_id', 'service_provider_id')
+    )
+    products = {
+        product_id: (service_provider_id, price)
+        for product_id, service_provider_id, price in ProductAndService.objects.filter(
+            id__in=product_ids,
+        ).values_list('id', 'service_provider_id', 'price')
+    }
+    return customer_account_managers, account_manager_service_providers, products
+
+
+def build_order(record, relationships):
+    """
+    The unsaved Order of a record and its OrderItems, with the list of
+    the reasons the record is invalid, if any.
+    """
+    customer_account_managers, account_manager_service_providers, products = relationships
+    if not isinstance(record, dict):
+        return None, [], ["The record is not an object."]
+
+    errors = []
+    customer_id = to_id(record.get('customer'))
+    account_manager_id = to_id(record.get('account_manager'))
+    if customer_id is None:
+        errors.append(f"Invalid customer {record.get('customer')!r}.")
+    if account_manager_id is None:
+        errors.append(f"Invalid account manager {record.get('account_manager')!r}.")
+    if customer_id and account_manager_id and (customer_id, account_manager_id) not in customer_account_managers:
+        errors.append(f"Account manager {account_manager_id!r} is not connected to customer {customer_id!r}.")
+
+    order = Order(
+        customer_id=customer_id,
+        account_manager_id=account_manager_id,
+        description=record.get('description'),
+    )
+    try:
+        order.created_at = to_datetime(record['created_at']) if record.get('created_at') else timezone.now()
+    except (TypeError, ValueError) as error:
+        errors.append(str(error))
+
+    items = []
+    total_price = Decimal(0)
+    record_items = record.get('items') or []
+    if not isinstance(record_items, list):
+        errors.append("The items are not a list.")
+        record_items = []
+    for item in record_items:
+        if not isinstance(item, dict):
+            errors.append(f"Invalid item {item!r}.")
+            continue
+        product_id = to_id(item.get('product'))
+        quantity = item.get('quantity', 1)
+        if product_id is None:
+            errors.append(f"Invalid product {item.get('product')!r}.")
+            continue
+        if product_id not in products:
+            errors.append(f"Unknown product {product_id!r}.")
+            continue
+        service_provider_id, price = products[product_id]
+        if (account_manager_id, service_provider_id) not in account_manager_service_providers:
+            errors.append(f"Product {product_id!r} is not provided by a service provider of the account manager.")
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+            errors.append(f"Invalid quantity {quantity!r} of product {product_id!r}.")
+            continue
+        items.append(OrderItem(order=order, product_id=product_id, quantity=quantity))
+        total_price += (price or 0) * quantity
+
+    try:
+        order.amount = total_price if items or record.get('amount') is None else Decimal(str(record['amount']))
+    except InvalidOperation:
+        errors.append(f"Invalid amount {record['amount']!r}.")
+    else:
+        # Decimal accepts NaN and Infinity
+        if not order.amount.is_finite():
+            errors.append(f"Invalid amount {record['amount']!r}.")
+
+    return order, items, errors
+
+
+def import_orders(records, chunk_size=1000, parse=None):
+    """
+    Import the orders of an iterable of records, a chunk of records per
+    transaction. With `parse`, the records are the lines of a file, as
+    read by `read_jsonl`, parsed with it. Returns an `OrderImportResult`
+    with the rejected records.
+    """
+    result = OrderImportResult()
+    records = iter(records)
+    record_number = 0
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return result
+
+        # (record number, record) of the records of the chunk which could be parsed
+        parsed = []
+        for record in chunk:
+            record_number += 1
+            if parse:
+                try:
+                    record = parse(record)
+                except ValueError as error:
+                    result.rejected.append((record_number, record, [f"Invalid JSON: {error}."]))
+                    continue
+            parsed.append((record_number, record))
+
+        relationships = get_relationships([record for _, record in parsed])
+        orders = []
+        items = []
+        for number, record in parsed:
+            order, order_items, errors = build_order(record, relationships)
+            if errors:
+                result.rejected.append((number, record, errors))
+                continue
+            orders.append(order)
+            items.extend(order_items)
+        if not orders:
+            continue
+
+        with transaction.atomic():
+            created_at = [order.created_at for order in orders]
+            Order.objects.bulk_create(orders)
+            order_states = [
+                OrderState(order=order, state='new', state_date=order_created_at)
+                for order, order_created_at in zip(orders, created_at)
+            ]
+            OrderState.objects.bulk_create(order_states)
+            # the dates are set on insert, restore the imported ones
+            for order, order_state, order_created_at in zip(orders, order_states, created_at):
+                order.created_at = order.updated_at = order_state.state_date = order_created_at
+            Order.objects.bulk_update(orders, ['created_at', 'updated_at'])
+            OrderState.objects.bulk_update(order_states, ['state_date'])
+            OrderItem.objects.bulk_create(items)
+            order_states_bulk_created.send(
+                sender=OrderState,
+                order_state_ids=[order_state.id for order_state in order_states],
+            )
+        result.imported += len(orders)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+from order.models import Order
+
+
+class Command(BaseCommand):
+    help = "Backfill the de-normalized lifecycle columns of Order from the OrderState history."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help="Number of orders updated per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        bounds = Order.objects.aggregate(min_id=Min('id'), max_id=Max('id'))
+        if bounds['min_id'] is None:
+            self.stdout.write("No orders to backfill.")
+            return
+
+        updated = 0
+        for batch_start in range(bounds['min_id'], bounds['max_id'] + 1, batch_size):
+            with transaction.atomic():
+                updated += Order.objects.filter(
+                    id__gte=batch_start,
+                    id__lt=batch_start + batch_size,
+                ).update(**Order.lifecycle_values())
+            self.stdout.write(f"Backfilled {updated} orders (up to id {batch_start + batch_size - 1})")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled lifecycle columns of {updated} orders."))
@@ -0,0 +1,40 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from order.ingest import import_orders, parse_jsonl, read_jsonl
+
+
+class Command(BaseCommand):
+    help = "Import orders with their items from a JSONL file, in batched bulk inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSONL file to import, see `order/ingest.py` for the format.")
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help="Number of orders validated and imported per transaction.",
+        )
+        parser.add_argument(
+            '--rejects',
+            help="JSONL file the rejected records are written to, with the reasons.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with open(options['path'], encoding='utf-8') as file:
+            result = import_orders(read_jsonl(file), chunk_size=options['chunk_size'], parse=parse_jsonl)
+        elapsed = time.perf_counter() - started
+
+        if options['rejects']:
+            with open(options['rejects'], 'w', encoding='utf-8') as rejects:
+                for record_number, record, errors in result.rejected:
+                    rejects.write(json.dumps({'record': record_number, 'errors': errors, 'data': record}) + '\n')
+        for record_number, record, errors in result.rejected:
+            self.stderr.write(f"Rejected record {record_number}: {' '.join(errors)}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.imported} orders in {elapsed:.1f}s, rejected {len(result.rejected)}."
+        ))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0007_remove_order_status_orderstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='current_state',
+            field=models.CharField(blank=True, db_index=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='started_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0008_order_lifecycle_columns'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderstate',
+            index=models.Index(fields=['order', 'state_date'], name='orderstate_order_date_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 15:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0009_orderstate_order_state_date_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderstate',
+            index=models.Index(fields=['state_date', 'state'], name='orderstate_date_state_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 15:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('execution', '0011_jobstate_state_date_state_index'),
+        ('order', '0010_orderstate_state_date_state_index'),
+        ('registrar', '0003_user_date_joined_role_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'created_at'], name='order_customer_created_idx'),
+        ),
+    ]
@@ -1,21 +1,11 @@
 from registrar import models as registrar_models
+from registrar.scope import get_admin_scope
 
 
 class OrderPermissionMixin:
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-
-        if request.user.is_superuser or getattr(request.user, 'role', None) == 'admin':
-            return qs
-
-        if getattr(request.user, 'role', None) == 'account_manager':
-            customer_ids = registrar_models.CustomerAccountManager.objects.filter(
-                account_manager__user=request.user
-            ).values_list('customer_id', flat=True)
-
-            return qs.filter(customer_id__in=customer_ids)
-
-        return qs.none()
+        return get_admin_scope(request).filter_customers(qs)
     
     def get_form(self, request, obj=None, **kwargs):
         """Account managers can only create customers."""
@@ -46,18 +36,7 @@ class OrderPermissionMixin:
 class OrderItemPermissionMixin:
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-
-        if request.user.is_superuser or getattr(request.user, 'role', None) == 'admin':
-            return qs
-
-        if getattr(request.user, 'role', None) == 'account_manager':
-            customer_ids = registrar_models.CustomerAccountManager.objects.filter(
-                account_manager__user=request.user
-            ).values_list('customer_id', flat=True)
-
-            return qs.filter(order__customer_id__in=customer_ids)
-
-        return qs.none()
+        return get_admin_scope(request).filter_customers(qs, 'order__customer')
     
     def has_view_permission(self, request, obj=None):
         return request.user.is_superuser or getattr(request.user, 'role', None) in ['account_manager', 'admin']
@@ -78,18 +57,7 @@ class OrderItemPermissionMixin:
 class OrderItemPermissionMixin:
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-
-        if request.user.is_superuser or getattr(request.user, 'role', None) == 'admin':
-            return qs
-
-        if getattr(request.user, 'role', None) == 'account_manager':
-            customer_ids = registrar_models.CustomerAccountManager.objects.filter(
-                account_manager__user=request.user
-            ).values_list('customer_id', flat=True)
-
-            return qs.filter(order__customer_id__in=customer_ids)
-
-        return qs.none()
+        return get_admin_scope(request).filter_customers(qs, 'order__customer')
     
     def has_view_permission(self, request, obj=None):
         return request.user.is_superuser or getattr(request.user, 'role', None) in ['account_manager', 'admin']
@@ -110,18 +78,7 @@ class OrderItemPermissionMixin:
 class ProductAndServicePermissionMixin:
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-
-        if request.user.is_superuser or getattr(request.user, 'role', None) == 'admin':
-            return qs
-        elif getattr(request.user, 'role', None) == 'account_manager':
-            service_provider_ids = registrar_models.AccountManagerServiceProvider.objects.filter(
-                account_manager__user=request.user
-            ).values_list('service_provider_id', flat=True)
-            return qs.filter(service_provider_id__in=service_provider_ids)
-        elif getattr(request.user, 'role', None) == 'service_provider':
-            return qs.filter(service_provider_id=request.user.service_provider_profile.id)
-        else:
-            return qs.none()
+        return get_admin_scope(request).filter_service_providers(qs)
         
     def get_form(self, request, obj=None, **kwargs):
         """Service Providers can only create products for themselves
@@ -136,11 +93,9 @@ class ProductAndServicePermissionMixin:
                 form.base_fields['service_provider'].disabled = True
             elif request.user.role in ["account_manager"]:
                 # account manager can only create products for their service providers
-                service_provider_ids = registrar_models.AccountManagerServiceProvider.objects.filter(
-                    account_manager__user=request.user
-                ).values_list('service_provider_id', flat=True)
-                form.base_fields['service_provider'].queryset = registrar_models.ServiceProviderProfile.objects.filter(
-                    id__in=service_provider_ids
+                form.base_fields['service_provider'].queryset = get_admin_scope(request).filter_service_providers(
+                    registrar_models.ServiceProviderProfile.objects.all(),
+                    'pk',
                 )
         return form
         
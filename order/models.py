@@ -1,7 +1,11 @@
 from django.db import models
+from django.db.models import Case, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value, When, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.db.models.lookups import Exact
 from django.urls import reverse
 
 from registrar import models as registrar_models
+from registrar import relationships
 
 
 class TimeStampBaseModel(models.Model):
@@ -44,6 +48,8 @@ class Order(TimeStampBaseModel):
         related_name="orders",
     )
     description = models.TextField(blank=True, null=True)
+    # The total price of the items of the order, kept in sync by the
+    # OrderItem and ProductAndService signal handlers, see `order.signals`.
     amount = models.DecimalField(max_digits=15, decimal_places=2, blank=True, null=True)
     
     job = models.ForeignKey(
@@ -54,6 +60,15 @@ class Order(TimeStampBaseModel):
         related_name="orders",
     )
 
+    # De-normalized from OrderState so that the order state and lifecycle
+    # dates can be read and filtered without querying the state history.
+    # Kept in sync by the OrderState signal handlers, see `order.signals`.
+    LIFECYCLE_FIELDS = ['current_state', 'started_at', 'completed_at']
+
+    current_state = models.CharField(max_length=20, blank=True, null=True, db_index=True)
+    started_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    completed_at = models.DateTimeField(blank=True, null=True, db_index=True)
+
     def __str__(self):
         return f"ODR {self.id} - CUST: {self.customer.user.email} - AM: {self.account_manager.user.email}"
     
@@ -61,38 +76,102 @@ class Order(TimeStampBaseModel):
         """
         Users can only create orders with account managers that are connected to their customer profile.
         """
-        connected_account_manager_ids = registrar_models.CustomerAccountManager.objects.filter(
-            customer=self.customer
-        ).values_list("account_manager_id", flat=True)
-        if self.account_manager.id not in connected_account_manager_ids:
+        connected_account_manager_ids = relationships.get_account_manager_ids(self.customer_id)
+        if self.account_manager_id not in connected_account_manager_ids:
             raise ValueError("You cannot create orders with this account manager.")
         created = not self.id
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # The lifecycle columns are maintained from the OrderState writes,
+            # do not overwrite them with possibly stale in-memory values.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.LIFECYCLE_FIELDS
+            ]
         super().save(*args, **kwargs)
         if created:
             # Create initial order state
-            OrderState.objects.create(order=self, state_date=self.created_at, state='new')
+            initial_state = OrderState.objects.create(order=self, state_date=self.created_at, state='new')
+            self.current_state = initial_state.state
+            self.started_at = initial_state.state_date
+            self.completed_at = None
 
     @property
     def state(self):
-        return self.order_states.last().state if self.order_states.exists() else None
+        return self.current_state
     
     @property
     def starting_date(self):
-        first_state = self.order_states.first()
-        return first_state.state_date if first_state else None
+        return self.started_at
     
     @property
     def end_date(self):
-        last_state = self.order_states.last()
-        if last_state and last_state.state == 'completed':
-            return last_state.state_date
-        return None
+        return self.completed_at
+
+    @staticmethod
+    def lifecycle_values():
+        """
+        Expressions computing the de-normalized lifecycle columns from
+        the order states, to be used with `Order.objects.filter(...).update()`.
+        """
+        order_states = OrderState.objects.filter(order=OuterRef('pk'))
+        # by state date, as states can be backdated
+        last_state = order_states.order_by('-state_date', '-id')
+        last_state_name = Subquery(last_state.values('state')[:1])
+        return {
+            'current_state': last_state_name,
+            'started_at': Subquery(order_states.order_by('state_date', 'id').values('state_date')[:1]),
+            'completed_at': Case(
+                When(
+                    Exact(last_state_name, 'completed'),
+                    then=Subquery(last_state.values('state_date')[:1]),
+                ),
+                default=None,
+            ),
+        }
     
+    @staticmethod
+    def items_total():
+        """
+        Expression computing the total price of the items of the order,
+        None for an order without items.
+        """
+        items = (
+            OrderItem.objects.filter(order=OuterRef('pk'))
+            .values('order')
+            .annotate(total=Sum(OrderItem.line_total()))
+            .values('total')
+        )
+        return Subquery(items, output_field=models.DecimalField(max_digits=15, decimal_places=2))
+
     def get_absolute_url(self):
         return reverse("customer_order_detail", kwargs={"order_id": self.id})
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # order list of the customer portal, see `order.pagination`
+            models.Index(fields=['customer', 'created_at'], name='order_customer_created_idx'),
+        ]
+
+
+class OrderStateQuerySet(models.QuerySet):
+
+    def as_of(self, timestamp, since=None):
+        """
+        The state of each order as of the given timestamp, i.e. its latest
+        state by `state_date` up to the timestamp. With `since`, only orders
+        with a state change since then are included.
+        """
+        order_states = self.filter(state_date__lte=timestamp)
+        if since is not None:
+            order_states = order_states.filter(state_date__gte=since)
+        return order_states.annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=[F('order')],
+                order_by=[F('state_date').desc(), F('id').desc()],
+            )
+        ).filter(row_number=1)
 
 
 class OrderState(models.Model):
@@ -118,6 +197,14 @@ class OrderState(models.Model):
         related_name='order_states',
     )
 
+    objects = OrderStateQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['order', 'state_date'], name='orderstate_order_date_idx'),
+            models.Index(fields=['state_date', 'state'], name='orderstate_date_state_idx'),
+        ]
+
     def __str__(self):
         return f"Order:#{self.order.id} changed to {self.state} on {self.state_date}"
 
@@ -137,16 +224,22 @@ class OrderItem(TimeStampBaseModel):
     )
     quantity = models.IntegerField(blank=False, null=False)
 
+    @staticmethod
+    def line_total():
+        """Expression computing the price of the item times its quantity."""
+        return ExpressionWrapper(
+            Coalesce(F('product__price'), Value(0), output_field=models.DecimalField()) * F('quantity'),
+            output_field=models.DecimalField(max_digits=15, decimal_places=2),
+        )
+
     def save(self, *args, **kwargs):
         """
         Prevent users from adding products/services provided by service providers
         that are not managed by their account manager.
         """
-        allowed_service_provider_ids = registrar_models.AccountManagerServiceProvider.objects.filter(
-            account_manager__user=self.order.account_manager.user
-        ).values_list("service_provider_id", flat=True)
+        allowed_service_provider_ids = relationships.get_service_provider_ids(self.order.account_manager_id)
 
-        if self.product.service_provider.id not in allowed_service_provider_ids:
+        if self.product.service_provider_id not in allowed_service_provider_ids:
             raise ValueError("You are not allowed to add this product to the order. Please contact your Account Manager")
         super().save(*args, **kwargs)
 
@@ -0,0 +1,65 @@
+"""order.pagination.py
+
+Keyset pagination, i.e. pagination on the values of the sort key of the
+last row of a page rather than on an offset, so that every page is
+fetched with an index search however deep it is, and rows inserted
+in the meantime do not shift the pages.
+"""
+import base64
+from dataclasses import dataclass
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    # cursor of the next page, None on the last page
+    next_cursor: str = None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def encode_cursor(created_at, pk):
+    return base64.urlsafe_b64encode(f'{created_at.isoformat()}|{pk}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(created_at, pk) of a cursor, None if the cursor is invalid."""
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (ValueError, UnicodeError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, pk
+
+
+def paginate_by_created_at(queryset, cursor=None, per_page=20):
+    """
+    The page of a queryset, newest first, starting after the row of the
+    cursor, or the first page without a (valid) cursor.
+    """
+    queryset = queryset.order_by('-created_at', '-pk')
+    key = decode_cursor(cursor) if cursor else None
+    if key is not None:
+        created_at, pk = key
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+    object_list = list(queryset[:per_page + 1])
+    if len(object_list) <= per_page:
+        return KeysetPage(object_list)
+    object_list = object_list[:per_page]
+    last = object_list[-1]
+    return KeysetPage(object_list, encode_cursor(last.created_at, last.pk))
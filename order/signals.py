@@ -0,0 +1,116 @@
+"""order.signals.py
+
+Keep the de-normalized lifecycle columns on Order in sync
+with its OrderState history, and its amount with its items, and
+invalidate the cached catalogs, see `order.catalog`, when the products
+change.
+
+Bulk inserts do not send `post_save`, `order_states_bulk_created` is
+sent instead with the ids of the inserted order states.
+
+The amounts are updated in SQL, without `Order.save()`,
+`order_amounts_changed` is sent with the difference of every order.
+A new product price is applied to every order with the product in a
+single query, `product_price_changed` is sent with the difference of
+the price instead.
+"""
+from collections import defaultdict
+
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from order import catalog
+from order.models import Order, OrderItem, OrderState, ProductAndService
+
+
+order_states_bulk_created = Signal()
+order_amounts_changed = Signal()
+product_price_changed = Signal()
+
+
+@receiver(post_save, sender=OrderState)
+@receiver(post_delete, sender=OrderState)
+def update_order_lifecycle(sender, instance, **kwargs):
+    Order.objects.filter(pk=instance.order_id).update(**Order.lifecycle_values())
+
+
+@receiver(order_states_bulk_created, sender=OrderState)
+def update_orders_lifecycle(sender, order_state_ids, **kwargs):
+    Order.objects.filter(
+        pk__in=OrderState.objects.filter(pk__in=order_state_ids).values('order'),
+    ).update(**Order.lifecycle_values())
+
+
+def add_to_order_amounts(differences):
+    """Add the given differences, keyed by order id, to the order amounts."""
+    differences = {order_id: difference for order_id, difference in differences.items() if difference}
+    for order_id, difference in differences.items():
+        Order.objects.filter(pk=order_id).update(amount=Coalesce(F('amount'), 0) + difference)
+    if differences:
+        order_amounts_changed.send(sender=Order, differences=differences)
+
+
+def get_item_total(order_id, product_id, quantity):
+    price = ProductAndService.objects.filter(pk=product_id).values_list('price', flat=True).first()
+    return order_id, (price or 0) * quantity
+
+
+@receiver(pre_save, sender=OrderItem)
+def remember_order_item(sender, instance, **kwargs):
+    instance._amount_item = OrderItem.objects.filter(pk=instance.pk).values_list(
+        'order_id', 'product_id', 'quantity',
+    ).first() if instance.pk else None
+
+
+@receiver(post_save, sender=OrderItem)
+def update_order_amount(sender, instance, **kwargs):
+    differences = defaultdict(int)
+    if instance._amount_item:
+        order_id, total = get_item_total(*instance._amount_item)
+        differences[order_id] -= total
+    differences[instance.order_id] += (instance.product.price or 0) * int(instance.quantity)
+    add_to_order_amounts(differences)
+
+
+@receiver(post_delete, sender=OrderItem)
+def remove_item_from_order_amount(sender, instance, **kwargs):
+    order_id, total = get_item_total(instance.order_id, instance.product_id, instance.quantity)
+    add_to_order_amounts({order_id: -total})
+
+
+@receiver(pre_save, sender=ProductAndService)
+def remember_product_price(sender, instance, **kwargs):
+    instance._amount_price = ProductAndService.objects.filter(pk=instance.pk).values_list(
+        'price', flat=True,
+    ).first() if instance.pk else None
+
+
+@receiver(post_save, sender=ProductAndService)
+def update_order_amounts_for_price(sender, instance, created, **kwargs):
+    difference = (instance.price or 0) - (getattr(instance, '_amount_price', None) or 0)
+    if created or not difference:
+        return
+    quantity = (
+        OrderItem.objects.filter(order=OuterRef('pk'), product=instance)
+        .values('order')
+        .annotate(quantity=Sum('quantity'))
+        .values('quantity')
+    )
+    Order.objects.filter(items__product=instance).update(
+        amount=Coalesce(F('amount'), 0) + difference * Subquery(quantity),
+    )
+    product_price_changed.send(sender=ProductAndService, product=instance, difference=difference)
+
+
+@receiver(post_save, sender=ProductAndService)
+@receiver(post_delete, sender=ProductAndService)
+def invalidate_catalogs(sender, **kwargs):
+    catalog.invalidate()
+
+
+@receiver(post_migrate)
+def invalidate_catalogs_after_migrate(sender, **kwargs):
+    # also sent by `flush`, which deletes every row without signals
+    catalog.increment_version()
@@ -1,3 +1,533 @@
-from django.test import TestCase
+from decimal import Decimal
+from io import StringIO
+import datetime
+import json
+import os
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from order import catalog
+from order.ingest import import_orders
+from order.models import Order, OrderItem, OrderState, ProductAndService
+from order.pagination import paginate_by_created_at
+from registrar.models import (
+    AccountManagerProfile,
+    AccountManagerServiceProvider,
+    CustomerAccountManager,
+    CustomerProfile,
+    ServiceProviderProfile,
+)
+from stat_analysis.models import OrderQuarterRollup
+
+
+User = get_user_model()
+
+
+class OrderLifecycleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        user_customer = User.objects.create_user(
+            username='customer_1',
+            email="customer_1@tue.nl",
+            password="password123",
+            role='customer',
+        )
+        user_account_manager = User.objects.create_user(
+            username='account_manager_1',
+            email="account_manager_1@tue.nl",
+            password="password123",
+            role='account_manager',
+        )
+        self.customer = CustomerProfile.objects.get(user=user_customer)
+        self.account_manager = AccountManagerProfile.objects.get(user=user_account_manager)
+        CustomerAccountManager.objects.create(
+            customer=self.customer,
+            account_manager=self.account_manager,
+        )
+
+    def create_order(self):
+        return Order.objects.create(
+            customer=self.customer,
+            account_manager=self.account_manager,
+            description="Order 1 description",
+        )
+
+    def test_initial_state(self):
+        order = self.create_order()
+        self.assertEqual(order.state, 'new')
+
+        order.refresh_from_db()
+        self.assertEqual(order.state, 'new')
+        self.assertEqual(order.starting_date, order.order_states.first().state_date)
+        self.assertIsNone(order.end_date)
+
+    def test_lifecycle_follows_order_states(self):
+        order = self.create_order()
+        completed = order.order_states.create(state='completed')
+
+        order.refresh_from_db()
+        self.assertEqual(order.state, 'completed')
+        self.assertEqual(order.end_date, completed.state_date)
+
+        order.description = "Updated description"
+        order.save()
+        completed.delete()
+        order.refresh_from_db()
+        self.assertEqual(order.description, "Updated description")
+        self.assertEqual(order.state, 'new')
+        self.assertIsNone(order.end_date)
+
+    def test_lifecycle_with_backdated_state(self):
+        order = self.create_order()
+        # created last, but dated before the initial state
+        pending = order.order_states.create(state='pending')
+        pending.state_date = order.order_states.get(state='new').state_date - datetime.timedelta(days=30)
+        pending.save()
+
+        order.refresh_from_db()
+        self.assertEqual(order.state, 'new')
+        self.assertEqual(order.starting_date, pending.state_date)
+
+    def test_save_keeps_lifecycle(self):
+        order = self.create_order()
+        order.order_states.create(state='pending')
+        order.description = "Updated description"
+        order.save()
+
+        order.refresh_from_db()
+        self.assertEqual(order.state, 'pending')
+
+    def test_backfill_order_lifecycle(self):
+        order = self.create_order()
+        Order.objects.update(current_state=None, started_at=None, completed_at=None)
+
+        call_command('backfill_order_lifecycle', batch_size=1, stdout=StringIO())
+
+        order.refresh_from_db()
+        self.assertEqual(order.state, 'new')
+        self.assertEqual(order.starting_date, order.order_states.first().state_date)
+
+
+class OrderImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        users = {
+            username: User.objects.create_user(
+                username=username,
+                email=f"{username}@tue.nl",
+                password="password123",
+                role=role,
+            )
+            for username, role in [
+                ('customer_1', 'customer'),
+                ('account_manager_1', 'account_manager'),
+                ('account_manager_2', 'account_manager'),
+                ('service_provider_1', 'service_provider'),
+                ('service_provider_2', 'service_provider'),
+            ]
+        }
+        self.customer = CustomerProfile.objects.get(user=users['customer_1'])
+        self.account_manager = AccountManagerProfile.objects.get(user=users['account_manager_1'])
+        self.other_account_manager = AccountManagerProfile.objects.get(user=users['account_manager_2'])
+        service_provider = ServiceProviderProfile.objects.get(user=users['service_provider_1'])
+        other_service_provider = ServiceProviderProfile.objects.get(user=users['service_provider_2'])
+        CustomerAccountManager.objects.create(customer=self.customer, account_manager=self.account_manager)
+        AccountManagerServiceProvider.objects.create(
+            account_manager=self.account_manager,
+            service_provider=service_provider,
+        )
+        self.product = ProductAndService.objects.create(
+            name="Product 1",
+            price=Decimal('12.50'),
+            service_provider=service_provider,
+        )
+        self.other_product = ProductAndService.objects.create(
+            name="Product 2",
+            price=Decimal('10.00'),
+            service_provider=other_service_provider,
+        )
+
+    def order_record(self, **kwargs):
+        return {
+            'customer': self.customer.id,
+            'account_manager': self.account_manager.id,
+            'description': "Imported order",
+            'created_at': '2024-05-02T10:00:00',
+            'items': [{'product': self.product.id, 'quantity': 2}],
+            **kwargs,
+        }
+
+    def test_import_orders(self):
+        result = import_orders([
+            self.order_record(),
+            self.order_record(account_manager=self.other_account_manager.id),
+            self.order_record(items=[{'product': self.other_product.id, 'quantity': 1}]),
+            self.order_record(items=[{'product': -1, 'quantity': 1}]),
+            self.order_record(items=[{'product': self.product.id, 'quantity': 0}]),
+            self.order_record(amount='99.90', created_at=None, items=[]),
+        ], chunk_size=4)
+
+        self.assertEqual(result.imported, 2)
+        self.assertEqual([record_number for record_number, _, _ in result.rejected], [2, 3, 4, 5])
+
+        order, order_without_items = Order.objects.order_by('id')
+        self.assertEqual(order.amount, Decimal('25.00'))
+        self.assertEqual(order.created_at, timezone.make_aware(datetime.datetime(2024, 5, 2, 10)))
+        self.assertEqual(order.state, 'new')
+        self.assertEqual(order.starting_date, order.created_at)
+        self.assertEqual(order.order_states.get().state_date, order.created_at)
+        self.assertEqual(OrderItem.objects.get().order, order)
+        self.assertEqual(order_without_items.amount, Decimal('99.90'))
+
+        rollup = OrderQuarterRollup.objects.get(quarter=datetime.date(2024, 4, 1), state='new')
+        self.assertEqual(rollup.orders, 1)
+        self.assertEqual(rollup.total_amount, Decimal('25.00'))
+
+    def test_import_invalid_records(self):
+        """Malformed ids and amounts reject their record instead of failing the import."""
+        result = import_orders([
+            self.order_record(customer='abc'),
+            self.order_record(account_manager=[self.account_manager.id]),
+            self.order_record(items=[{'product': {'id': self.product.id}, 'quantity': 1}]),
+            self.order_record(items=[{'product': self.product.id, 'quantity': True}]),
+            self.order_record(items='none'),
+            self.order_record(amount='NaN', items=[]),
+            self.order_record(amount='Infinity', items=[]),
+            self.order_record(customer=str(self.customer.id)),
+        ])
+
+        self.assertEqual(result.imported, 1)
+        self.assertEqual([record_number for record_number, _, _ in result.rejected], [1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(result.rejected[0][2], ["Invalid customer 'abc'."])
+        self.assertEqual(result.rejected[5][2], ["Invalid amount 'NaN'."])
+        self.assertEqual(Order.objects.get().customer, self.customer)
+
+    def test_import_invalid_lines(self):
+        """A line which is not valid JSON is rejected, the lines after it are imported."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'orders.jsonl')
+            rejects = os.path.join(directory, 'rejects.jsonl')
+            with open(path, 'w') as file:
+                file.write('\n'.join([
+                    json.dumps(self.order_record()),
+                    '{"customer": ',
+                    json.dumps(self.order_record()),
+                ]))
+            stderr = StringIO()
+            call_command('import_orders', path, chunk_size=2, rejects=rejects, stdout=StringIO(), stderr=stderr)
+            with open(rejects) as file:
+                rejected = [json.loads(line) for line in file]
+
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertIn("Rejected record 2: Invalid JSON", stderr.getvalue())
+        self.assertEqual([(reject['record'], reject['data']) for reject in rejected], [(2, '{"customer": ')])
+
+    def test_import_orders_queries(self):
+        """The number of queries does not depend on the number of orders."""
+        # creates the rollup of the quarter
+        import_orders([self.order_record()])
+        with self.assertNumQueries(13):
+            import_orders([self.order_record()])
+        with self.assertNumQueries(13):
+            import_orders([self.order_record() for _ in range(20)])
+        self.assertEqual(Order.objects.count(), 22)
+        self.assertEqual(OrderState.objects.count(), 22)
+        self.assertEqual(OrderItem.objects.count(), 22)
+
+
+class OrderListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        self.user_customer = User.objects.create_user(
+            username='customer_1',
+            email="customer_1@tue.nl",
+            password="password123",
+            role='customer',
+        )
+        user_account_manager = User.objects.create_user(
+            username='account_manager_1',
+            email="account_manager_1@tue.nl",
+            password="password123",
+            role='account_manager',
+        )
+        self.customer = CustomerProfile.objects.get(user=self.user_customer)
+        self.account_manager = AccountManagerProfile.objects.get(user=user_account_manager)
+        CustomerAccountManager.objects.create(
+            customer=self.customer,
+            account_manager=self.account_manager,
+        )
+
+    def create_orders(self, count):
+        for index in range(count):
+            Order.objects.create(
+                customer=self.customer,
+                account_manager=self.account_manager,
+                description=f"Order {index}",
+            )
+
+    def test_keyset_pagination(self):
+        self.create_orders(25)
+        # orders created in the same instant are ordered by id
+        Order.objects.filter(id__lte=10).update(created_at=timezone.make_aware(datetime.datetime(2024, 1, 1)))
+        orders = self.customer.orders.all()
+
+        first_page = paginate_by_created_at(orders, per_page=20)
+        second_page = paginate_by_created_at(orders, first_page.next_cursor, per_page=20)
+
+        self.assertEqual(len(first_page), 20)
+        self.assertTrue(first_page.has_next)
+        self.assertEqual(len(second_page), 5)
+        self.assertFalse(second_page.has_next)
+        self.assertEqual(
+            [order.id for order in first_page] + [order.id for order in second_page],
+            list(orders.order_by('-created_at', '-id').values_list('id', flat=True)),
+        )
+        # an invalid cursor gives the first page
+        self.assertEqual(list(paginate_by_created_at(orders, 'invalid', per_page=20)), list(first_page))
+
+    def test_order_list_queries(self):
+        """The number of queries does not depend on the number of orders."""
+        self.client.force_login(self.user_customer)
+        self.create_orders(3)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('customer_order_list'))
+        self.assertEqual(len(response.context['orders']), 3)
+
+        self.create_orders(40)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('customer_order_list'))
+        self.assertEqual(len(response.context['orders']), 20)
+        self.assertContains(response, self.account_manager.user.email)
+
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                reverse('customer_order_list'),
+                {'cursor': response.context['orders'].next_cursor},
+            )
+        self.assertEqual(len(response.context['orders']), 20)
+
+
+class OrderItemTests(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        self.user_customer = User.objects.create_user(
+            username='customer_1',
+            email="customer_1@tue.nl",
+            password="password123",
+            role='customer',
+        )
+        user_account_manager = User.objects.create_user(
+            username='account_manager_1',
+            email="account_manager_1@tue.nl",
+            password="password123",
+            role='account_manager',
+        )
+        user_service_provider = User.objects.create_user(
+            username='service_provider_1',
+            email="service_provider_1@tue.nl",
+            password="password123",
+            role='service_provider',
+        )
+        self.customer = CustomerProfile.objects.get(user=self.user_customer)
+        self.account_manager = AccountManagerProfile.objects.get(user=user_account_manager)
+        service_provider = ServiceProviderProfile.objects.get(user=user_service_provider)
+        CustomerAccountManager.objects.create(customer=self.customer, account_manager=self.account_manager)
+        AccountManagerServiceProvider.objects.create(
+            account_manager=self.account_manager,
+            service_provider=service_provider,
+        )
+        self.products = [
+            ProductAndService.objects.create(
+                name=f"Product {index}",
+                price=Decimal('12.50') * index,
+                service_provider=service_provider,
+            )
+            for index in range(1, 4)
+        ]
+        self.order = Order.objects.create(customer=self.customer, account_manager=self.account_manager)
+
+    def get_rollup_amount(self):
+        return OrderQuarterRollup.objects.get(state='new').total_amount
+
+    def test_amount_follows_items(self):
+        item = OrderItem.objects.create(order=self.order, product=self.products[0], quantity=2)
+        OrderItem.objects.create(order=self.order, product=self.products[1], quantity=1)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.amount, Decimal('50.00'))
+
+        item.quantity = 3
+        item.save()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.amount, Decimal('62.50'))
+
+        item.delete()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.amount, Decimal('25.00'))
+
+        product = self.products[1]
+        product.price = Decimal('30.00')
+        product.save()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.amount, Decimal('30.00'))
+        self.assertEqual(self.get_rollup_amount(), Decimal('30.00'))
+
+    def test_price_change_is_a_single_update(self):
+        """A new price updates every order with the product in the same number of queries."""
+        product = self.products[0]
+        OrderItem.objects.create(order=self.order, product=product, quantity=2)
+
+        def change_price(price):
+            product.price = price
+            with CaptureQueriesContext(connection) as queries:
+                product.save()
+            return len(queries)
+
+        query_count = change_price(Decimal('15.00'))
+        for quantities in [(1,), (3, 2)]:
+            order = Order.objects.create(customer=self.customer, account_manager=self.account_manager)
+            for quantity in quantities:
+                OrderItem.objects.create(order=order, product=product, quantity=quantity)
+        self.assertEqual(change_price(Decimal('20.00')), query_count)
+
+        self.assertEqual(
+            sorted(Order.objects.values_list('amount', flat=True)),
+            [Decimal('20.00'), Decimal('40.00'), Decimal('100.00')],
+        )
+        self.assertEqual(self.get_rollup_amount(), Decimal('160.00'))
+
+    def test_backfill_order_amount(self):
+        OrderItem.objects.create(order=self.order, product=self.products[2], quantity=2)
+        Order.objects.update(amount=None)
+
+        call_command('backfill_order_amount', batch_size=1, stdout=StringIO())
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.amount, Decimal('75.00'))
+
+    def test_order_detail_queries(self):
+        """The items are loaded with their products, whatever their number."""
+        self.client.force_login(self.user_customer)
+        url = reverse('customer_order_detail', args=[self.order.id])
+        OrderItem.objects.create(order=self.order, product=self.products[0], quantity=2)
+        with self.assertNumQueries(5):
+            self.client.get(url)
+
+        for product in self.products:
+            OrderItem.objects.create(order=self.order, product=product, quantity=1)
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual(
+            [item.line_total for item in response.context['items']],
+            [Decimal('25.00'), Decimal('12.50'), Decimal('25.00'), Decimal('37.50')],
+        )
+        self.assertEqual(response.context['total'], Decimal('100.00'))
+        self.assertContains(response, "Order total: €100.00")
+
+
+class CatalogTests(TransactionTestCase):
+
+    def setUp(self):
+        self.user_customer = User.objects.create_user(
+            username='customer_1',
+            email="customer_1@tue.nl",
+            password="password123",
+            role='customer',
+        )
+        user_account_manager = User.objects.create_user(
+            username='account_manager_1',
+            email="account_manager_1@tue.nl",
+            password="password123",
+            role='account_manager',
+        )
+        user_service_provider = User.objects.create_user(
+            username='service_provider_1',
+            email="service_provider_1@tue.nl",
+            password="password123",
+            role='service_provider',
+        )
+        customer = CustomerProfile.objects.get(user=self.user_customer)
+        self.account_manager = AccountManagerProfile.objects.get(user=user_account_manager)
+        self.service_provider = ServiceProviderProfile.objects.get(user=user_service_provider)
+        CustomerAccountManager.objects.create(customer=customer, account_manager=self.account_manager)
+        AccountManagerServiceProvider.objects.create(
+            account_manager=self.account_manager,
+            service_provider=self.service_provider,
+        )
+        for index in range(catalog.PER_PAGE + 5):
+            ProductAndService.objects.create(
+                name=f"Product {index:02}",
+                description="Laser" if index % 10 == 0 else None,
+                price=Decimal('10.00'),
+                service_provider=self.service_provider,
+            )
+        self.order = Order.objects.create(customer=customer, account_manager=self.account_manager)
+        self.url = reverse('customer_order_available_items_to_add', args=[self.order.id])
+
+    def test_pagination_and_search(self):
+        self.client.force_login(self.user_customer)
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context['products_and_services']), catalog.PER_PAGE)
+        self.assertContains(response, "Page 1 of 2")
+
+        response = self.client.get(self.url, {'page': 2})
+        self.assertEqual(len(response.context['products_and_services']), 5)
+
+        response = self.client.get(self.url, {'q': 'laser'})
+        self.assertEqual(
+            [product['name'] for product in response.context['products_and_services']],
+            ["Product 00", "Product 10", "Product 20"],
+        )
+
+    def test_cache_hits(self):
+        self.client.force_login(self.user_customer)
+        stats = catalog.get_cache_stats()
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+
+        self.assertFalse(any('order_productandservice' in query['sql'] for query in queries))
+        self.assertEqual(catalog.get_cache_stats()['misses'], stats['misses'] + 1)
+        self.assertEqual(catalog.get_cache_stats()['hits'], stats['hits'] + 1)
+        self.assertEqual(catalog.get_cache_stats()['renders'], stats['renders'] + 2)
+
+    def test_out_of_range_pages(self):
+        """Out of range page numbers are cached as the page they show."""
+        catalog.get_page(self.account_manager.id, page_number=2)
+        stats = catalog.get_cache_stats()
+        for page_number in [3, 9999]:
+            page = catalog.get_page(self.account_manager.id, page_number=page_number)
+            self.assertEqual(page['number'], 2)
+            self.assertIsNone(cache.get(catalog.get_page_key(self.account_manager.id, page_number, '')))
+        self.assertIsNotNone(cache.get(catalog.get_page_key(self.account_manager.id, 2, '')))
+        self.assertEqual(catalog.get_cache_stats()['misses'], stats['misses'] + 2)
+
+    def test_version_is_replaced(self):
+        version = catalog.get_version()
+        catalog.increment_version()
+        self.assertNotEqual(catalog.get_version(), version)
+
+    def test_invalidated_on_product_change(self):
+        page = catalog.get_page(self.account_manager.id, search='new')
+        self.assertEqual(page['count'], 0)
+
+        product = ProductAndService.objects.create(
+            name="New product",
+            price=Decimal('10.00'),
+            service_provider=self.service_provider,
+        )
+        self.assertEqual(catalog.get_page(self.account_manager.id, search='new')['count'], 1)
+
+        product.delete()
+        self.assertEqual(catalog.get_page(self.account_manager.id, search='new')['count'], 0)
@@ -1,12 +1,15 @@
+import time
+
 from django.shortcuts import render, redirect
 from django.contrib.auth.views import LoginView
 from django.views import View
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 
+from order import catalog
 from order.forms import CustomerOrderForm
 from order import models as order_models
-from registrar import models as registrar_models
+from order.pagination import paginate_by_created_at
 
 
 def homepage(request):
@@ -38,11 +41,19 @@ class CustomerLoginView(LoginView):
 
 class OrderList(LoginRequiredMixin, View):
     """View for customers to view and create orders."""
+    paginate_by = 20
+
+    def get_orders(self, request, customer):
+        """The page of orders of the `cursor` query parameter, newest first."""
+        orders = customer.orders.select_related('account_manager__user')
+        return paginate_by_created_at(orders, request.GET.get('cursor'), self.paginate_by)
+
     def get(self, request):
+        customer = request.user.customer_profile
         return render(
             request,
             'customer_order_list.html',
-            {'orders': request.user.customer_profile.orders.all()}
+            {'orders': self.get_orders(request, customer)}
         )
     
     def post(self, request):
@@ -56,7 +67,7 @@ class OrderList(LoginRequiredMixin, View):
             order.save()
             return redirect('customer_order_list')
         else:
-            orders = customer.orders.all()
+            orders = self.get_orders(request, customer)
             return render(
                 request,
                 'customer_order_list.html',
@@ -64,33 +75,43 @@ class OrderList(LoginRequiredMixin, View):
             )
 
 
+def get_order_items(order):
+    """The items of an order with their products and line totals, and the order total."""
+    items = order.items.select_related('product').annotate(line_total=order_models.OrderItem.line_total())
+    return {'items': items, 'total': order.items_total}
+
+
 class OrderDetail(LoginRequiredMixin, View):
     def get(self, request, order_id):
-        order = request.user.customer_profile.orders.get(id=order_id)
+        order = request.user.customer_profile.orders.select_related(
+            'account_manager__user',
+        ).annotate(items_total=order_models.Order.items_total()).get(id=order_id)
         return render(
             request,
             'customer_order_detail.html',
-            {'order': order}
+            {'order': order, **get_order_items(order)}
         )
         
 
 @login_required
 def list_available_products_services(request, order_id):
+    """A page of the catalog of the account manager of the order, see `order.catalog`."""
+    started = time.perf_counter()
     order = request.user.customer_profile.orders.get(id=order_id)
-    service_provider_ids = registrar_models.AccountManagerServiceProvider.objects.filter(
-        account_manager=order.account_manager
-    ).values_list('service_provider_id', flat=True)
-    products_and_services = order_models.ProductAndService.objects.filter(
-        service_provider_id__in=service_provider_ids
-    )
-    return render(
+    search = request.GET.get('q', '').strip()
+    page = catalog.get_page(order.account_manager_id, request.GET.get('page'), search)
+    response = render(
         request,
         'partials/products_and_services_selection.html',
         {
             'order': order,
-            'products_and_services': products_and_services,
+            'products_and_services': page['products'],
+            'page': page,
+            'search': search,
         }
     )
+    catalog.record_render(time.perf_counter() - started)
+    return response
 
 @login_required
 def add_product_or_service_to_order(request):
@@ -101,9 +122,11 @@ def add_product_or_service_to_order(request):
         product=item,
         quantity=request.POST.get('quantity', 1)
     )
-    order.refresh_from_db()
+    order = request.user.customer_profile.orders.annotate(
+        items_total=order_models.Order.items_total(),
+    ).get(id=order.id)
     return render(
         request,
         'partials/products_and_services_list.html',
-        {'order': order}
+        {'order': order, **get_order_items(order)}
     )
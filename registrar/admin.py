@@ -53,13 +53,23 @@ class CustomUserAdmin(UserProfilePermissionMixin, UserAdmin):
             )
 
 
-admin.site.register([
+@admin.register(
     registrar_models.CustomerProfile,
     registrar_models.AccountManagerProfile,
     registrar_models.ServiceProviderProfile,
-    registrar_models.AccountManagerServiceProvider,
-    registrar_models.CustomerAccountManager,
-])
+)
+class ProfileAdmin(admin.ModelAdmin):
+    list_select_related = ['user']
+
+
+@admin.register(registrar_models.AccountManagerServiceProvider)
+class AccountManagerServiceProviderAdmin(admin.ModelAdmin):
+    list_select_related = ['account_manager__user', 'service_provider__user']
+
+
+@admin.register(registrar_models.CustomerAccountManager)
+class CustomerAccountManagerAdmin(admin.ModelAdmin):
+    list_select_related = ['customer__user', 'account_manager__user']
 
 
 admin.site.site_header = "JePPIX Admin Portal"
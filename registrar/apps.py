@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class RegistrarConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'registrar'
+
+    def ready(self):
+        from registrar import signals  # noqa: F401
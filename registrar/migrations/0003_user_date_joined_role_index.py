@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 15:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('registrar', '0002_alter_user_role'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['date_joined', 'role'], name='user_date_joined_role_idx'),
+        ),
+    ]
@@ -0,0 +1,148 @@
+"""registrar.mixins.admin_pagination.py
+
+Keyset pagination of the admin changelists of very large tables.
+
+Django's paginator counts every row of the changelist and fetches a page
+with an OFFSET, both of which read all the rows before the page. The
+keyset changelist fetches the page after (or before) the sort key of the
+last (or first) row of the current page instead, which searches the
+index of the ordering whatever the page, and only counts up to
+`list_count_cap` rows.
+
+The keyset is the ordering of the changelist, the `ordering` of the
+admin with the primary key added by Django to make it total. Orderings
+which cannot be used as a keyset, e.g. on nullable or related fields
+when sorting by a column, fall back to Django's pagination.
+"""
+import base64
+import json
+
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+CURSOR_VAR = 'cursor'
+
+
+def encode_cursor(direction, values):
+    # str() rather than DjangoJSONEncoder, which truncates datetimes to milliseconds
+    return base64.urlsafe_b64encode(json.dumps([direction, values], default=str).encode()).decode()
+
+
+def decode_cursor(cursor, keyset):
+    """(direction, values) of a cursor, None if the cursor is invalid."""
+    try:
+        direction, values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if direction not in ('after', 'before') or len(values) != len(keyset):
+            return None
+        return direction, [field.to_python(value) for (_, field, _), value in zip(keyset, values)]
+    except (TypeError, ValueError, UnicodeError, ValidationError):
+        return None
+
+
+def keyset_filter(keyset, values, before=False):
+    """Filter on the rows after, or before, the given values of the keyset."""
+    condition = Q()
+    for index, (name, _, descending) in enumerate(keyset):
+        lookup = 'gt' if descending == before else 'lt'
+        equal = {keyset_name: value for (keyset_name, _, _), value in zip(keyset[:index], values)}
+        condition |= Q(**equal, **{f'{name}__{lookup}': values[index]})
+    return condition
+
+
+class KeysetChangeList(ChangeList):
+    keyset = None
+    result_count_capped = False
+    next_url = None
+    previous_url = None
+
+    def get_keyset(self):
+        """
+        (name, field, descending) of every part of the ordering of the
+        changelist, None if the ordering cannot be used as a keyset.
+        """
+        keyset = []
+        for part in self.queryset.query.order_by:
+            if not isinstance(part, str):
+                return None
+            name = part.lstrip('-')
+            try:
+                field = self.lookup_opts.pk if name == 'pk' else self.lookup_opts.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if not field.concrete or field.null or (field.is_relation and name != field.attname):
+                return None
+            keyset.append((name, field, part.startswith('-')))
+        return keyset or None
+
+    def get_keyset_values(self, row):
+        return [getattr(row, field.attname) for _, field, _ in self.keyset]
+
+    def get_results(self, request):
+        self.keyset = self.get_keyset()
+        if self.keyset is None:
+            return super().get_results(request)
+
+        per_page = self.list_per_page
+        cursor = getattr(request, '_keyset_cursor', None)
+        cursor = decode_cursor(cursor, self.keyset) if cursor else None
+        direction, values = cursor or ('after', None)
+
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(keyset_filter(self.keyset, values, before=direction == 'before'))
+        if direction == 'before':
+            queryset = queryset.reverse()
+        result_list = list(queryset[:per_page + 1])
+        has_more = len(result_list) > per_page
+        result_list = result_list[:per_page]
+        if direction == 'before':
+            result_list.reverse()
+            if not has_more:
+                # back to the first page, which may have more rows
+                values = None
+                result_list = list(self.queryset[:per_page + 1])
+                has_more = len(result_list) > per_page
+                result_list = result_list[:per_page]
+
+        has_next = has_more if direction == 'after' or values is None else True
+        has_previous = values is not None
+        if has_next:
+            self.next_url = self.get_query_string({
+                CURSOR_VAR: encode_cursor('after', self.get_keyset_values(result_list[-1])),
+            })
+        if has_previous and result_list:
+            self.previous_url = self.get_query_string({
+                CURSOR_VAR: encode_cursor('before', self.get_keyset_values(result_list[0])),
+            })
+
+        # a capped count, which stops reading after `list_count_cap` rows
+        count_cap = self.model_admin.list_count_cap
+        result_count = self.queryset.order_by()[:count_cap + 1].count()
+        self.result_count_capped = result_count > count_cap
+        self.result_count = min(result_count, count_cap)
+        self.show_full_result_count = False
+        self.full_result_count = None
+        self.show_admin_actions = True
+        self.result_list = result_list
+        self.can_show_all = False
+        self.multi_page = has_next or has_previous
+        self.paginator = None
+
+
+class KeysetPaginationMixin:
+    """Paginate the changelist by keyset, see `KeysetChangeList`."""
+    list_count_cap = 1000
+    show_full_result_count = False
+    change_list_template = 'admin/keyset_change_list.html'
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def changelist_view(self, request, extra_context=None):
+        # the cursor is not a filter of the changelist
+        if CURSOR_VAR in request.GET:
+            request.GET = request.GET.copy()
+            request._keyset_cursor = request.GET.pop(CURSOR_VAR)[-1]
+        return super().changelist_view(request, extra_context)
@@ -1,4 +1,4 @@
-import registrar.models as registrar_models
+from registrar.scope import get_admin_scope
 
 
 class UserProfilePermissionMixin:
@@ -9,17 +9,7 @@ class UserProfilePermissionMixin:
     def get_queryset(self, request):
         """Account managers can only see their OWN customers."""
         qs = super().get_queryset(request)
-        if request.user.is_superuser or request.user.role == 'admin':
-            return qs
-        elif request.user.role == 'account_manager':
-            customer_ids = registrar_models.CustomerAccountManager.objects.filter(
-                account_manager__user=request.user
-            ).values_list('customer__user_id', flat=True)
-            service_provider_ids = registrar_models.AccountManagerServiceProvider.objects.filter(
-                account_manager__user=request.user
-            ).values_list('service_provider__user_id', flat=True)
-            return qs.filter(id__in=list(customer_ids)+list(service_provider_ids))
-        return qs.none()
+        return get_admin_scope(request).filter_users(qs)
     
     def get_form(self, request, obj=None, **kwargs):
         """Account managers can only create customers."""
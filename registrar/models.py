@@ -32,6 +32,12 @@ class User(AbstractUser):
     phone = models.TextField(blank=True, null=True)
     bio = models.TextField(blank=True, null=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # user statistics of the reports, see `stat_analysis.stat_utils`
+            models.Index(fields=['date_joined', 'role'], name='user_date_joined_role_idx'),
+        ]
+
     def __str__(self):
         return f"{self.email} - {self.role}"
 
@@ -0,0 +1,121 @@
+"""registrar.relationships.py
+
+Cached lookups of the relationship graph between account managers,
+customers and service providers, i.e. of the CustomerAccountManager
+and AccountManagerServiceProvider tables.
+
+Every node of the graph is cached on its own in the shared cache, under
+a key including a global version. Any write to the relationship tables
+replaces the version with a new unique one once committed (see
+`registrar.signals`), so that every process reads the new relationships
+from the database. The version is not incremented, as `cache.incr` is
+not atomic with every backend and two concurrent writes could then end
+up with a single new version. The nodes of earlier versions expire after
+`NODE_TIMEOUT`.
+
+Lookups inside a transaction always read the database, as they may see
+uncommitted relationships, which must not end up in the shared cache.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from registrar import models as registrar_models
+
+
+VERSION_KEY = 'registrar:relationships:version'
+
+# seconds
+NODE_TIMEOUT = 24 * 60 * 60
+
+# per process, see `get_cache_stats`
+cache_stats = {'hits': 0, 'misses': 0}
+
+
+def new_version():
+    # unique, so that a version evicted from the cache does not make the
+    # nodes cached under an earlier version valid again
+    return uuid.uuid4().hex
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, new_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def increment_version():
+    cache.set(VERSION_KEY, new_version(), timeout=None)
+
+
+def invalidate():
+    """Invalidate the cached graph once the current transaction, if any, is committed."""
+    transaction.on_commit(increment_version)
+
+
+def get_cache_stats():
+    """Cache hits and misses of the relationship lookups of this process."""
+    return dict(cache_stats)
+
+
+def get_node(name, node_id, load):
+    if connection.in_atomic_block:
+        return load(node_id)
+
+    key = f'registrar:relationships:{get_version()}:{name}:{node_id}'
+    node = cache.get(key)
+    if node is None:
+        cache_stats['misses'] += 1
+        node = load(node_id)
+        cache.set(key, node, timeout=NODE_TIMEOUT)
+    else:
+        cache_stats['hits'] += 1
+    return node
+
+
+def load_customer(customer_id):
+    return {
+        'account_manager_ids': frozenset(
+            registrar_models.CustomerAccountManager.objects.filter(
+                customer_id=customer_id,
+            ).values_list('account_manager_id', flat=True)
+        ),
+    }
+
+
+def load_account_manager(account_manager_id):
+    # The customers of an account manager are not cached, there can be
+    # too many of them, see `registrar.scope` to filter on them.
+    return {
+        'service_provider_ids': frozenset(
+            registrar_models.AccountManagerServiceProvider.objects.filter(
+                account_manager_id=account_manager_id,
+            ).values_list('service_provider_id', flat=True)
+        ),
+    }
+
+
+def load_account_manager_user(user_id):
+    return {
+        'account_manager_id': registrar_models.AccountManagerProfile.objects.filter(
+            user_id=user_id,
+        ).values_list('id', flat=True).first(),
+    }
+
+
+def get_account_manager_ids(customer_id):
+    """Ids of the account managers of a customer profile."""
+    return get_node('customer', customer_id, load_customer)['account_manager_ids']
+
+
+def get_service_provider_ids(account_manager_id):
+    """Ids of the service provider profiles managed by an account manager."""
+    return get_node('account_manager', account_manager_id, load_account_manager)['service_provider_ids']
+
+
+def get_account_manager_id(user):
+    """Id of the account manager profile of a user, None if the user is not an account manager."""
+    return get_node('account_manager_user', user.id, load_account_manager_user)['account_manager_id']
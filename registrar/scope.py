@@ -0,0 +1,93 @@
+"""registrar.scope.py
+
+The rows a user can see in the admin interface.
+
+The scope of a request is computed once and memoized on the request, so
+that the changelist, its count and its filters share it. Account
+managers are scoped with semi-joins on the relationship tables, i.e.
+`IN (SELECT ...)` subqueries searching their account manager index,
+rather than with lists of ids, so that the size of the queries does not
+grow with the number of customers of an account manager. A correlated
+EXISTS would make SQLite scan the whole scoped table instead.
+"""
+from dataclasses import dataclass
+
+from django.db.models import Q
+
+from registrar import models as registrar_models
+from registrar import relationships
+
+
+@dataclass(frozen=True)
+class AdminScope:
+    unrestricted: bool = False
+    account_manager_id: int = None
+    service_provider_id: int = None
+
+    def filter_customers(self, qs, customer_field='customer'):
+        """Rows of the customers of the account manager, `customer_field` refers to the CustomerProfile."""
+        if self.unrestricted:
+            return qs
+        if self.account_manager_id is None:
+            return qs.none()
+        return qs.filter(**{
+            f'{customer_field}__in': registrar_models.CustomerAccountManager.objects.filter(
+                account_manager_id=self.account_manager_id,
+            ).values('customer'),
+        })
+
+    def filter_service_providers(self, qs, service_provider_field='service_provider'):
+        """
+        Rows of the service providers managed by the account manager, or of
+        the service provider itself, `service_provider_field` refers to the
+        ServiceProviderProfile.
+        """
+        if self.unrestricted:
+            return qs
+        if self.service_provider_id is not None:
+            return qs.filter(**{service_provider_field: self.service_provider_id})
+        if self.account_manager_id is None:
+            return qs.none()
+        return qs.filter(**{
+            f'{service_provider_field}__in': registrar_models.AccountManagerServiceProvider.objects.filter(
+                account_manager_id=self.account_manager_id,
+            ).values('service_provider'),
+        })
+
+    def filter_users(self, qs):
+        """Users who are customers or service providers of the account manager."""
+        if self.unrestricted:
+            return qs
+        if self.account_manager_id is None:
+            return qs.none()
+        return qs.filter(
+            Q(pk__in=registrar_models.CustomerAccountManager.objects.filter(
+                account_manager_id=self.account_manager_id,
+            ).values('customer__user'))
+            | Q(pk__in=registrar_models.AccountManagerServiceProvider.objects.filter(
+                account_manager_id=self.account_manager_id,
+            ).values('service_provider__user'))
+        )
+
+
+def get_user_scope(user):
+    """The scope of a user."""
+    role = getattr(user, 'role', None)
+    if user.is_superuser or role == 'admin':
+        return AdminScope(unrestricted=True)
+    if role == 'account_manager':
+        return AdminScope(account_manager_id=relationships.get_account_manager_id(user))
+    if role == 'service_provider':
+        return AdminScope(
+            service_provider_id=registrar_models.ServiceProviderProfile.objects.filter(
+                user=user,
+            ).values_list('id', flat=True).first(),
+        )
+    return AdminScope()
+
+
+def get_admin_scope(request):
+    """The scope of the user of a request, memoized on the request."""
+    if not hasattr(request, '_admin_scope'):
+        request._admin_scope = get_user_scope(request.user)
+    return request._admin_scope
@@ -0,0 +1,30 @@
+"""registrar.signals.py
+
+Invalidate the cached relationship graph, see `registrar.relationships`,
+when the relationships or the account manager profiles change.
+"""
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from registrar import relationships
+from registrar.models import (
+    AccountManagerProfile,
+    AccountManagerServiceProvider,
+    CustomerAccountManager,
+)
+
+
+@receiver(post_save, sender=CustomerAccountManager)
+@receiver(post_delete, sender=CustomerAccountManager)
+@receiver(post_save, sender=AccountManagerServiceProvider)
+@receiver(post_delete, sender=AccountManagerServiceProvider)
+@receiver(post_save, sender=AccountManagerProfile)
+@receiver(post_delete, sender=AccountManagerProfile)
+def invalidate_relationships(sender, **kwargs):
+    relationships.invalidate()
+
+
+@receiver(post_migrate)
+def invalidate_relationships_after_migrate(sender, **kwargs):
+    # also sent by `flush`, which deletes every row without signals
+    relationships.increment_version()
@@ -1,3 +1,168 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from registrar import relationships
+from registrar.scope import get_admin_scope
+from registrar.models import (
+    AccountManagerProfile,
+    AccountManagerServiceProvider,
+    CustomerAccountManager,
+    CustomerProfile,
+    ServiceProviderProfile,
+)
+
+
+User = get_user_model()
+
+
+class RelationshipGraphTests(TransactionTestCase):
+
+    def setUp(self):
+        users = {
+            username: User.objects.create_user(
+                username=username,
+                email=f"{username}@tue.nl",
+                password="password123",
+                role=role,
+            )
+            for username, role in [
+                ('customer_1', 'customer'),
+                ('account_manager_1', 'account_manager'),
+                ('service_provider_1', 'service_provider'),
+            ]
+        }
+        self.user_account_manager = users['account_manager_1']
+        self.customer = CustomerProfile.objects.get(user=users['customer_1'])
+        self.account_manager = AccountManagerProfile.objects.get(user=self.user_account_manager)
+        self.service_provider = ServiceProviderProfile.objects.get(user=users['service_provider_1'])
+        CustomerAccountManager.objects.create(customer=self.customer, account_manager=self.account_manager)
+
+    def test_lookups(self):
+        self.assertEqual(relationships.get_account_manager_ids(self.customer.id), {self.account_manager.id})
+        self.assertEqual(relationships.get_account_manager_id(self.user_account_manager), self.account_manager.id)
+        self.assertEqual(relationships.get_service_provider_ids(self.account_manager.id), set())
+
+    def test_cache_hits(self):
+        stats = relationships.get_cache_stats()
+        relationships.get_service_provider_ids(self.account_manager.id)
+        relationships.get_account_manager_ids(self.customer.id)
+        with CaptureQueriesContext(connection) as queries:
+            relationships.get_service_provider_ids(self.account_manager.id)
+            relationships.get_account_manager_ids(self.customer.id)
+
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(relationships.get_cache_stats()['misses'], stats['misses'] + 2)
+        self.assertEqual(relationships.get_cache_stats()['hits'], stats['hits'] + 2)
+
+    def test_invalidated_on_create_and_delete(self):
+        version = cache.get(relationships.VERSION_KEY)
+        self.assertEqual(relationships.get_service_provider_ids(self.account_manager.id), set())
+
+        link = AccountManagerServiceProvider.objects.create(
+            account_manager=self.account_manager,
+            service_provider=self.service_provider,
+        )
+        self.assertNotEqual(cache.get(relationships.VERSION_KEY), version)
+        self.assertEqual(
+            relationships.get_service_provider_ids(self.account_manager.id),
+            {self.service_provider.id},
+        )
+
+        link.delete()
+        self.assertEqual(relationships.get_service_provider_ids(self.account_manager.id), set())
+
+    def test_not_cached_in_transaction(self):
+        stats = relationships.get_cache_stats()
+        with transaction.atomic():
+            AccountManagerServiceProvider.objects.create(
+                account_manager=self.account_manager,
+                service_provider=self.service_provider,
+            )
+            self.assertEqual(
+                relationships.get_service_provider_ids(self.account_manager.id),
+                {self.service_provider.id},
+            )
+            transaction.set_rollback(True)
+
+        self.assertEqual(relationships.get_cache_stats(), stats)
+        self.assertEqual(relationships.get_service_provider_ids(self.account_manager.id), set())
+
+
+class AdminScopeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        self.user_account_manager = User.objects.create_user(
+            username='account_manager_1',
+            email="account_manager_1@tue.nl",
+            password="password123",
+            role='account_manager',
+            is_staff=True,
+        )
+        self.account_manager = AccountManagerProfile.objects.get(user=self.user_account_manager)
+        user_service_provider = User.objects.create_user(
+            username='service_provider_1',
+            email="service_provider_1@tue.nl",
+            password="password123",
+            role='service_provider',
+        )
+        AccountManagerServiceProvider.objects.create(
+            account_manager=self.account_manager,
+            service_provider=ServiceProviderProfile.objects.get(user=user_service_provider),
+        )
+        User.objects.create_user(
+            username='service_provider_2',
+            email="service_provider_2@tue.nl",
+            password="password123",
+            role='service_provider',
+        )
+        self.add_customers(1)
+
+    @classmethod
+    def add_customers(cls, count):
+        for _ in range(count):
+            index = User.objects.count()
+            user = User.objects.create_user(
+                username=f'customer_{index}',
+                email=f"customer_{index}@tue.nl",
+                password="password123",
+                role='customer',
+            )
+            CustomerAccountManager.objects.create(
+                customer=CustomerProfile.objects.get(user=user),
+                account_manager=cls.account_manager,
+            )
+
+    def test_scope_is_memoized(self):
+        request = RequestFactory().get('/admin/')
+        request.user = self.user_account_manager
+        scope = get_admin_scope(request)
+        self.assertEqual(scope.account_manager_id, self.account_manager.id)
+        with self.assertNumQueries(0):
+            self.assertIs(get_admin_scope(request), scope)
+
+    def test_filter_users(self):
+        request = RequestFactory().get('/admin/')
+        request.user = self.user_account_manager
+        users = get_admin_scope(request).filter_users(User.objects.all())
+        self.assertEqual(
+            set(users.values_list('username', flat=True)),
+            {'service_provider_1', 'customer_3'},
+        )
+
+    def test_changelist_queries_do_not_grow_with_customers(self):
+        self.client.force_login(self.user_account_manager)
+
+        def get_changelist_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('admin:registrar_user_changelist'))
+            self.assertEqual(response.status_code, 200)
+            return len(queries), max(len(query['sql']) for query in queries)
+
+        queries = get_changelist_queries()
+        self.add_customers(20)
+        self.assertEqual(get_changelist_queries(), queries)
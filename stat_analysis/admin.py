@@ -1,7 +1,85 @@
 from django.contrib import admin
+from registrar.mixins.admin_pagination import KeysetPaginationMixin
+from registrar.models import ServiceProviderProfile
 from stat_analysis import models as stat_analysis_models
 
 
+class ServiceProviderListFilter(admin.SimpleListFilter):
+    """
+    The service providers of the listed results, read with their emails in
+    a single query, whereas the choices of a related field filter would
+    load every service provider and then its user.
+    """
+    title = "service provider"
+    parameter_name = 'service_provider'
+
+    def lookups(self, request, model_admin):
+        return (
+            ServiceProviderProfile.objects
+            .filter(pk__in=model_admin.get_queryset(request).values('service_provider'))
+            .order_by('user__email')
+            .values_list('pk', 'user__email')
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() and self.value().isdigit():
+            return queryset.filter(service_provider=self.value())
+        return queryset
+
+
+class CompletionTimePercentilesMixin:
+
+    @admin.display(description="Completion time p50 / p90 / p99 (days)")
+    def completion_time_percentiles(self, obj):
+        return "; ".join(
+            f"{job_type}: " + " / ".join(
+                f"{distribution[percentile]:.1f}" for percentile in ['p50', 'p90', 'p99']
+            )
+            for job_type, distribution in obj.completion_time_distribution.items()
+            if distribution['count']
+        ) or "-"
+
+
+class QuarterResultInline(admin.TabularInline):
+    """Read-only per-quarter breakdown of the results of a report."""
+    extra = 0
+    can_delete = False
+    ordering = ['quarter']
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class OrderQuarterResultInline(QuarterResultInline):
+    model = stat_analysis_models.OrderQuarterResult
+    fields = [
+        'quarter',
+        'total_orders',
+        'total_amount',
+        'average_amount',
+        'order_new',
+        'order_pending',
+        'order_completed',
+        'order_closed',
+    ]
+
+
+class UserQuarterResultInline(QuarterResultInline):
+    model = stat_analysis_models.UserQuarterResult
+    fields = [
+        'quarter',
+        'total_users',
+        'total_customers',
+        'total_account_managers',
+        'total_service_providers',
+        'average_orders_per_user',
+        'average_customers_per_account_manager',
+    ]
+
+
 @admin.register(stat_analysis_models.Report)
 class ReportResultAdmin(admin.ModelAdmin):
     list_display = [
@@ -12,17 +90,39 @@ class ReportResultAdmin(admin.ModelAdmin):
         'year_from',
         'quarter_to',
         'year_to',
+        'backend',
         'created_at',
+        'status',
+        'progress',
+        'started_at',
+        'finished_at',
+        'cache_hit',
     ]
+    list_select_related = ['created_by']
     list_filter = [
+        'status',
+        'backend',
+        'cache_hit',
         'created_by',
         'year_from',
         'year_to',
     ]
     readonly_fields = [
         'created_by',
+        'status',
+        'progress',
+        'started_at',
+        'finished_at',
+        'error',
+        'cache_hit',
+        'data_watermark',
+        'pdf_report',
+        'pdf_hash',
     ]
     ordering = ['-created_at']
+    # the job breakdown has a row per service provider and quarter,
+    # see its own changelist
+    inlines = [OrderQuarterResultInline, UserQuarterResultInline]
 
     def save_model(self, request, obj, form, change):
         if not obj.created_by:
@@ -31,7 +131,7 @@ class ReportResultAdmin(admin.ModelAdmin):
 
 
 @admin.register(stat_analysis_models.JobReportResult)
-class JobReportResultAdmin(admin.ModelAdmin):
+class JobReportResultAdmin(CompletionTimePercentilesMixin, KeysetPaginationMixin, admin.ModelAdmin):
     list_display = [
         'id',
         'report__title',
@@ -39,20 +139,22 @@ class JobReportResultAdmin(admin.ModelAdmin):
         'total_jobs',
         'average_completion_time_regular',
         'average_completion_time_wafer_run',
+        'completion_time_percentiles',
         'jobs_created',
         'jobs_active',
         'jobs_completed',
         'report__created_at',
     ]
+    list_select_related = ['report', 'service_provider__user']
     list_filter = [
-        'service_provider',
+        ServiceProviderListFilter,
         'report__title',
     ]
     ordering = ['-id']
 
 
 @admin.register(stat_analysis_models.OrderReportResult)
-class OrderReportResultAdmin(admin.ModelAdmin):
+class OrderReportResultAdmin(KeysetPaginationMixin, admin.ModelAdmin):
     list_display = [
         'id',
         'report__title',
@@ -65,6 +167,7 @@ class OrderReportResultAdmin(admin.ModelAdmin):
         'order_closed',
         'report__created_at',
     ]
+    list_select_related = ['report']
     list_filter = [
         'report__title',
     ]
@@ -72,7 +175,7 @@ class OrderReportResultAdmin(admin.ModelAdmin):
 
 
 @admin.register(stat_analysis_models.UserReportResult)
-class UserReportResultAdmin(admin.ModelAdmin):
+class UserReportResultAdmin(KeysetPaginationMixin, admin.ModelAdmin):
     list_display = [
         'id',
         'report__title',
@@ -84,7 +187,92 @@ class UserReportResultAdmin(admin.ModelAdmin):
         'average_customers_per_account_manager',
         'report__created_at',
     ]
+    list_select_related = ['report']
     list_filter = [
         'report__title',
     ]
     ordering = ['-id']
+
+
+@admin.register(stat_analysis_models.JobQuarterResult)
+class JobQuarterResultAdmin(CompletionTimePercentilesMixin, KeysetPaginationMixin, admin.ModelAdmin):
+    list_display = [
+        'id',
+        'report__title',
+        'quarter',
+        'service_provider',
+        'total_jobs',
+        'average_completion_time_regular',
+        'average_completion_time_wafer_run',
+        'completion_time_percentiles',
+        'jobs_created',
+        'jobs_active',
+        'jobs_completed',
+    ]
+    list_select_related = ['report', 'service_provider__user']
+    list_filter = [
+        ServiceProviderListFilter,
+        'report__title',
+        'quarter',
+    ]
+    ordering = ['-id']
+
+
+@admin.register(stat_analysis_models.OrderQuarterResult)
+class OrderQuarterResultAdmin(KeysetPaginationMixin, admin.ModelAdmin):
+    list_display = [
+        'id',
+        'report__title',
+        'quarter',
+        'total_orders',
+        'total_amount',
+        'average_amount',
+        'order_new',
+        'order_pending',
+        'order_completed',
+        'order_closed',
+    ]
+    list_select_related = ['report']
+    list_filter = [
+        'report__title',
+        'quarter',
+    ]
+    ordering = ['-id']
+
+
+@admin.register(stat_analysis_models.UserQuarterResult)
+class UserQuarterResultAdmin(KeysetPaginationMixin, admin.ModelAdmin):
+    list_display = [
+        'id',
+        'report__title',
+        'quarter',
+        'total_users',
+        'total_customers',
+        'total_account_managers',
+        'total_service_providers',
+        'average_orders_per_user',
+        'average_customers_per_account_manager',
+    ]
+    list_select_related = ['report']
+    list_filter = [
+        'report__title',
+        'quarter',
+    ]
+    ordering = ['-id']
+
+
+@admin.register(stat_analysis_models.ReportTask)
+class ReportTaskAdmin(admin.ModelAdmin):
+    list_display = [
+        'id',
+        'report__title',
+        'status',
+        'claimed_by',
+        'created_at',
+        'claimed_at',
+    ]
+    list_select_related = ['report']
+    list_filter = [
+        'status',
+    ]
+    ordering = ['-id']
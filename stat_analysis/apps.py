@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class StatAnalysisConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'stat_analysis'
+
+    def ready(self):
+        from stat_analysis import signals  # noqa: F401
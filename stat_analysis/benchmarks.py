@@ -0,0 +1,186 @@
+"""stat_analysis.benchmarks.py
+
+Time the report calculations, the customer portal views and the main
+admin changelists on synthetic data sets of several sizes, see
+`stat_analysis.synthetic_data`.
+
+Every size is generated and measured on its own, the database is
+flushed afterwards, so the benchmarks must run on a separate database.
+They do not run in a transaction, so that the shared caches are used as
+in production. The results are plain dicts, so that they can be written
+as JSON and compared between commits.
+"""
+import datetime
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from order import catalog
+from order.models import Order
+from registrar import relationships
+from registrar.models import CustomerAccountManager
+from stat_analysis import stat_utils, vectorized
+from stat_analysis.models import Report
+from stat_analysis.synthetic_data import DataVolumes, generate_data
+
+
+User = get_user_model()
+
+
+def measure(function, repeat):
+    """
+    Run a function `repeat` times, timing every run and counting the
+    queries of the last one, then once more for its peak memory use.
+    """
+    timings = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+    # before the next run, as requests reset the queries log
+    query_count = len(queries)
+    # traced apart, as tracing slows the run down
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'max': max(timings),
+        'queries': query_count,
+        'peak_memory': peak_memory,
+    }
+
+
+def calculate_report_stats(period, report):
+    stat_utils.calculate_job_stats(*period, report=report)
+    stat_utils.calculate_order_stats(*period, report=report)
+    stat_utils.calculate_user_stats(*period, report=report)
+    stat_utils.calculate_quarter_stats(*period, report=report)
+
+
+def get_page(client, url):
+    def view():
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}")
+    return view
+
+
+def get_benchmarks(report):
+    """(name, function) pairs of everything that is measured."""
+    period = (report.quarter_from, report.year_from, report.quarter_to, report.year_to)
+
+    # the customer with the most orders and one of their account managers
+    customer_id = (
+        Order.objects.values('customer')
+        .annotate(orders=Count('id'))
+        .order_by('-orders')
+        .values_list('customer', flat=True)
+        .first()
+    )
+    account_manager_id = CustomerAccountManager.objects.filter(
+        customer_id=customer_id,
+    ).values_list('account_manager', flat=True).first()
+    order = Order.objects.filter(customer_id=customer_id).first()
+    customer_client = Client()
+    customer_client.force_login(User.objects.get(customer_profile__id=customer_id))
+    account_manager_client = Client()
+    account_manager_client.force_login(User.objects.get(account_manager_profile__id=account_manager_id))
+    admin_client = Client()
+    admin_client.force_login(User.objects.filter(is_superuser=True).first())
+
+    benchmarks = [
+        ('calculate_job_stats', lambda: stat_utils.calculate_job_stats(*period, report=report)),
+        ('calculate_order_stats', lambda: stat_utils.calculate_order_stats(*period, report=report)),
+        ('calculate_user_stats', lambda: stat_utils.calculate_user_stats(*period, report=report)),
+        ('customer_order_list', get_page(customer_client, reverse('customer_order_list'))),
+        ('customer_order_detail', get_page(
+            customer_client,
+            reverse('customer_order_detail', kwargs={'order_id': order.id}),
+        )),
+        ('customer_order_available_items', get_page(
+            customer_client,
+            reverse('customer_order_available_items_to_add', kwargs={'order_id': order.id}),
+        )),
+        ('admin_order_changelist', get_page(admin_client, reverse('admin:order_order_changelist'))),
+        ('admin_order_changelist_account_manager', get_page(
+            account_manager_client,
+            reverse('admin:order_order_changelist'),
+        )),
+        ('admin_orderitem_changelist', get_page(admin_client, reverse('admin:order_orderitem_changelist'))),
+        ('admin_job_changelist', get_page(admin_client, reverse('admin:execution_job_changelist'))),
+        ('admin_user_changelist', get_page(admin_client, reverse('admin:registrar_user_changelist'))),
+        ('admin_user_changelist_account_manager', get_page(
+            account_manager_client,
+            reverse('admin:registrar_user_changelist'),
+        )),
+        # the whole report with each backend
+        ('calculate_report_stats_rollups', lambda: calculate_report_stats(period, report)),
+    ]
+    if vectorized.np is not None:
+        benchmarks.append(
+            ('calculate_report_stats_numpy', lambda: vectorized.calculate_report_stats(report)),
+        )
+    return benchmarks
+
+
+def get_cache_stats():
+    return {
+        'relationships': relationships.get_cache_stats(),
+        'catalog': catalog.get_cache_stats(),
+    }
+
+
+def run_benchmarks(sizes, repeat=3, seed=0, year=2024):
+    """
+    Generate a data set for every size, i.e. number of customers, spread
+    over the given year, and measure every benchmark on it.
+    """
+    results = []
+    for size in sizes:
+        started = time.perf_counter()
+        rows = generate_data(
+            DataVolumes.for_size(size),
+            datetime.date(year, 1, 1),
+            datetime.date(year, 12, 31),
+            seed=seed,
+        )
+        generation_time = time.perf_counter() - started
+
+        User.objects.create_superuser(
+            username='benchmark_admin',
+            email='benchmark_admin@example.com',
+            password='benchmark',
+        )
+        report = Report.objects.create(
+            title=f'Benchmark {size}',
+            quarter_from='Q1',
+            year_from=year,
+            quarter_to='Q4',
+            year_to=year,
+        )
+        benchmarks = get_benchmarks(report)
+        cache_stats = get_cache_stats()
+        results.append({
+            'size': size,
+            'rows': rows,
+            'generation_time': generation_time,
+            'benchmarks': {name: measure(function, repeat) for name, function in benchmarks},
+            # cumulative per process, see `get_cache_stats`
+            'cache_stats': {'before': cache_stats, 'after': get_cache_stats()},
+        })
+        call_command('flush', interactive=False, verbosity=0)
+    return results
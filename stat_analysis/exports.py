@@ -0,0 +1,146 @@
+"""stat_analysis.exports.py
+
+Streaming CSV and JSONL exports of the report results and of the raw
+Job, JobState, Order and OrderState rows, served by
+`stat_analysis.views.export` and written by the `export_data` command.
+
+The rows are read with a chunked iterator and written a chunk at a
+time, so that memory use does not depend on the size of the export, and
+the header is sent before the first row is read. Every export is scoped
+with the admin scope of the user, see `registrar.scope`.
+"""
+from dataclasses import dataclass
+import csv
+import datetime
+from decimal import Decimal
+import io
+import json
+from typing import Callable
+
+from execution.models import Job, JobState
+from order.models import Order, OrderState
+from stat_analysis.models import JobReportResult, OrderReportResult, UserReportResult
+
+
+# rows read from the database, and written, at once
+CHUNK_SIZE = 2000
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+@dataclass(frozen=True)
+class Export:
+    model: type
+    fields: list
+    # (scope, queryset) -> the rows of the queryset the scope can see
+    filter_scope: Callable
+    # whether the rows can be filtered on a report
+    by_report: bool = False
+
+    def get_queryset(self, scope, report_id=None):
+        queryset = self.model.objects.order_by('pk')
+        if report_id is not None and self.by_report:
+            queryset = queryset.filter(report_id=report_id)
+        return self.filter_scope(scope, queryset).values_list(*self.fields)
+
+
+def unrestricted_only(scope, queryset):
+    """Rows of results over all customers, only for the unrestricted scope."""
+    return queryset if scope.unrestricted else queryset.none()
+
+
+EXPORTS = {
+    'jobs': Export(
+        Job,
+        ['id', 'job_name', 'job_type', 'service_provider', 'current_state', 'started_at', 'ended_at',
+         'completion_time'],
+        lambda scope, queryset: scope.filter_service_providers(queryset),
+    ),
+    'job_states': Export(
+        JobState,
+        ['id', 'job', 'state', 'state_date'],
+        lambda scope, queryset: scope.filter_service_providers(queryset, 'job__service_provider'),
+    ),
+    'orders': Export(
+        Order,
+        ['id', 'customer', 'account_manager', 'description', 'amount', 'current_state', 'started_at',
+         'completed_at', 'job', 'created_at'],
+        lambda scope, queryset: scope.filter_customers(queryset),
+    ),
+    'order_states': Export(
+        OrderState,
+        ['id', 'order', 'state', 'state_date'],
+        lambda scope, queryset: scope.filter_customers(queryset, 'order__customer'),
+    ),
+    'job_report_results': Export(
+        JobReportResult,
+        ['id', 'report', 'service_provider', 'total_jobs', 'average_completion_time_regular',
+         'average_completion_time_wafer_run', 'jobs_created', 'jobs_active', 'jobs_completed'],
+        lambda scope, queryset: scope.filter_service_providers(queryset),
+        by_report=True,
+    ),
+    'order_report_results': Export(
+        OrderReportResult,
+        ['id', 'report', 'total_orders', 'total_amount', 'average_amount', 'order_new', 'order_pending',
+         'order_completed', 'order_closed'],
+        unrestricted_only,
+        by_report=True,
+    ),
+    'user_report_results': Export(
+        UserReportResult,
+        ['id', 'report', 'total_users', 'total_customers', 'total_account_managers',
+         'total_service_providers', 'average_orders_per_user', 'average_customers_per_account_manager'],
+        unrestricted_only,
+        by_report=True,
+    ),
+}
+
+
+def to_json(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def write_csv(fields, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield buffer.getvalue()
+    for chunk in rows:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows([to_json(value) for value in row] for row in chunk)
+        yield buffer.getvalue()
+
+
+def write_jsonl(fields, rows):
+    for chunk in rows:
+        yield ''.join(
+            json.dumps(dict(zip(fields, map(to_json, row)))) + '\n'
+            for row in chunk
+        )
+
+
+def iterate_chunks(queryset):
+    chunk = []
+    for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_export(name, file_format, scope, report_id=None):
+    """The text of an export, as an iterator of chunks of rows."""
+    export = EXPORTS[name]
+    rows = iterate_chunks(export.get_queryset(scope, report_id))
+    write = write_csv if file_format == 'csv' else write_jsonl
+    return write(export.fields, rows)
@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from registrar.scope import AdminScope, get_user_scope
+from stat_analysis.exports import EXPORTS, FORMATS, stream_export
+
+
+class Command(BaseCommand):
+    help = "Export report results or raw job and order rows as CSV or JSONL, in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS), help="Rows to export.")
+        parser.add_argument('path', help="File to write the export to.")
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv', help="Default: %(default)s.")
+        parser.add_argument('--report', type=int, help="Only export the results of this report.")
+        parser.add_argument(
+            '--user',
+            help="Only export the rows this user can see in the admin (default: all rows).",
+        )
+
+    def handle(self, *args, **options):
+        scope = AdminScope(unrestricted=True)
+        if options['user']:
+            try:
+                scope = get_user_scope(get_user_model().objects.get(username=options['user']))
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"Unknown user {options['user']!r}.")
+
+        with open(options['path'], 'w', encoding='utf-8', newline='') as file:
+            for text in stream_export(options['name'], options['format'], scope, options['report']):
+                file.write(text)
+        self.stdout.write(self.style.SUCCESS(f"Exported {options['name']} to {options['path']}."))
@@ -0,0 +1,68 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from stat_analysis.synthetic_data import DataVolumes, PASSWORD, generate_data
+
+
+class Command(BaseCommand):
+    help = "Generate a reproducible synthetic data set with bulk inserts."
+
+    def add_arguments(self, parser):
+        defaults = DataVolumes()
+        for field in [
+            'account_managers',
+            'service_providers',
+            'customers',
+            'products_per_provider',
+            'orders_per_customer',
+            'items_per_order',
+            'jobs_per_provider',
+        ]:
+            parser.add_argument(
+                f"--{field.replace('_', '-')}",
+                type=int,
+                default=getattr(defaults, field),
+                help=f"Number of {field.replace('_', ' ')} (default: %(default)s).",
+            )
+        parser.add_argument(
+            '--start-date',
+            type=datetime.date.fromisoformat,
+            default=datetime.date.today() - datetime.timedelta(days=730),
+            help="First day of the generated history, as YYYY-MM-DD (default: two years ago).",
+        )
+        parser.add_argument(
+            '--end-date',
+            type=datetime.date.fromisoformat,
+            default=datetime.date.today(),
+            help="Last day of the generated history, as YYYY-MM-DD (default: today).",
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help="Seed of the random generator.",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Number of rows inserted per query.",
+        )
+
+    def handle(self, *args, **options):
+        volumes = DataVolumes(**{
+            field: options[field] for field in DataVolumes.__dataclass_fields__
+        })
+        rows = generate_data(
+            volumes,
+            options['start_date'],
+            options['end_date'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+        for model, count in rows.items():
+            self.stdout.write(f"{model}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated the synthetic data set, all users have the password '{PASSWORD}'."
+        ))
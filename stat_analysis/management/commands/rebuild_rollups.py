@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from stat_analysis.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-quarter Job and Order rollups from the full history."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help="Number of rollups inserted per query.",
+        )
+
+    def handle(self, *args, **options):
+        job_rollups, order_rollups = rebuild_rollups(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {job_rollups} job rollups and {order_rollups} order rollups."
+        ))
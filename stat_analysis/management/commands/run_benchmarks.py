@@ -0,0 +1,91 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from stat_analysis.benchmarks import run_benchmarks
+
+
+def get_git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the report calculations, the customer portal and the admin "
+        "on synthetic data sets of several sizes, in a separate test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[10, 100, 1000],
+            help="Data set sizes, in number of customers.",
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help="Number of runs of every benchmark.",
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help="Seed of the random generator.",
+        )
+        parser.add_argument(
+            '--output',
+            default='benchmark_results.json',
+            help="JSON file the results are written to.",
+        )
+
+    def handle(self, *args, **options):
+        # never touch the data of the configured database
+        setup_test_environment()
+        old_database_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = run_benchmarks(options['sizes'], repeat=options['repeat'], seed=options['seed'])
+        finally:
+            connection.creation.destroy_test_db(old_database_name, verbosity=0)
+            teardown_test_environment()
+
+        with open(options['output'], 'w') as output:
+            json.dump(
+                {
+                    'commit': get_git_commit(),
+                    'created_at': timezone.now().isoformat(),
+                    'database': connection.vendor,
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                    'repeat': options['repeat'],
+                    'seed': options['seed'],
+                    'results': results,
+                },
+                output,
+                indent=2,
+            )
+
+        for result in results:
+            self.stdout.write(f"size {result['size']}:")
+            for name, timing in result['benchmarks'].items():
+                self.stdout.write(
+                    f"  {name:<40} {timing['median'] * 1000:10.1f} ms {timing['queries']:6d} queries"
+                )
+        self.stdout.write(self.style.SUCCESS(f"Wrote the benchmark results to {options['output']}."))
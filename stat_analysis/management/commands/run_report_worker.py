@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from stat_analysis.tasks import run_worker
+
+
+class Command(BaseCommand):
+    help = "Run the worker pool computing queued Reports."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help="Number of worker threads.",
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help="Seconds to wait before polling an empty queue again.",
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Exit as soon as the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Starting report worker with {options['workers']} worker(s).")
+        run_worker(
+            workers=options['workers'],
+            poll_interval=options['poll_interval'],
+            once=options['once'],
+        )
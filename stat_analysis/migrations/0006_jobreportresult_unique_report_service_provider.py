@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 14:53
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registrar', '0002_alter_user_role'),
+        ('stat_analysis', '0005_report_created_by'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='jobreportresult',
+            unique_together={('report', 'service_provider')},
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2 on 2026-10-18 14:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def mark_existing_reports_completed(apps, schema_editor):
+    """Reports created before the queue existed were computed synchronously."""
+    Report = apps.get_model('stat_analysis', 'Report')
+    Report.objects.update(status='completed', progress=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stat_analysis', '0006_jobreportresult_unique_report_service_provider'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='error',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='progress',
+            field=models.IntegerField(default=0, help_text='Computation progress in percent.'),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='ReportTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('claimed_by', models.CharField(blank=True, max_length=100, null=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='stat_analysis.report')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RunPython(mark_existing_reports_completed, migrations.RunPython.noop),
+    ]
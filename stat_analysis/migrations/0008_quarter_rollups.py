@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-18 15:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registrar', '0002_alter_user_role'),
+        ('stat_analysis', '0007_report_computation_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderQuarterRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quarter', models.DateField(help_text='First day of the quarter.')),
+                ('state', models.CharField(max_length=20)),
+                ('orders', models.IntegerField(default=0, help_text='Number of orders which entered the state in the quarter.')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, help_text='Total amount of the orders which entered the state in the quarter.', max_digits=15)),
+            ],
+            options={
+                'unique_together': {('quarter', 'state')},
+            },
+        ),
+        migrations.CreateModel(
+            name='JobQuarterRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quarter', models.DateField(help_text='First day of the quarter.')),
+                ('jobs_started', models.IntegerField(default=0)),
+                ('completed_regular', models.IntegerField(default=0, help_text='Number of regular jobs completed in the quarter.')),
+                ('completion_time_regular', models.FloatField(default=0.0, help_text='Sum of the completion times of regular jobs completed in the quarter.')),
+                ('completed_wafer_run', models.IntegerField(default=0, help_text='Number of wafer run jobs completed in the quarter.')),
+                ('completion_time_wafer_run', models.FloatField(default=0.0, help_text='Sum of the completion times of wafer run jobs completed in the quarter.')),
+                ('jobs_created', models.IntegerField(default=0, help_text="Number of jobs which entered the 'Created' state in the quarter.")),
+                ('jobs_active', models.IntegerField(default=0, help_text="Number of jobs which entered the 'Active' state in the quarter.")),
+                ('jobs_completed', models.IntegerField(default=0, help_text="Number of jobs which entered the 'Completed' state in the quarter.")),
+                ('service_provider', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_quarter_rollups', to='registrar.serviceproviderprofile')),
+            ],
+            options={
+                'unique_together': {('quarter', 'service_provider')},
+            },
+        ),
+    ]
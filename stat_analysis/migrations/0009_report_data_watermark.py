@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stat_analysis', '0008_quarter_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobquarterrollup',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='orderquarterrollup',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='cache_hit',
+            field=models.BooleanField(default=False, help_text='Whether the last computation reused the existing results.'),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='data_watermark',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stat_analysis', '0009_report_data_watermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='pdf_hash',
+            field=models.CharField(blank=True, help_text='Hash of the content of the rendered PDF, see `stat_analysis.pdf`.', max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2 on 2026-10-18 15:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registrar', '0003_user_date_joined_role_index'),
+        ('stat_analysis', '0010_report_pdf_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobQuarterResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quarter', models.DateField(help_text='First day of the quarter.')),
+                ('total_jobs', models.IntegerField()),
+                ('average_completion_time_regular', models.FloatField(blank=True, help_text='Average completion time for regular jobs in days.', null=True)),
+                ('average_completion_time_wafer_run', models.FloatField(blank=True, help_text='Average completion time for wafer run jobs in days.', null=True)),
+                ('jobs_created', models.IntegerField(default=0)),
+                ('jobs_active', models.IntegerField(default=0)),
+                ('jobs_completed', models.IntegerField(default=0)),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_quarter_results', to='stat_analysis.report')),
+                ('service_provider', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_quarter_results', to='registrar.serviceproviderprofile')),
+            ],
+            options={
+                'unique_together': {('report', 'quarter', 'service_provider')},
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderQuarterResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quarter', models.DateField(help_text='First day of the quarter.')),
+                ('total_orders', models.IntegerField()),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('average_amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('order_new', models.IntegerField()),
+                ('order_pending', models.IntegerField()),
+                ('order_completed', models.IntegerField()),
+                ('order_closed', models.IntegerField()),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_quarter_results', to='stat_analysis.report')),
+            ],
+            options={
+                'unique_together': {('report', 'quarter')},
+            },
+        ),
+        migrations.CreateModel(
+            name='UserQuarterResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quarter', models.DateField(help_text='First day of the quarter.')),
+                ('total_users', models.IntegerField()),
+                ('total_customers', models.IntegerField()),
+                ('total_account_managers', models.IntegerField()),
+                ('total_service_providers', models.IntegerField()),
+                ('average_orders_per_user', models.FloatField()),
+                ('average_customers_per_account_manager', models.FloatField()),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_quarter_results', to='stat_analysis.report')),
+            ],
+            options={
+                'unique_together': {('report', 'quarter')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stat_analysis', '0011_report_quarter_results'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobquarterresult',
+            name='completion_time_distribution',
+            field=models.JSONField(blank=True, default=dict, help_text='Count, mean, p50, p90, p99 and histogram of the completion times per job type, see `stat_analysis.sketch`.'),
+        ),
+        migrations.AddField(
+            model_name='jobquarterrollup',
+            name='completion_time_sketches',
+            field=models.JSONField(default=dict, help_text='Sketch of the completion times of the jobs completed in the quarter per job type, see `stat_analysis.sketch`.'),
+        ),
+        migrations.AddField(
+            model_name='jobreportresult',
+            name='completion_time_distribution',
+            field=models.JSONField(blank=True, default=dict, help_text='Count, mean, p50, p90, p99 and histogram of the completion times per job type, see `stat_analysis.sketch`.'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 15:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stat_analysis', '0012_completion_time_sketches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='backend',
+            field=models.CharField(choices=[('rollups', 'Per-quarter rollups'), ('numpy', 'NumPy, from the source tables')], default='rollups', help_text='How the statistics are computed, see `stat_analysis.tasks`. The NumPy backend requires NumPy to be installed.', max_length=20),
+        ),
+    ]
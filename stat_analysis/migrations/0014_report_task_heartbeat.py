@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stat_analysis', '0013_report_backend'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reporttask',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Last sign of life of the worker running the task, see `stat_analysis.tasks.requeue_stale_tasks`.', null=True),
+        ),
+    ]
@@ -9,7 +9,19 @@ The Report model defines the reporting range.
 Each Report has results of statistical analysis,
 i.e. statistics of orders and jobs, which are stored in
 OrderReportResult and JobReportResult models.
+
+The computation of a Report is queued as a ReportTask
+and run by the report worker.
+
+Reports are assembled from per-quarter rollups, stored in
+JobQuarterRollup and OrderQuarterRollup models.
+
+The per-quarter breakdown of the results of a Report is stored in
+JobQuarterResult, OrderQuarterResult and UserQuarterResult models.
 """
 
 from .report import Report
-from .statistics import JobReportResult, OrderReportResult, UserReportResult
\ No newline at end of file
+from .statistics import JobReportResult, OrderReportResult, UserReportResult
+from .task import ReportTask
+from .rollup import JobQuarterRollup, OrderQuarterRollup
+from .breakdown import JobQuarterResult, OrderQuarterResult, UserQuarterResult
\ No newline at end of file
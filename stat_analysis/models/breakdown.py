@@ -0,0 +1,106 @@
+"""stat_analysis.models.breakdown.py
+
+"""
+from django.db import models
+
+from stat_analysis.models import Report
+
+
+class JobQuarterResult(models.Model):
+    """
+    Job statistics of a single service provider in a single quarter of
+    the range of a Report, i.e. the per-quarter breakdown of its
+    JobReportResult. Only the quarters the service provider had any job
+    statistics in have a row.
+    """
+    report = models.ForeignKey(
+        Report,
+        on_delete=models.CASCADE,
+        related_name='job_quarter_results',
+    )
+    quarter = models.DateField(help_text="First day of the quarter.")
+    service_provider = models.ForeignKey(
+        'registrar.ServiceProviderProfile',
+        on_delete=models.CASCADE,
+        related_name='job_quarter_results',
+    )
+
+    total_jobs = models.IntegerField()
+    average_completion_time_regular = models.FloatField(
+        help_text="Average completion time for regular jobs in days.",
+        null=True,
+        blank=True,
+    )
+    average_completion_time_wafer_run = models.FloatField(
+        help_text="Average completion time for wafer run jobs in days.",
+        null=True,
+        blank=True,
+    )
+    completion_time_distribution = models.JSONField(
+        help_text="Count, mean, p50, p90, p99 and histogram of the completion times per job type, "
+                  "see `stat_analysis.sketch`.",
+        default=dict,
+        blank=True,
+    )
+    jobs_created = models.IntegerField(default=0)
+    jobs_active = models.IntegerField(default=0)
+    jobs_completed = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('report', 'quarter', 'service_provider')
+
+    def __str__(self):
+        return f"Jobs of {self.service_provider} in quarter starting {self.quarter} of {self.report.title}"
+
+
+class OrderQuarterResult(models.Model):
+    """
+    Order statistics of a single quarter of the range of a Report,
+    i.e. the per-quarter breakdown of its OrderReportResult.
+    """
+    report = models.ForeignKey(
+        Report,
+        on_delete=models.CASCADE,
+        related_name='order_quarter_results',
+    )
+    quarter = models.DateField(help_text="First day of the quarter.")
+
+    total_orders = models.IntegerField()
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2)
+    average_amount = models.DecimalField(max_digits=12, decimal_places=2)
+    order_new = models.IntegerField()
+    order_pending = models.IntegerField()
+    order_completed = models.IntegerField()
+    order_closed = models.IntegerField()
+
+    class Meta:
+        unique_together = ('report', 'quarter')
+
+    def __str__(self):
+        return f"Orders in quarter starting {self.quarter} of {self.report.title}"
+
+
+class UserQuarterResult(models.Model):
+    """
+    User statistics of a single quarter of the range of a Report,
+    i.e. the per-quarter breakdown of its UserReportResult.
+    """
+    report = models.ForeignKey(
+        Report,
+        on_delete=models.CASCADE,
+        related_name='user_quarter_results',
+    )
+    quarter = models.DateField(help_text="First day of the quarter.")
+
+    total_users = models.IntegerField()
+    total_customers = models.IntegerField()
+    total_account_managers = models.IntegerField()
+    total_service_providers = models.IntegerField()
+    average_orders_per_user = models.FloatField()
+    average_customers_per_account_manager = models.FloatField()
+
+    class Meta:
+        unique_together = ('report', 'quarter')
+
+    def __str__(self):
+        return f"Users in quarter starting {self.quarter} of {self.report.title}"
@@ -10,6 +10,19 @@ user_model = get_user_model()
 
 
 class Report(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    BACKEND_CHOICES = [
+        ('rollups', 'Per-quarter rollups'),
+        ('numpy', 'NumPy, from the source tables'),
+    ]
+    # written by the report worker only, see `stat_analysis.tasks`
+    WORKER_FIELDS = ['pdf_report', 'pdf_hash', 'data_watermark', 'cache_hit']
+
     # metadata
     title = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -26,6 +39,13 @@ class Report(models.Model):
     year_from = models.IntegerField()
     quarter_to = models.CharField(max_length=2)  # Q1, Q2, Q3, Q4
     year_to = models.IntegerField()
+    backend = models.CharField(
+        help_text="How the statistics are computed, see `stat_analysis.tasks`. "
+                  "The NumPy backend requires NumPy to be installed.",
+        max_length=20,
+        choices=BACKEND_CHOICES,
+        default='rollups',
+    )
 
     pdf_report = models.FileField(
         upload_to='reports_pdf/',
@@ -35,41 +55,58 @@ class Report(models.Model):
         blank=True,
         null=True,
     )
+    pdf_hash = models.CharField(
+        help_text="Hash of the content of the rendered PDF, see `stat_analysis.pdf`.",
+        max_length=64,
+        blank=True,
+        null=True,
+    )
+
+    # Computation state, updated by the report worker
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    progress = models.IntegerField(
+        help_text="Computation progress in percent.",
+        default=0,
+    )
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True, null=True)
+
+    # Watermark of the data the results were computed from. When it is
+    # unchanged on the next computation, the existing results are reused.
+    data_watermark = models.JSONField(null=True, blank=True)
+    cache_hit = models.BooleanField(
+        help_text="Whether the last computation reused the existing results.",
+        default=False,
+    )
 
     def __str__(self):
         return f"{self.title} ({self.year_from}{self.quarter_from} - {self.year_to}{self.quarter_to})"
     
     def save(self, *args, **kwargs):
-        # import here to avoid circular import issues
-        from stat_analysis.stat_utils import (
-            calculate_order_stats,
-            calculate_job_stats,
-            calculate_user_stats,
-        )
         """
-        Run statistics calculation on creating or saaving a Report for
+        Queue statistics calculation on creating or saving a Report for
             - JobReportResult
             - OrderReportResult
-            ...
-            ... more to be implemented
+            - UserReportResult
+        The calculation itself is run by the report worker,
+        see `stat_analysis.tasks` and the `run_report_worker` command.
         """
+        # import here to avoid circular import issues
+        from stat_analysis.models.task import ReportTask
+
+        self.status = 'pending'
+        self.progress = 0
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # The results of the worker may be newer than this instance,
+            # do not overwrite them with stale in-memory values.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.WORKER_FIELDS
+            ]
         super().save(*args, **kwargs)
-        
-        calculate_job_stats(
-            quarter_from=self.quarter_from,
-            year_from=self.year_from,
-            quarter_to=self.quarter_to,
-            year_to=self.year_to,
-        )
-        calculate_order_stats(
-            quarter_from=self.quarter_from,
-            year_from=self.year_from,
-            quarter_to=self.quarter_to,
-            year_to=self.year_to,
-        )
-        calculate_user_stats(
-            quarter_from=self.quarter_from,
-            year_from=self.year_from,
-            quarter_to=self.quarter_to,
-            year_to=self.year_to,
-        )
+
+        ReportTask.objects.get_or_create(report=self, status='pending')
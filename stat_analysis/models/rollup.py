@@ -0,0 +1,92 @@
+"""stat_analysis.models.rollup.py
+
+"""
+from django.db import models
+
+
+class JobQuarterRollup(models.Model):
+    """
+    Job statistics of a single service provider in a single quarter.
+
+    Reports are assembled by summing the rollups of the quarters in their
+    range instead of scanning the whole Job and JobState history.
+    The rollups are refreshed whenever a Job or JobState is written,
+    see `stat_analysis.rollups`.
+    """
+    quarter = models.DateField(help_text="First day of the quarter.")
+    service_provider = models.ForeignKey(
+        'registrar.ServiceProviderProfile',
+        on_delete=models.CASCADE,
+        related_name='job_quarter_rollups',
+    )
+
+    jobs_started = models.IntegerField(default=0)
+    completed_regular = models.IntegerField(
+        help_text="Number of regular jobs completed in the quarter.",
+        default=0,
+    )
+    completion_time_regular = models.FloatField(
+        help_text="Sum of the completion times of regular jobs completed in the quarter.",
+        default=0.0,
+    )
+    completed_wafer_run = models.IntegerField(
+        help_text="Number of wafer run jobs completed in the quarter.",
+        default=0,
+    )
+    completion_time_wafer_run = models.FloatField(
+        help_text="Sum of the completion times of wafer run jobs completed in the quarter.",
+        default=0.0,
+    )
+    jobs_created = models.IntegerField(
+        help_text="Number of jobs which entered the 'Created' state in the quarter.",
+        default=0,
+    )
+    jobs_active = models.IntegerField(
+        help_text="Number of jobs which entered the 'Active' state in the quarter.",
+        default=0,
+    )
+    jobs_completed = models.IntegerField(
+        help_text="Number of jobs which entered the 'Completed' state in the quarter.",
+        default=0,
+    )
+    completion_time_sketches = models.JSONField(
+        help_text="Sketch of the completion times of the jobs completed in the quarter per job type, "
+                  "see `stat_analysis.sketch`.",
+        default=dict,
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('quarter', 'service_provider')
+
+    def __str__(self):
+        return f"Jobs of {self.service_provider} in quarter starting {self.quarter}"
+
+
+class OrderQuarterRollup(models.Model):
+    """
+    Order statistics of a single order state in a single quarter.
+
+    The 'new' state rollups also hold the number and amount
+    of the orders placed in the quarter.
+    """
+    quarter = models.DateField(help_text="First day of the quarter.")
+    state = models.CharField(max_length=20)
+
+    orders = models.IntegerField(
+        help_text="Number of orders which entered the state in the quarter.",
+        default=0,
+    )
+    total_amount = models.DecimalField(
+        help_text="Total amount of the orders which entered the state in the quarter.",
+        max_digits=15,
+        decimal_places=2,
+        default=0,
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('quarter', 'state')
+
+    def __str__(self):
+        return f"Orders {self.state} in quarter starting {self.quarter}"
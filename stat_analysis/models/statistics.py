@@ -40,6 +40,12 @@ class JobReportResult(models.Model):
         null=True,
         blank=True,
     )
+    completion_time_distribution = models.JSONField(
+        help_text="Count, mean, p50, p90, p99 and histogram of the completion times per job type, "
+                  "see `stat_analysis.sketch`.",
+        default=dict,
+        blank=True,
+    )
 
     jobs_created = models.IntegerField(
         help_text="Number of jobs with 'Created' state in the given period.",
@@ -54,6 +60,9 @@ class JobReportResult(models.Model):
         default=0,
     )
 
+    class Meta:
+        unique_together = ('report', 'service_provider')
+
     def __str__(self):
         return f"Job Report Result for {self.report.title} ({self.report.year_from}{self.report.quarter_from} - {self.report.year_to}{self.report.quarter_to})"
     
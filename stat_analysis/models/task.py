@@ -0,0 +1,42 @@
+"""stat_analysis.models.task.py
+
+"""
+from django.db import models
+
+from stat_analysis.models import Report
+
+
+class ReportTask(models.Model):
+    """
+    Queue of report computations. A task is created every time a
+    Report is saved and is picked up by the report worker. A running
+    task whose worker stopped beating is queued again.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    report = models.ForeignKey(
+        Report,
+        on_delete=models.CASCADE,
+        related_name='tasks',
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_by = models.CharField(max_length=100, blank=True, null=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        help_text="Last sign of life of the worker running the task, see `stat_analysis.tasks.requeue_stale_tasks`.",
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"Task #{self.id} for {self.report.title} - {self.status}"
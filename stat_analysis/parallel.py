@@ -0,0 +1,93 @@
+"""stat_analysis.parallel.py
+
+Parallel computation of the Report statistics.
+
+The job statistics are sharded by service provider across a process
+pool, while the order and user statistics and their per-quarter
+breakdown are computed concurrently in the same pool. Every process
+opens its own database connection. The workers only read, the parent
+process writes all results in a single transaction once every shard is
+done, so that the results are identical to the serial computation.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+
+from django.db import connections, transaction
+
+from stat_analysis import stat_utils
+from stat_analysis.processes import setup_worker
+
+
+def get_job_stats_shard(start_date, end_date, service_provider_ids):
+    # plain dict, so that the result can be sent back to the parent process
+    return dict(stat_utils.get_job_stats_by_provider(start_date, end_date, service_provider_ids))
+
+
+def create_executor(workers):
+    # Spawned processes do not inherit the database connections of the
+    # parent process, and set Django up on their own, see
+    # `stat_analysis.processes`.
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=setup_worker,
+        initargs=({alias: connections[alias].settings_dict['NAME'] for alias in connections},),
+    )
+
+
+def calculate_report_stats(report, workers, executor=None, on_progress=None):
+    """
+    Calculate the job, order and user statistics of a report
+    with the given number of worker processes.
+
+    `on_progress` is called with the progress in percent
+    every time a shard is done.
+    """
+    start_date, end_date = stat_utils.get_period_dates(
+        report.quarter_from,
+        report.year_from,
+        report.quarter_to,
+        report.year_to,
+    )
+    service_provider_ids = list(
+        stat_utils.service_provider_model.objects.order_by('id').values_list('id', flat=True)
+    )
+    shards = [service_provider_ids[index::workers] for index in range(workers)]
+
+    job_stats = {}
+    with executor or create_executor(workers) as pool:
+        job_futures = [
+            pool.submit(get_job_stats_shard, start_date, end_date, shard)
+            for shard in shards if shard
+        ]
+        order_future = pool.submit(stat_utils.get_order_stats, start_date, end_date)
+        user_future = pool.submit(stat_utils.get_user_stats, start_date, end_date)
+        quarter_futures = [
+            pool.submit(get_stats_by_quarter, start_date, end_date)
+            for get_stats_by_quarter in [
+                stat_utils.get_job_stats_by_quarter,
+                stat_utils.get_order_stats_by_quarter,
+                stat_utils.get_user_stats_by_quarter,
+            ]
+        ]
+
+        futures = job_futures + [order_future, user_future] + quarter_futures
+        for done, future in enumerate(as_completed(futures), start=1):
+            if future in job_futures:
+                job_stats.update(future.result())
+            if on_progress:
+                on_progress(100 * done // (len(futures) + 1))
+
+    with transaction.atomic():
+        stat_utils.save_job_stats(report, job_stats, service_provider_ids)
+        stat_utils.order_stats_model.objects.update_or_create(
+            report=report,
+            defaults=order_future.result(),
+        )
+        stat_utils.user_stats_model.objects.update_or_create(
+            report=report,
+            defaults=user_future.result(),
+        )
+        stat_utils.save_quarter_stats(report, *(future.result() for future in quarter_futures))
+    if on_progress:
+        on_progress(100)
@@ -0,0 +1,216 @@
+"""stat_analysis.pdf.py
+
+PDF rendering of the results of a Report, by the report worker.
+
+The PDF is written page by page to a temporary file, with the result
+rows read in chunks, so that memory use does not depend on the number
+of service providers. Only the offsets of the PDF objects are kept
+until the end, for the cross-reference table.
+
+The PDF is stored in `MEDIA_ROOT/reports_pdf/` under the hash of its
+content, i.e. of the report and its result rows, which is kept in
+`Report.pdf_hash`. A report whose results did not change keeps its PDF
+without rendering it again.
+
+The PDF is plain text in a standard font, written without a PDF library.
+"""
+import hashlib
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from stat_analysis.models import JobReportResult, OrderReportResult, Report, UserReportResult
+
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+FONT_SIZE = 9
+LINE_HEIGHT = 12
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LINE_HEIGHT
+
+# results read from the database at once
+CHUNK_SIZE = 1000
+
+
+class PDFWriter:
+    """Write a PDF of pages of text lines to a binary file, one page at a time."""
+
+    # objects written by `close`, the pages are numbered from 4
+    CATALOG, PAGES, FONT = 1, 2, 3
+
+    def __init__(self, file):
+        self.file = file
+        self.position = 0
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 4
+        self.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def write(self, data):
+        self.file.write(data)
+        self.position += len(data)
+
+    def write_object(self, object_id, body):
+        self.offsets[object_id] = self.position
+        self.write(b'%d 0 obj\n' % object_id + body + b'\nendobj\n')
+
+    def allocate(self):
+        object_id = self.next_id
+        self.next_id += 1
+        return object_id
+
+    @staticmethod
+    def escape(line):
+        line = line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+        return line.encode('cp1252', errors='replace')
+
+    def add_page(self, lines):
+        content = b'BT\n/F1 %d Tf\n%d TL\n%d %d Td\n' % (
+            FONT_SIZE, LINE_HEIGHT, MARGIN, PAGE_HEIGHT - MARGIN,
+        )
+        content += b''.join(b'(' + self.escape(line) + b') Tj T*\n' for line in lines)
+        content += b'ET'
+        content_id = self.allocate()
+        self.write_object(
+            content_id,
+            b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream',
+        )
+        page_id = self.allocate()
+        self.write_object(
+            page_id,
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] '
+            b'/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>' % (
+                self.PAGES, PAGE_WIDTH, PAGE_HEIGHT, self.FONT, content_id,
+            ),
+        )
+        self.page_ids.append(page_id)
+
+    def close(self):
+        if not self.page_ids:
+            self.add_page([])
+        self.write_object(self.CATALOG, b'<< /Type /Catalog /Pages %d 0 R >>' % self.PAGES)
+        self.write_object(
+            self.PAGES,
+            b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+                b' '.join(b'%d 0 R' % page_id for page_id in self.page_ids),
+                len(self.page_ids),
+            ),
+        )
+        self.write_object(
+            self.FONT,
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        )
+        xref_position = self.position
+        self.write(b'xref\n0 %d\n0000000000 65535 f \n' % self.next_id)
+        for object_id in range(1, self.next_id):
+            self.write(b'%010d 00000 n \n' % self.offsets[object_id])
+        self.write(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+            self.next_id, self.CATALOG, xref_position,
+        ))
+
+
+def format_number(value, suffix=''):
+    if value is None:
+        return '-'
+    return f'{value:.2f}{suffix}' if isinstance(value, float) else f'{value}{suffix}'
+
+
+def get_report_lines(report):
+    """The lines of the PDF of a report, the result rows being read in chunks."""
+    yield f'Report: {report.title}'
+    yield f'Period: {report.quarter_from} {report.year_from} - {report.quarter_to} {report.year_to}'
+    yield ''
+
+    order_result = OrderReportResult.objects.filter(report=report).first()
+    if order_result:
+        yield 'Orders'
+        yield f'  Total orders: {order_result.total_orders}'
+        yield f'  Total amount: {order_result.total_amount}'
+        yield f'  Average amount: {order_result.average_amount}'
+        yield (
+            f'  New: {order_result.order_new}  Pending: {order_result.order_pending}  '
+            f'Completed: {order_result.order_completed}  Closed: {order_result.order_closed}'
+        )
+        yield ''
+
+    user_result = UserReportResult.objects.filter(report=report).first()
+    if user_result:
+        yield 'Users'
+        yield f'  Total users: {user_result.total_users}'
+        yield (
+            f'  Customers: {user_result.total_customers}  '
+            f'Account managers: {user_result.total_account_managers}  '
+            f'Service providers: {user_result.total_service_providers}'
+        )
+        yield f'  Average orders per user: {format_number(user_result.average_orders_per_user)}'
+        yield (
+            '  Average customers per account manager: '
+            f'{format_number(user_result.average_customers_per_account_manager)}'
+        )
+        yield ''
+
+    yield 'Jobs per service provider'
+    yield '  Service provider: jobs, average days (regular / wafer run), created / active / completed'
+    job_results = (
+        JobReportResult.objects.filter(report=report)
+        .order_by('service_provider_id')
+        .values_list(
+            'service_provider__user__email',
+            'total_jobs',
+            'average_completion_time_regular',
+            'average_completion_time_wafer_run',
+            'jobs_created',
+            'jobs_active',
+            'jobs_completed',
+        )
+    )
+    for email, total_jobs, regular, wafer_run, created, active, completed in job_results.iterator(CHUNK_SIZE):
+        yield (
+            f'  {email}: {total_jobs}, {format_number(regular)} / {format_number(wafer_run)}, '
+            f'{created} / {active} / {completed}'
+        )
+
+
+def get_report_hash(report):
+    """Hash of the content of the PDF of a report."""
+    content_hash = hashlib.sha256()
+    for line in get_report_lines(report):
+        content_hash.update(line.encode())
+        content_hash.update(b'\n')
+    return content_hash.hexdigest()
+
+
+def write_report_pdf(report, file):
+    """Write the PDF of a report to a binary file."""
+    writer = PDFWriter(file)
+    page = []
+    for line in get_report_lines(report):
+        page.append(line)
+        if len(page) == LINES_PER_PAGE:
+            writer.add_page(page)
+            page = []
+    if page:
+        writer.add_page(page)
+    writer.close()
+
+
+def update_report_pdf(report):
+    """
+    Render the PDF of a report unless its content did not change since it
+    was last rendered. Returns whether the PDF was rendered.
+    """
+    pdf_hash = get_report_hash(report)
+    current = Report.objects.filter(pk=report.pk).values('pdf_report', 'pdf_hash').get()
+    if current['pdf_hash'] == pdf_hash and current['pdf_report'] and default_storage.exists(current['pdf_report']):
+        return False
+
+    with tempfile.TemporaryFile() as file:
+        write_report_pdf(report, file)
+        file.seek(0)
+        name = default_storage.save(f'reports_pdf/report_{report.pk}_{pdf_hash[:16]}.pdf', File(file))
+    Report.objects.filter(pk=report.pk).update(pdf_report=name, pdf_hash=pdf_hash)
+    if current['pdf_report'] and current['pdf_report'] != name:
+        default_storage.delete(current['pdf_report'])
+    return True
@@ -0,0 +1,18 @@
+"""stat_analysis.processes.py
+
+Set-up of the worker processes of `stat_analysis.parallel`.
+
+The initializer of a process pool is sent to the spawned processes by
+reference and imported before it runs, i.e. before Django is set up, so
+this module must not import any models, unlike `stat_analysis.parallel`.
+"""
+import django
+from django.db import connections
+
+
+def setup_worker(database_names):
+    django.setup()
+    # the databases the parent process is connected to, which differ from
+    # the settings e.g. under the test runner
+    for alias, name in database_names.items():
+        connections[alias].settings_dict['NAME'] = name
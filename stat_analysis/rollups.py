@@ -0,0 +1,331 @@
+"""stat_analysis.rollups.py
+
+Per-quarter rollups of the Job and Order statistics.
+
+The job rollup of a (quarter, service provider) bucket is recomputed from
+the source tables whenever a Job or JobState contributing to it is written.
+Its completion time sketches are not, as they are only built by reading
+every completed job of the bucket: the completion time of the written job
+is moved from the sketch of its old bucket to the one of its new bucket
+instead, see `move_completion_time`, and their min and max are read again
+when the removed value was one of them.
+The order rollup of a (quarter, state) bucket is kept up to date with
+deltas on every Order and OrderState write, as a single bucket holds all
+orders of the quarter. See `stat_analysis.signals`. Like jobs, an order
+is counted once per bucket, however many times it entered the state in
+the quarter.
+
+`rebuild_rollups` recomputes all of them and is exposed as the
+`rebuild_rollups` management command.
+"""
+from collections import defaultdict
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, Exists, F, Max, Min, OuterRef, Q, Sum
+from django.db.models.functions import TruncQuarter
+from django.utils import timezone
+
+from execution.models import Job, JobState
+from order.models import OrderState
+from stat_analysis.models import JobQuarterRollup, OrderQuarterRollup
+from stat_analysis.sketch import CompletionTimeSketch
+from stat_analysis.stat_utils import get_datetime_range
+
+
+JOB_ROLLUP_FIELDS = [
+    'jobs_started',
+    'completed_regular',
+    'completion_time_regular',
+    'completed_wafer_run',
+    'completion_time_wafer_run',
+    'jobs_created',
+    'jobs_active',
+    'jobs_completed',
+    'completion_time_sketches',
+]
+
+# completed jobs read from the database at once
+CHUNK_SIZE = 2000
+
+
+def get_quarter(value):
+    """First day of the quarter of a date or datetime."""
+    if isinstance(value, datetime.datetime):
+        value = timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    return datetime.date(value.year, 3 * ((value.month - 1) // 3) + 1, 1)
+
+
+def get_last_day_of_quarter(quarter):
+    if quarter.month == 10:
+        return datetime.date(quarter.year, 12, 31)
+    return datetime.date(quarter.year, quarter.month + 3, 1) - datetime.timedelta(days=1)
+
+
+def in_quarters(field_name, quarter_from=None, quarter_to=None):
+    """Filter on a datetime column falling in the given quarters, if any."""
+    q = Q(**{f'{field_name}__isnull': False})
+    if quarter_from is not None and quarter_to is not None:
+        range_start, range_end = get_datetime_range(quarter_from, get_last_day_of_quarter(quarter_to))
+        q &= Q(**{f'{field_name}__gte': range_start, f'{field_name}__lt': range_end})
+    return q
+
+
+def quarter_of(field_name):
+    return TruncQuarter(field_name, output_field=DateField())
+
+
+def first_in_buckets(order_states):
+    """
+    The order states of a queryset which are the first of their order in
+    their (quarter, state) bucket, annotated with their `quarter`.
+    """
+    earlier = OrderState.objects.annotate(quarter=quarter_of('state_date')).filter(
+        order=OuterRef('order'),
+        state=OuterRef('state'),
+        quarter=OuterRef('quarter'),
+        id__lt=OuterRef('id'),
+    )
+    return order_states.annotate(quarter=quarter_of('state_date')).filter(~Exists(earlier))
+
+
+def get_order_states_in_bucket(order_id, quarter, state):
+    return OrderState.objects.filter(in_quarters('state_date', quarter, quarter), order_id=order_id, state=state)
+
+
+def get_completed_jobs(jobs):
+    """The jobs of a queryset counted in the completion times."""
+    return (
+        jobs.filter(current_state='completed', ended_at__isnull=False, completion_time__isnull=False)
+        .exclude(completion_time=0)
+    )
+
+
+def compute_job_rollups(service_provider_id=None, quarter_from=None, quarter_to=None, sketches=True):
+    """
+    Compute the job rollups, optionally limited to a service provider
+    and to the quarters from quarter_from up to and including quarter_to.
+    Without `sketches`, the completion time sketches are left empty.
+    Returns a dict keyed by (quarter, service provider id).
+    """
+    rollups = defaultdict(lambda: {
+        'jobs_started': 0,
+        'completed_regular': 0,
+        'completion_time_regular': 0.0,
+        'completed_wafer_run': 0,
+        'completion_time_wafer_run': 0.0,
+        'jobs_created': 0,
+        'jobs_active': 0,
+        'jobs_completed': 0,
+        'completion_time_sketches': {},
+    })
+
+    jobs = Job.objects.all()
+    job_states = JobState.objects.all()
+    if service_provider_id is not None:
+        jobs = jobs.filter(service_provider_id=service_provider_id)
+        job_states = job_states.filter(job__service_provider_id=service_provider_id)
+
+    started = (
+        jobs.filter(in_quarters('started_at', quarter_from, quarter_to))
+        .values('service_provider', quarter=quarter_of('started_at'))
+        .annotate(count=Count('id'))
+    )
+    for row in started:
+        rollups[(row['quarter'], row['service_provider'])]['jobs_started'] = row['count']
+
+    # Jobs are accounted to the quarter in which they were completed
+    completed = (
+        get_completed_jobs(jobs.filter(in_quarters('ended_at', quarter_from, quarter_to)))
+        .annotate(quarter=quarter_of('ended_at'))
+    )
+    if sketches:
+        # the completion times are streamed into a sketch per bucket and
+        # job type, which also gives their number and sum
+        job_sketches = defaultdict(CompletionTimeSketch)
+        rows = completed.values_list('quarter', 'service_provider', 'job_type', 'completion_time')
+        for quarter, provider_id, job_type, completion_time in rows.iterator(chunk_size=CHUNK_SIZE):
+            job_sketches[(quarter, provider_id, job_type)].add(completion_time)
+        for (quarter, provider_id, job_type), sketch in job_sketches.items():
+            rollup = rollups[(quarter, provider_id)]
+            rollup[f"completed_{job_type}"] = sketch.count
+            rollup[f"completion_time_{job_type}"] = sketch.total
+            rollup['completion_time_sketches'][job_type] = sketch.to_dict()
+    else:
+        rows = (
+            completed.values('quarter', 'service_provider', 'job_type')
+            .annotate(count=Count('id'), total=Sum('completion_time'))
+        )
+        for row in rows:
+            rollup = rollups[(row['quarter'], row['service_provider'])]
+            rollup[f"completed_{row['job_type']}"] = row['count']
+            rollup[f"completion_time_{row['job_type']}"] = row['total']
+
+    transitions = (
+        job_states.filter(in_quarters('state_date', quarter_from, quarter_to))
+        .values('job__service_provider', 'state', quarter=quarter_of('state_date'))
+        .annotate(count=Count('job', distinct=True))
+    )
+    for row in transitions:
+        rollups[(row['quarter'], row['job__service_provider'])][f"jobs_{row['state']}"] = row['count']
+
+    return rollups
+
+
+def compute_order_rollups(quarter_from=None, quarter_to=None):
+    """
+    Compute the order rollups, optionally limited to the quarters from
+    quarter_from up to and including quarter_to.
+    Returns a dict keyed by (quarter, state).
+    """
+    rollups = defaultdict(lambda: {
+        'orders': 0,
+        'total_amount': 0,
+    })
+
+    # an order is counted once per bucket, with its first state in it
+    transitions = (
+        first_in_buckets(OrderState.objects.filter(in_quarters('state_date', quarter_from, quarter_to)))
+        .values('state', 'quarter')
+        .annotate(count=Count('id'), total_amount=Sum('order__amount'))
+    )
+    for row in transitions:
+        rollup = rollups[(row['quarter'], row['state'])]
+        rollup['orders'] = row['count']
+        rollup['total_amount'] = row['total_amount'] or 0
+
+    return rollups
+
+
+def refresh_job_rollups(service_provider_id, quarters, sketches=True):
+    """
+    Recompute the job rollups of a service provider for the given quarters,
+    without `sketches` leaving their completion time sketches as they are.
+    """
+    quarters = set(quarters)
+    if not quarters:
+        return
+    rollups = compute_job_rollups(service_provider_id, min(quarters), max(quarters), sketches=sketches)
+    for quarter in quarters:
+        # buckets without any data left are reset to zero
+        rollups.setdefault((quarter, service_provider_id), rollups.default_factory())
+    JobQuarterRollup.objects.bulk_create(
+        [
+            JobQuarterRollup(quarter=quarter, service_provider_id=provider_id, **values)
+            for (quarter, provider_id), values in rollups.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['quarter', 'service_provider'],
+        update_fields=[
+            field for field in JOB_ROLLUP_FIELDS
+            if sketches or field != 'completion_time_sketches'
+        ] + ['updated_at'],
+    )
+
+
+def get_completion_time(job_id):
+    """
+    (quarter, service provider id, job type, completion time) of a job
+    counted in the completion time sketches, None if it is not counted.
+    """
+    job = (
+        get_completed_jobs(Job.objects.filter(pk=job_id))
+        .values_list('ended_at', 'service_provider', 'job_type', 'completion_time')
+        .first()
+    )
+    if job is None:
+        return None
+    ended_at, service_provider_id, job_type, completion_time = job
+    return get_quarter(ended_at), service_provider_id, job_type, completion_time
+
+
+def move_completion_time(old, new):
+    """
+    Move the completion time of a job, as returned by `get_completion_time`
+    before and after a write, between the sketches of the job rollups.
+    The rollups of both buckets must exist, see `refresh_job_rollups`.
+    """
+    if old == new:
+        return
+    with transaction.atomic():
+        for completion_time, remove in [(old, True), (new, False)]:
+            if completion_time is None:
+                continue
+            quarter, service_provider_id, job_type, value = completion_time
+            rollup = (
+                JobQuarterRollup.objects.select_for_update()
+                .filter(quarter=quarter, service_provider_id=service_provider_id)
+                .values_list('pk', 'completion_time_sketches')
+                .first()
+            )
+            if rollup is None:
+                continue
+            pk, job_sketches = rollup
+            if job_type in job_sketches:
+                sketch = CompletionTimeSketch.from_dict(job_sketches[job_type])
+            elif remove:
+                continue
+            else:
+                sketch = CompletionTimeSketch()
+            if remove:
+                sketch.remove(value)
+                if sketch.count and value in (sketch.min, sketch.max):
+                    # the written job is already out of the bucket
+                    bounds = get_completed_jobs(Job.objects.filter(
+                        in_quarters('ended_at', quarter, quarter),
+                        service_provider_id=service_provider_id,
+                        job_type=job_type,
+                    )).aggregate(min=Min('completion_time'), max=Max('completion_time'))
+                    sketch.min, sketch.max = bounds['min'], bounds['max']
+            else:
+                sketch.add(value)
+            if sketch.count:
+                job_sketches[job_type] = sketch.to_dict()
+            else:
+                job_sketches.pop(job_type, None)
+            JobQuarterRollup.objects.filter(pk=pk).update(completion_time_sketches=job_sketches)
+
+
+def add_to_order_rollup(quarter, state, orders, total_amount):
+    """Add the given number of orders and amount to an order rollup."""
+    updated = OrderQuarterRollup.objects.filter(quarter=quarter, state=state).update(
+        orders=F('orders') + orders,
+        total_amount=F('total_amount') + total_amount,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                OrderQuarterRollup.objects.create(
+                    quarter=quarter,
+                    state=state,
+                    orders=orders,
+                    total_amount=total_amount,
+                )
+        except IntegrityError:
+            # created concurrently by another writer
+            add_to_order_rollup(quarter, state, orders, total_amount)
+
+
+def rebuild_rollups(batch_size=1000):
+    """Recompute every rollup from scratch."""
+    job_rollups = compute_job_rollups()
+    order_rollups = compute_order_rollups()
+    with transaction.atomic():
+        JobQuarterRollup.objects.all().delete()
+        OrderQuarterRollup.objects.all().delete()
+        JobQuarterRollup.objects.bulk_create(
+            [
+                JobQuarterRollup(quarter=quarter, service_provider_id=provider_id, **values)
+                for (quarter, provider_id), values in job_rollups.items()
+            ],
+            batch_size=batch_size,
+        )
+        OrderQuarterRollup.objects.bulk_create(
+            [
+                OrderQuarterRollup(quarter=quarter, state=state, **values)
+                for (quarter, state), values in order_rollups.items()
+            ],
+            batch_size=batch_size,
+        )
+    return len(job_rollups), len(order_rollups)
@@ -0,0 +1,229 @@
+"""stat_analysis.signals.py
+
+Keep the per-quarter rollups in sync with the Job, JobState,
+Order and OrderState writes, and with the order amounts maintained
+from the OrderItem and product price writes.
+
+The `pre_*` handlers remember the buckets a row contributed to before
+the write, so that both the old and the new buckets are updated.
+
+On saves, the completion time of the job is moved between the sketches
+of the job rollups rather than recomputing them, see
+`stat_analysis.rollups`. Deletes recompute the sketches: a delete sends
+`pre_delete` for every deleted row before any `post_delete`, so the
+remembered completion times of several rows of a job may be stale.
+"""
+from collections import defaultdict
+
+from django.db.models import Count, Sum
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from execution.models import Job, JobState
+from execution.signals import job_states_bulk_created
+from order.models import Order, OrderState, ProductAndService
+from order.signals import order_amounts_changed, order_states_bulk_created, product_price_changed
+from stat_analysis.rollups import (
+    add_to_order_rollup,
+    get_completion_time,
+    get_order_states_in_bucket,
+    first_in_buckets,
+    get_quarter,
+    move_completion_time,
+    quarter_of,
+    refresh_job_rollups,
+)
+
+
+def get_job_buckets(job_id):
+    """(service provider, quarters) the job currently contributes to."""
+    job = Job.objects.filter(pk=job_id).values('service_provider', 'started_at', 'ended_at').first()
+    if job is None:
+        return None, set()
+    quarters = {get_quarter(date) for date in (job['started_at'], job['ended_at']) if date}
+    return job['service_provider'], quarters
+
+
+def get_job_state_quarters(job_id):
+    """Quarters of all states of a job."""
+    return set(
+        JobState.objects.filter(job=job_id)
+        .values_list(quarter_of('state_date'), flat=True)
+        .distinct()
+    )
+
+
+def refresh_job_buckets(*buckets, sketches=True):
+    quarters_by_provider = {}
+    for service_provider_id, quarters in buckets:
+        if service_provider_id is not None:
+            quarters_by_provider.setdefault(service_provider_id, set()).update(quarters)
+    for service_provider_id, quarters in quarters_by_provider.items():
+        refresh_job_rollups(service_provider_id, quarters, sketches=sketches)
+
+
+def refresh_job_rollups_for_write(instance, job_id, new_buckets, signal):
+    # saves move the completion time of the job, deletes recompute the sketches
+    saved = signal is post_save
+    refresh_job_buckets(getattr(instance, '_rollup_buckets', (None, set())), new_buckets, sketches=not saved)
+    if saved:
+        move_completion_time(getattr(instance, '_rollup_completion_time', None), get_completion_time(job_id))
+
+
+@receiver(pre_save, sender=Job)
+@receiver(pre_delete, sender=Job)
+def remember_job_buckets(sender, instance, **kwargs):
+    instance._rollup_buckets = get_job_buckets(instance.pk) if instance.pk else (None, set())
+    instance._rollup_completion_time = get_completion_time(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def refresh_job_rollups_for_job(sender, instance, signal, **kwargs):
+    new_buckets = get_job_buckets(instance.pk)
+    old_service_provider_id, old_quarters = getattr(instance, '_rollup_buckets', (None, set()))
+    if signal is post_save and old_service_provider_id not in (None, new_buckets[0]):
+        # a reassigned job moves its states in every quarter
+        # from the old to the new service provider
+        quarters = get_job_state_quarters(instance.pk)
+        old_quarters.update(quarters)
+        new_buckets[1].update(quarters)
+    refresh_job_rollups_for_write(instance, instance.pk, new_buckets, signal)
+
+
+@receiver(pre_save, sender=JobState)
+@receiver(pre_delete, sender=JobState)
+def remember_job_state_buckets(sender, instance, **kwargs):
+    service_provider_id, quarters = get_job_buckets(instance.job_id)
+    old_state_date = JobState.objects.filter(pk=instance.pk).values_list('state_date', flat=True).first() \
+        if instance.pk else None
+    if old_state_date:
+        quarters.add(get_quarter(old_state_date))
+    instance._rollup_buckets = (service_provider_id, quarters)
+    instance._rollup_completion_time = get_completion_time(instance.job_id)
+
+
+@receiver(post_save, sender=JobState)
+@receiver(post_delete, sender=JobState)
+def refresh_job_rollups_for_job_state(sender, instance, signal, **kwargs):
+    # runs after `execution.signals.update_job_lifecycle`,
+    # so the lifecycle columns of the job are up to date
+    service_provider_id, quarters = get_job_buckets(instance.job_id)
+    if instance.state_date:
+        quarters.add(get_quarter(instance.state_date))
+    refresh_job_rollups_for_write(instance, instance.job_id, (service_provider_id, quarters), signal)
+
+
+@receiver(job_states_bulk_created, sender=JobState)
+def refresh_job_rollups_for_bulk_job_states(sender, job_ids, **kwargs):
+    # runs after `execution.signals.update_jobs_lifecycle`
+    buckets = (
+        JobState.objects.filter(job__in=job_ids)
+        .values_list('job__service_provider', quarter_of('state_date'))
+        .distinct()
+    )
+    refresh_job_buckets(*((service_provider_id, {quarter}) for service_provider_id, quarter in buckets))
+
+
+def get_order_amount(order_id):
+    amount = Order.objects.filter(pk=order_id).values_list('amount', flat=True).first()
+    return amount or 0
+
+
+# An order is counted once per (quarter, state) bucket: it is added with
+# its first state in a bucket and removed with its last one.
+
+@receiver(pre_save, sender=OrderState)
+def remember_order_state_bucket(sender, instance, **kwargs):
+    old_bucket = OrderState.objects.filter(pk=instance.pk).values_list('state_date', 'state').first() \
+        if instance.pk else None
+    instance._rollup_bucket = (get_quarter(old_bucket[0]), old_bucket[1]) if old_bucket else None
+
+
+@receiver(post_save, sender=OrderState)
+def add_order_state_to_rollups(sender, instance, **kwargs):
+    old_bucket = getattr(instance, '_rollup_bucket', None)
+    new_bucket = (get_quarter(instance.state_date), instance.state)
+    if old_bucket == new_bucket:
+        return
+    amount = get_order_amount(instance.order_id)
+    if old_bucket and not get_order_states_in_bucket(instance.order_id, *old_bucket).exists():
+        add_to_order_rollup(*old_bucket, -1, -amount)
+    if get_order_states_in_bucket(instance.order_id, *new_bucket).count() == 1:
+        add_to_order_rollup(*new_bucket, 1, amount)
+
+
+@receiver(pre_delete, sender=OrderState)
+def remember_order_state_counted(sender, instance, **kwargs):
+    # a delete of several states of an order in a bucket sends every
+    # `pre_delete` before any `post_delete`, only the first one is removed
+    instance._rollup_counted = first_in_buckets(OrderState.objects.filter(pk=instance.pk)).exists()
+
+
+@receiver(post_delete, sender=OrderState)
+def remove_order_state_from_rollups(sender, instance, **kwargs):
+    bucket = (get_quarter(instance.state_date), instance.state)
+    if not getattr(instance, '_rollup_counted', True) \
+            or get_order_states_in_bucket(instance.order_id, *bucket).exists():
+        return
+    add_to_order_rollup(*bucket, -1, -get_order_amount(instance.order_id))
+
+
+@receiver(order_states_bulk_created, sender=OrderState)
+def add_bulk_order_states_to_rollups(sender, order_state_ids, **kwargs):
+    # the inserted states are the last ones, those first in their
+    # bucket add their order to it
+    buckets = (
+        first_in_buckets(OrderState.objects.filter(pk__in=order_state_ids))
+        .values('state', 'quarter')
+        .annotate(count=Count('id'), total_amount=Sum('order__amount'))
+    )
+    for bucket in buckets:
+        add_to_order_rollup(bucket['quarter'], bucket['state'], bucket['count'], bucket['total_amount'] or 0)
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_amount(sender, instance, **kwargs):
+    instance._rollup_amount = get_order_amount(instance.pk) if instance.pk else 0
+
+
+def add_order_amounts_to_rollups(differences):
+    """Add the differences of the amounts of orders, keyed by order id, to the buckets of their states."""
+    buckets = (
+        OrderState.objects.filter(order__in=differences)
+        .values('order', 'state', quarter=quarter_of('state_date'))
+        .distinct()
+    )
+    amounts = defaultdict(int)
+    for bucket in buckets:
+        amounts[bucket['quarter'], bucket['state']] += differences[bucket['order']]
+    for (quarter, state), amount in amounts.items():
+        add_to_order_rollup(quarter, state, 0, amount)
+
+
+@receiver(post_save, sender=Order)
+def update_order_amount_in_rollups(sender, instance, created, **kwargs):
+    # a new order has no states yet, its initial state is added to the rollups
+    difference = (instance.amount or 0) - getattr(instance, '_rollup_amount', 0)
+    if created or not difference:
+        return
+    add_order_amounts_to_rollups({instance.pk: difference})
+
+
+@receiver(order_amounts_changed, sender=Order)
+def update_order_amounts_in_rollups(sender, differences, **kwargs):
+    # sent by `order.signals` when the items of orders change
+    add_order_amounts_to_rollups(differences)
+
+
+@receiver(product_price_changed, sender=ProductAndService)
+def update_product_price_in_rollups(sender, product, difference, **kwargs):
+    # a single difference per bucket, weighted by the quantity of the product
+    # in its orders, each order once per bucket
+    buckets = (
+        first_in_buckets(OrderState.objects.filter(order__items__product=product))
+        .values('state', 'quarter')
+        .annotate(quantity=Sum('order__items__quantity'))
+    )
+    for bucket in buckets:
+        add_to_order_rollup(bucket['quarter'], bucket['state'], 0, difference * bucket['quantity'])
@@ -0,0 +1,162 @@
+"""stat_analysis.sketch.py
+
+Mergeable streaming sketch of the distribution of job completion times.
+
+Values are counted in logarithmic buckets, each covering values within
+`RELATIVE_ACCURACY` of each other, so that any percentile is estimated
+within that relative error whatever the number of values. The values
+are also counted in the fixed `HISTOGRAM_EDGES` buckets.
+
+A sketch only holds counts, so two sketches are merged by adding their
+counts, which gives the same sketch as adding all of their values to a
+single one, and a value is removed by subtracting its counts.
+
+Sketches are stored as JSON in the per-quarter job rollups, see
+`stat_analysis.rollups`, and those of the quarters of a report are
+merged into its percentiles without reading the jobs again.
+"""
+import math
+
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+
+# upper bounds in days of the histogram buckets, the last bucket holds
+# the values over the last edge
+HISTOGRAM_EDGES = [1, 2, 5, 10, 20, 50, 100, 200, 500]
+
+PERCENTILES = [50, 90, 99]
+
+
+def get_bin(value):
+    """Index of the logarithmic bucket of a positive value."""
+    return math.ceil(math.log(value) / LOG_GAMMA)
+
+
+def get_histogram_bucket(value):
+    for bucket, edge in enumerate(HISTOGRAM_EDGES):
+        if value <= edge:
+            return bucket
+    return len(HISTOGRAM_EDGES)
+
+
+class CompletionTimeSketch:
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        # values <= 0 have no logarithmic bucket
+        self.zero_count = 0
+        self.bins = {}
+        self.histogram = [0] * (len(HISTOGRAM_EDGES) + 1)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if value > 0:
+            index = get_bin(value)
+            self.bins[index] = self.bins.get(index, 0) + 1
+        else:
+            self.zero_count += 1
+        self.histogram[get_histogram_bucket(value)] += 1
+
+    def remove(self, value):
+        """
+        Remove a value added before. The min and max are not narrowed,
+        the caller sets them again if the value was one of them.
+        """
+        self.count -= 1
+        self.total -= value
+        if value > 0:
+            index = get_bin(value)
+            self.bins[index] -= 1
+            if not self.bins[index]:
+                del self.bins[index]
+        else:
+            self.zero_count -= 1
+        self.histogram[get_histogram_bucket(value)] -= 1
+        if not self.count:
+            self.total = 0.0
+            self.min = self.max = None
+
+    def merge(self, other):
+        """Add the counts of another sketch to this one."""
+        if not other.count:
+            return self
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self.zero_count += other.zero_count
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.histogram = [count + other_count for count, other_count in zip(self.histogram, other.histogram)]
+        return self
+
+    def quantile(self, q):
+        """Estimate of the value below which a fraction q of the values fall, None without values."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return self.min
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                # the middle of the bucket, in relative terms
+                value = 2 * GAMMA ** index / (GAMMA + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def get_distribution(self):
+        """Count, mean, percentiles and histogram of the values, as stored with the report results."""
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            **{f'p{percentile}': self.quantile(percentile / 100) for percentile in PERCENTILES},
+            'histogram': self.histogram,
+        }
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+            'zero_count': self.zero_count,
+            # JSON object keys are strings
+            'bins': {str(index): count for index, count in self.bins.items()},
+            'histogram': self.histogram,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls()
+        sketch.count = data['count']
+        sketch.total = data['total']
+        sketch.min = data['min']
+        sketch.max = data['max']
+        sketch.zero_count = data['zero_count']
+        sketch.bins = {int(index): count for index, count in data['bins'].items()}
+        sketch.histogram = list(data['histogram'])
+        return sketch
+
+
+def merge_sketches(sketches):
+    """Merge the stored sketches of several rollups, keyed by job type."""
+    merged = {}
+    for job_sketches in sketches:
+        for job_type, data in job_sketches.items():
+            merged.setdefault(job_type, CompletionTimeSketch()).merge(CompletionTimeSketch.from_dict(data))
+    return merged
+
+
+def get_distributions(sketches):
+    """Distribution of every job type of sketches keyed by job type."""
+    return {job_type: sketch.get_distribution() for job_type, sketch in sorted(sketches.items())}
@@ -1,22 +1,54 @@
 from collections import defaultdict
 import datetime
 
-from django.db.models import Subquery, Max, OuterRef
+from django.db import transaction
+from django.db.models import Max, Count, DateField, Sum, Q
+from django.db.models.functions import TruncQuarter
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from stat_analysis.sketch import get_distributions, merge_sketches
 
 
 job_model = apps.get_model("execution", "Job")
+job_quarter_stats_model = apps.get_model("stat_analysis", "JobQuarterResult")
+job_rollup_model = apps.get_model("stat_analysis", "JobQuarterRollup")
 job_states_model = apps.get_model("execution", "JobState")
 job_stats_model = apps.get_model("stat_analysis", "JobReportResult")
 order_model = apps.get_model("order", "Order")
+order_quarter_stats_model = apps.get_model("stat_analysis", "OrderQuarterResult")
+order_rollup_model = apps.get_model("stat_analysis", "OrderQuarterRollup")
 order_states_model = apps.get_model("order", "OrderState")
 order_stats_model = apps.get_model("stat_analysis", "OrderReportResult")
 report_model = apps.get_model("stat_analysis", "Report")
 service_provider_model = apps.get_model("registrar", "ServiceProviderProfile")
 user_model = get_user_model()
+user_quarter_stats_model = apps.get_model("stat_analysis", "UserQuarterResult")
 user_stats_model = apps.get_model("stat_analysis", "UserReportResult")
 
+JOB_STATS_FIELDS = [
+    'total_jobs',
+    'average_completion_time_regular',
+    'average_completion_time_wafer_run',
+    'completion_time_distribution',
+    'jobs_created',
+    'jobs_active',
+    'jobs_completed',
+]
+
+# fields of the job rollups added up over the quarters of a report
+JOB_ROLLUP_SUM_FIELDS = [
+    'jobs_started',
+    'completed_regular',
+    'completion_time_regular',
+    'completed_wafer_run',
+    'completion_time_wafer_run',
+    'jobs_created',
+    'jobs_active',
+    'jobs_completed',
+]
+
 
 def get_quarter_dates(quarter, year):
     if quarter == 'Q1':
@@ -36,78 +68,93 @@ def get_quarter_dates(quarter, year):
     return start_date, end_date
 
 
-def get_average_completion_time(job_type, start_date, end_date, service_provider=None):
-    """Calculate average completion time for a specific job type."""
-    job_types = job_model.JOB_TYPE_CHOICES
-    if job_type not in dict(job_types):
-        raise ValueError(f"Invalid job type. Please use one of {dict(job_types).keys()}.")
-    
-    if service_provider:
-        jobs = job_model.objects.filter(
-            job_type=job_type,
-            completion_time__isnull=False,
-            service_provider=service_provider,
-        ).exclude(completion_time=0)
-    else:
-        jobs = job_model.objects.filter(
-            job_type=job_type,
-            completion_time__isnull=False,
-        ).exclude(completion_time=0)
-
-    jobs = [
-        job for job in jobs
-        if job.starting_date.date() and job.end_date and
-        job.starting_date.date() >= start_date and job.end_date.date() <= end_date
-    ]
-
-    if jobs:
-        total_completion_time = sum(job.completion_time for job in jobs)
-        average_completion_time = total_completion_time / len(jobs)
-    else:
-        average_completion_time = 0.0
-    return average_completion_time
+def get_quarters(start_date, end_date):
+    """First day of every quarter from the one of start_date up to end_date."""
+    quarters = []
+    quarter = datetime.date(start_date.year, 3 * ((start_date.month - 1) // 3) + 1, 1)
+    while quarter <= end_date:
+        quarters.append(quarter)
+        quarter = datetime.date(quarter.year + quarter.month // 10, (quarter.month + 2) % 12 + 1, 1)
+    return quarters
 
 
-def get_job_state_count(start_date, end_date, service_provider=None):
+def get_datetime_range(start_date, end_date):
     """
-    Since each job can have multiple states, we need to get the
-    latest state for each job within the given time range to count
-    the number of jobs in each state correctly.
+    Convert an inclusive date range into a half-open datetime range
+    [start, end) in the current time zone, so that datetime columns
+    can be compared directly and their indexes used.
     """
-    if service_provider:
-        latest_states = job_states_model.objects.filter(
-            pk__in=Subquery(
-                job_states_model.objects.filter(
-                    state_date__gte=start_date,
-                    state_date__lte=end_date,
-                    job__service_provider=service_provider,
-                )
-                .values('job')
-                .annotate(latest_id=Max('id'))
-                .values('latest_id')
-            )
-        )
-    else:
-        latest_states = job_states_model.objects.filter(
-            pk__in=Subquery(
-                job_states_model.objects.filter(
-                    state_date__gte=start_date,
-                    state_date__lte=end_date
-                )
-                .values('job')
-                .annotate(latest_id=Max('id'))
-                .values('latest_id')
-            )
-        )
+    start = timezone.make_aware(datetime.datetime.combine(start_date, datetime.time.min))
+    end = timezone.make_aware(
+        datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time.min)
+    )
+    return start, end
 
-    job_states_count = defaultdict(int)
-    for job_state in latest_states:
-        job_states_count[job_state.state] += 1
 
-    return job_states_count
+def get_period_dates(quarter_from, year_from, quarter_to, year_to):
+    """First and last day of a reporting period."""
+    start_date_from, end_date_from = get_quarter_dates(quarter_from, year_from)
+    start_date_to, end_date_to = get_quarter_dates(quarter_to, year_to)
+    return min(start_date_from, start_date_to), max(end_date_from, end_date_to)
 
 
-def calculate_job_stats(quarter_from, year_from, quarter_to, year_to):
+def empty_job_stats():
+    return {
+        'total_jobs': 0,
+        'average_completion_time_regular': 0.0,
+        'average_completion_time_wafer_run': 0.0,
+        'completion_time_distribution': {},
+        'jobs_created': 0,
+        'jobs_active': 0,
+        'jobs_completed': 0,
+    }
+
+
+def get_job_stats_by_provider(start_date, end_date, service_provider_ids=None):
+    """
+    Assemble the job statistics of every service provider, or only of the
+    given ones, from the per-quarter rollups of the given period,
+    see `stat_analysis.rollups`.
+
+    Returns a dict keyed by service provider id. Jobs are counted in the
+    quarter they started, completion times in the quarter the job was
+    completed and states in the quarter the job entered them.
+    """
+    # The rollups of the quarters are added up per service provider here
+    # rather than in SQL, as their completion time sketches are merged too.
+    sums = defaultdict(lambda: dict.fromkeys(JOB_ROLLUP_SUM_FIELDS, 0))
+    sketches = defaultdict(list)
+    rollups = job_rollup_model.objects.filter(quarter__gte=start_date, quarter__lte=end_date)
+    if service_provider_ids is not None:
+        rollups = rollups.filter(service_provider_id__in=service_provider_ids)
+    for row in rollups.values('service_provider', 'completion_time_sketches', *JOB_ROLLUP_SUM_FIELDS):
+        provider_sums = sums[row['service_provider']]
+        for field in JOB_ROLLUP_SUM_FIELDS:
+            provider_sums[field] += row[field]
+        sketches[row['service_provider']].append(row['completion_time_sketches'])
+
+    job_stats = defaultdict(empty_job_stats)
+    for service_provider_id, provider_sums in sums.items():
+        stats = job_stats[service_provider_id]
+        set_job_stats(stats, provider_sums)
+        stats['completion_time_distribution'] = get_distributions(merge_sketches(sketches[service_provider_id]))
+
+    return job_stats
+
+
+def set_job_stats(stats, rollup):
+    """Fill the job statistics from the (summed) fields of job rollups."""
+    stats['total_jobs'] = rollup['jobs_started']
+    for job_type, _ in job_model.JOB_TYPE_CHOICES:
+        completed = rollup[f'completed_{job_type}']
+        if completed:
+            stats[f'average_completion_time_{job_type}'] = rollup[f'completion_time_{job_type}'] / completed
+    stats['jobs_created'] = rollup['jobs_created']
+    stats['jobs_active'] = rollup['jobs_active']
+    stats['jobs_completed'] = rollup['jobs_completed']
+
+
+def calculate_job_stats(quarter_from, year_from, quarter_to, year_to, report=None):
     """Calculate statistics for Job model for a given period."""
 
     start_date_from, end_date_from = get_quarter_dates(quarter_from, year_from)
@@ -116,136 +163,115 @@ def calculate_job_stats(quarter_from, year_from, quarter_to, year_to):
     start_date = min(start_date_from, start_date_to)
     end_date = max(end_date_from, end_date_to)
 
-    jobs = job_model.objects.prefetch_related('job_states')
-    service_providers = service_provider_model.objects.all()
-    report, created = report_model.objects.get_or_create(
-        quarter_from=quarter_from,
-        year_from=year_from,
-        quarter_to=quarter_to,
-        year_to=year_to,
-        defaults={
-            'title': 'Job Report',
-            'created_at': datetime.datetime.now(),
-            'created_by': 'system',
-        }
-    )
-
-    for service_provider in service_providers:
-        current_provider_jobs = jobs.filter(service_provider=service_provider).all()
-        # Due to the nature of the modified starting_date field, which is a property field
-        # a normal ORM/SQL query will not work here. It's slower but does not matter
-        # for the reporting use case. If better performance is needed, we can
-        # de-normalize this field into the Job model.
-        current_provider_jobs = [
-            job for job in current_provider_jobs
-            if job.starting_date.date() and start_date <= job.starting_date.date() <= end_date
-        ]
-
-        total_jobs = len(current_provider_jobs)
-
-        average_completion_time_regular = get_average_completion_time(
-            'regular', start_date, end_date, service_provider
-        )
-        average_completion_time_wafer_run = get_average_completion_time(
-            'wafer_run', start_date, end_date, service_provider
-        )
-
-        job_states_count = get_job_state_count(start_date, end_date, service_provider)
-        jobs_created = job_states_count.get('created', 0)
-        jobs_active = job_states_count.get('active', 0)
-        jobs_completed = job_states_count.get('completed', 0)
-
-        job_stats, created = job_stats_model.objects.update_or_create(
-            report=report,
-            service_provider=service_provider,
+    if report is None:
+        report, created = report_model.objects.get_or_create(
+            quarter_from=quarter_from,
+            year_from=year_from,
+            quarter_to=quarter_to,
+            year_to=year_to,
             defaults={
-                'total_jobs': total_jobs,
-                'average_completion_time_regular': average_completion_time_regular,
-                'average_completion_time_wafer_run': average_completion_time_wafer_run,
-                'jobs_created': jobs_created,
-                'jobs_active': jobs_active,
-                'jobs_completed': jobs_completed,
+                'title': 'Job Report',
+                'created_at': datetime.datetime.now(),
+                'created_by': 'system',
             }
         )
 
+    job_stats = get_job_stats_by_provider(start_date, end_date)
+    service_provider_ids = service_provider_model.objects.values_list('id', flat=True)
+    save_job_stats(report, job_stats, service_provider_ids)
 
-def get_order_state_count(start_date, end_date):
+
+def save_job_stats(report, job_stats, service_provider_ids):
     """
-    Since each order can have multiple states, we need to get the
-    latest state for each order within the given time range to count
-    the number of jobs in each state correctly.
+    Every service provider gets a result row, including those without
+    any jobs in the period, written in a single upsert.
     """
-    latest_states = order_states_model.objects.filter(
-        pk__in=Subquery(
-            order_states_model.objects.filter(
-                state_date__gte=start_date,
-                state_date__lte=end_date
+    job_stats_model.objects.bulk_create(
+        [
+            job_stats_model(
+                report=report,
+                service_provider_id=service_provider_id,
+                **job_stats.get(service_provider_id, empty_job_stats()),
             )
-            .values('order')
-            .annotate(latest_id=Max('id'))
-            .values('latest_id')
-        )
+            for service_provider_id in service_provider_ids
+        ],
+        update_conflicts=True,
+        unique_fields=['report', 'service_provider'],
+        update_fields=JOB_STATS_FIELDS,
     )
 
-    order_states_count = defaultdict(int)
-    for order_state in latest_states:
-        order_states_count[order_state.state] += 1
-
-    return order_states_count
-
 
-def calculate_order_stats(quarter_from, year_from, quarter_to, year_to):
+def calculate_order_stats(quarter_from, year_from, quarter_to, year_to, report=None):
     """Calculate statistics for Order model for a given period."""
     start_date_from, end_date_from = get_quarter_dates(quarter_from, year_from)
     start_date_to, end_date_to = get_quarter_dates(quarter_to, year_to)
 
     start_date = min(start_date_from, start_date_to)
     end_date = max(end_date_from, end_date_to)
-    
-    orders = order_model.objects.prefetch_related('order_states').all()
-    orders = [
-        order for order in orders
-        if order.starting_date.date() and start_date <= order.starting_date.date() <= end_date
-    ]
-    total_orders = len(orders)
 
-    total_amount = sum(order.amount for order in orders if order.amount is not None)
+    if report is None:
+        report, created = report_model.objects.get_or_create(
+            quarter_from=quarter_from,
+            year_from=year_from,
+            quarter_to=quarter_to,
+            year_to=year_to,
+            defaults={
+                'title': 'Job Report',
+                'created_at': datetime.datetime.now(),
+                'created_by': 'system',
+            }
+        )
+
+    order_stats, created = order_stats_model.objects.update_or_create(
+        report=report,
+        defaults=get_order_stats(start_date, end_date),
+    )
+
+
+def get_order_stats(start_date, end_date):
+    """Order statistics of the given period."""
+    # Assembled from the per-quarter rollups, see `stat_analysis.rollups`.
+    # Orders are counted in the quarter they entered each state, once per
+    # quarter and state, the 'new' state holding the orders placed in the period.
+    order_states_count = defaultdict(int)
+    order_states_amount = defaultdict(int)
+    rollups = (
+        order_rollup_model.objects
+        .filter(quarter__gte=start_date, quarter__lte=end_date)
+        .values('state')
+        .annotate(orders=Sum('orders'), total_amount=Sum('total_amount'))
+    )
+    for row in rollups:
+        order_states_count[row['state']] = row['orders']
+        order_states_amount[row['state']] = row['total_amount']
+
+    return get_order_stats_from_states(order_states_count, order_states_amount)
+
+
+def get_order_stats_from_states(order_states_count, order_states_amount):
+    """Order statistics from the number and amount of the orders which entered each state."""
+    total_orders = order_states_count.get("new", 0)
+    total_amount = order_states_amount.get("new", 0)
 
     average_amount = total_amount / total_orders if total_orders > 0 else 0.0
-    order_states_count = get_order_state_count(start_date, end_date)
 
     order_new = order_states_count.get("new", 0)
     order_pending = order_states_count.get("pending", 0)
     order_closed = order_states_count.get("closed", 0)
     order_completed = order_states_count.get("completed", 0)
 
-    report, created = report_model.objects.get_or_create(
-        quarter_from=quarter_from,
-        year_from=year_from,
-        quarter_to=quarter_to,
-        year_to=year_to,
-        defaults={
-            'title': 'Job Report',
-            'created_at': datetime.datetime.now(),
-            'created_by': 'system',
-        }
-    )
-
-    order_stats, created = order_stats_model.objects.update_or_create(
-        report=report,
-        defaults={
-            'total_orders': total_orders,
-            'total_amount': total_amount,
-            'average_amount': average_amount,
-            'order_new': order_new,
-            'order_pending': order_pending,
-            'order_closed': order_closed,
-            'order_completed': order_completed,
-        }
-    )
+    return {
+        'total_orders': total_orders,
+        'total_amount': total_amount,
+        'average_amount': average_amount,
+        'order_new': order_new,
+        'order_pending': order_pending,
+        'order_closed': order_closed,
+        'order_completed': order_completed,
+    }
 
 
-def calculate_user_stats(quarter_from, year_from, quarter_to, year_to):
+def calculate_user_stats(quarter_from, year_from, quarter_to, year_to, report=None):
     """Calculate statistics for User model for a given period."""
     start_date_from, end_date_from = get_quarter_dates(quarter_from, year_from)
     start_date_to, end_date_to = get_quarter_dates(quarter_to, year_to)
@@ -253,50 +279,220 @@ def calculate_user_stats(quarter_from, year_from, quarter_to, year_to):
     start_date = min(start_date_from, start_date_to)
     end_date = max(end_date_from, end_date_to)
 
-    all_users = user_model.objects.filter(
-        date_joined__gte=start_date,
-        date_joined__lte=end_date
+    if report is None:
+        report, created = report_model.objects.get_or_create(
+            quarter_from=quarter_from,
+            year_from=year_from,
+            quarter_to=quarter_to,
+            year_to=year_to,
+            defaults={
+                'title': 'Job Report',
+                'created_at': datetime.datetime.now(),
+                'created_by': 'system',
+            }
+        )
+
+    user_stats, created = user_stats_model.objects.update_or_create(
+        report=report,
+        defaults=get_user_stats(start_date, end_date),
     )
+
+
+def get_user_stats(start_date, end_date):
+    """User statistics of the given period."""
+    all_users = get_users_joined(start_date, end_date)
     user_count = all_users.count()
     customer_count = all_users.filter(role="customer").count()
     account_manager_count = all_users.filter(role="account_manager").count()
     service_provider_count = all_users.filter(role="service_provider").count()
 
-    order_first_state_subquery = order_states_model.objects.filter(
-        order=OuterRef('pk')
-    ).order_by('state_date').values('state_date')[:1]
-
-    order_created_during_date_range = order_model.objects.annotate(
-        creation_date=Subquery(order_first_state_subquery)
-    ).filter(
-        creation_date__gte=start_date,
-        creation_date__lte=end_date,
+    range_start, range_end = get_datetime_range(start_date, end_date)
+    order_created_during_date_range = order_model.objects.filter(
+        started_at__gte=range_start,
+        started_at__lt=range_end,
     )
 
     total_orders = order_created_during_date_range.count()
+
+    return get_user_stats_from_counts(
+        user_count, customer_count, account_manager_count, service_provider_count, total_orders,
+    )
+
+
+def get_users_joined(start_date, end_date):
+    range_start, range_end = get_datetime_range(start_date, end_date)
+    return user_model.objects.filter(
+        date_joined__gte=range_start,
+        date_joined__lt=range_end,
+    )
+
+
+def get_user_stats_from_counts(user_count, customer_count, account_manager_count, service_provider_count,
+                               total_orders):
     average_orders_per_user = total_orders / customer_count if customer_count > 0 else 0.0
     average_customers_per_account_manager = customer_count / account_manager_count if account_manager_count > 0 else 0.0
 
-    report, created = report_model.objects.get_or_create(
-        quarter_from=quarter_from,
-        year_from=year_from,
-        quarter_to=quarter_to,
-        year_to=year_to,
-        defaults={
-            'title': 'Job Report',
-            'created_at': datetime.datetime.now(),
-            'created_by': 'system',
-        }
+    return {
+        "total_users": user_count,
+        "total_customers": customer_count,
+        "total_account_managers": account_manager_count,
+        "total_service_providers": service_provider_count,
+        "average_orders_per_user": average_orders_per_user,
+        "average_customers_per_account_manager": average_customers_per_account_manager,
+    }
+
+
+def get_job_stats_by_quarter(start_date, end_date):
+    """
+    Job statistics of every service provider in every quarter of the given
+    period, read from the job rollups in a single query. Returns a dict
+    keyed by (quarter, service provider id), with only the quarters
+    a service provider has a rollup in.
+    """
+    job_stats = {}
+    rollups = (
+        job_rollup_model.objects
+        .filter(quarter__gte=start_date, quarter__lte=end_date)
+        .values('quarter', 'service_provider', 'completion_time_sketches', *JOB_ROLLUP_SUM_FIELDS)
     )
+    for row in rollups:
+        stats = job_stats[row['quarter'], row['service_provider']] = empty_job_stats()
+        set_job_stats(stats, row)
+        stats['completion_time_distribution'] = get_distributions(
+            merge_sketches([row['completion_time_sketches']])
+        )
+    return job_stats
 
-    user_stats, created = user_stats_model.objects.update_or_create(
-        report=report,
-        defaults={
-            "total_users": user_count,
-            "total_customers": customer_count,
-            "total_account_managers": account_manager_count,
-            "total_service_providers": service_provider_count,
-            "average_orders_per_user": average_orders_per_user,
-            "average_customers_per_account_manager": average_customers_per_account_manager,
-        },
+
+def get_order_stats_by_quarter(start_date, end_date):
+    """
+    Order statistics of every quarter of the given period, read from the
+    order rollups in a single query. Returns a dict keyed by quarter.
+    """
+    order_states_count = defaultdict(lambda: defaultdict(int))
+    order_states_amount = defaultdict(lambda: defaultdict(int))
+    rollups = (
+        order_rollup_model.objects
+        .filter(quarter__gte=start_date, quarter__lte=end_date)
+        .values('quarter', 'state', 'orders', 'total_amount')
+    )
+    for row in rollups:
+        order_states_count[row['quarter']][row['state']] = row['orders']
+        order_states_amount[row['quarter']][row['state']] = row['total_amount']
+    return {
+        quarter: get_order_stats_from_states(order_states_count[quarter], order_states_amount[quarter])
+        for quarter in get_quarters(start_date, end_date)
+    }
+
+
+def get_user_stats_by_quarter(start_date, end_date):
+    """
+    User statistics of every quarter of the given period, with the users
+    and the orders each counted in a single query grouped by quarter.
+    Returns a dict keyed by quarter.
+    """
+    user_counts = {
+        row['quarter']: row
+        for row in (
+            get_users_joined(start_date, end_date)
+            .annotate(quarter=TruncQuarter('date_joined', output_field=DateField()))
+            .values('quarter')
+            .annotate(
+                users=Count('id'),
+                customers=Count('id', filter=Q(role="customer")),
+                account_managers=Count('id', filter=Q(role="account_manager")),
+                service_providers=Count('id', filter=Q(role="service_provider")),
+            )
+        )
+    }
+    range_start, range_end = get_datetime_range(start_date, end_date)
+    order_counts = dict(
+        order_model.objects
+        .filter(started_at__gte=range_start, started_at__lt=range_end)
+        .annotate(quarter=TruncQuarter('started_at', output_field=DateField()))
+        .values('quarter')
+        .annotate(orders=Count('id'))
+        .values_list('quarter', 'orders')
+    )
+
+    user_stats = {}
+    for quarter in get_quarters(start_date, end_date):
+        counts = user_counts.get(quarter, {})
+        user_stats[quarter] = get_user_stats_from_counts(
+            counts.get('users', 0),
+            counts.get('customers', 0),
+            counts.get('account_managers', 0),
+            counts.get('service_providers', 0),
+            order_counts.get(quarter, 0),
+        )
+    return user_stats
+
+
+def calculate_quarter_stats(quarter_from, year_from, quarter_to, year_to, report):
+    """Calculate the per-quarter breakdown of the statistics of a report."""
+    start_date, end_date = get_period_dates(quarter_from, year_from, quarter_to, year_to)
+    save_quarter_stats(
+        report,
+        get_job_stats_by_quarter(start_date, end_date),
+        get_order_stats_by_quarter(start_date, end_date),
+        get_user_stats_by_quarter(start_date, end_date),
     )
+
+
+def save_quarter_stats(report, job_stats, order_stats, user_stats):
+    """Replace the per-quarter breakdown of a report."""
+    with transaction.atomic():
+        for model in [job_quarter_stats_model, order_quarter_stats_model, user_quarter_stats_model]:
+            model.objects.filter(report=report).delete()
+        job_quarter_stats_model.objects.bulk_create([
+            job_quarter_stats_model(report=report, quarter=quarter, service_provider_id=service_provider_id, **stats)
+            for (quarter, service_provider_id), stats in sorted(job_stats.items())
+        ])
+        order_quarter_stats_model.objects.bulk_create([
+            order_quarter_stats_model(report=report, quarter=quarter, **stats)
+            for quarter, stats in sorted(order_stats.items())
+        ])
+        user_quarter_stats_model.objects.bulk_create([
+            user_quarter_stats_model(report=report, quarter=quarter, **stats)
+            for quarter, stats in sorted(user_stats.items())
+        ])
+
+
+def get_data_watermark(quarter_from, year_from, quarter_to, year_to):
+    """
+    Describe the state of the data a report over the given period is
+    computed from, i.e. the rollups of the period, the users and the
+    service providers. Any insert, update or delete of these rows changes
+    the watermark, so that unchanged results can be reused. Users have no
+    update date, their watermark is the counts the user statistics are
+    computed from, i.e. the users of every quarter and role.
+    """
+    start_date, end_date = get_period_dates(quarter_from, year_from, quarter_to, year_to)
+
+    def watermark(queryset):
+        values = queryset.aggregate(count=Count('id'), max_id=Max('id'), max_updated_at=Max('updated_at'))
+        if values.get('max_updated_at'):
+            values['max_updated_at'] = values['max_updated_at'].isoformat()
+        return values
+
+    return {
+        'period': [quarter_from, year_from, quarter_to, year_to],
+        'job_rollups': watermark(
+            job_rollup_model.objects.filter(quarter__gte=start_date, quarter__lte=end_date)
+        ),
+        'order_rollups': watermark(
+            order_rollup_model.objects.filter(quarter__gte=start_date, quarter__lte=end_date)
+        ),
+        'orders': watermark(order_model.objects.all()),
+        'users': sorted(
+            [quarter.isoformat(), role, count]
+            for quarter, role, count in (
+                get_users_joined(start_date, end_date)
+                .annotate(quarter=TruncQuarter('date_joined', output_field=DateField()))
+                .values('quarter', 'role')
+                .annotate(count=Count('id'))
+                .values_list('quarter', 'role', 'count')
+            )
+        ),
+        'service_providers': watermark(service_provider_model.objects.all()),
+    }
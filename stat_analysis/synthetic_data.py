@@ -0,0 +1,259 @@
+"""stat_analysis.synthetic_data.py
+
+Generate a reproducible synthetic data set to measure the reports, the
+customer portal and the admin at a realistic scale.
+
+All rows are written with bulk inserts, which skip `save()` and the
+signal handlers. The user profiles, the initial states and the
+de-normalized lifecycle columns are therefore written explicitly, and
+at the end the cached relationship graph and catalogs are invalidated
+and the rollups rebuilt once.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+import datetime
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from execution.models import Job, JobState
+from order import catalog
+from order.models import Order, OrderItem, OrderState, ProductAndService
+from registrar import relationships
+from registrar.models import (
+    AccountManagerProfile,
+    AccountManagerServiceProvider,
+    CustomerAccountManager,
+    CustomerProfile,
+    ServiceProviderProfile,
+)
+from stat_analysis.rollups import rebuild_rollups
+
+
+User = get_user_model()
+
+PASSWORD = 'synthetic'
+
+
+@dataclass
+class DataVolumes:
+    account_managers: int = 10
+    service_providers: int = 20
+    customers: int = 100
+    products_per_provider: int = 5
+    orders_per_customer: int = 5
+    items_per_order: int = 3
+    jobs_per_provider: int = 50
+
+    @classmethod
+    def for_size(cls, size):
+        """Volumes scaled to the given number of customers."""
+        return cls(
+            account_managers=max(1, size // 10),
+            service_providers=max(1, size // 5),
+            customers=size,
+        )
+
+
+def random_datetime(rng, start, end):
+    return start + datetime.timedelta(seconds=rng.randrange(int((end - start).total_seconds())))
+
+
+def create_users(role, count, prefix, date_range, rng, password, batch_size):
+    start, end = date_range
+    users = User.objects.bulk_create(
+        [
+            User(
+                username=f'{prefix}_{role}_{index}',
+                email=f'{prefix}_{role}_{index}@example.com',
+                password=password,
+                role=role,
+                is_staff=role != 'customer',
+                date_joined=random_datetime(rng, start, end),
+            )
+            for index in range(count)
+        ],
+        batch_size=batch_size,
+    )
+    return users
+
+
+def generate_data(volumes, start_date, end_date, seed=0, batch_size=1000):
+    """
+    Generate users with their profiles, account manager links, products,
+    orders with items and state histories, and jobs with state histories,
+    dated between start_date and end_date. Returns the number of rows
+    created per model.
+    """
+    rng = random.Random(seed)
+    start = timezone.make_aware(datetime.datetime.combine(start_date, datetime.time.min))
+    end = timezone.make_aware(datetime.datetime.combine(end_date, datetime.time.max))
+    # usernames and emails are unique, keep them apart from earlier runs
+    prefix = f"synthetic{(User.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1}"
+    password = make_password(PASSWORD)
+
+    with transaction.atomic():
+        account_managers = AccountManagerProfile.objects.bulk_create(
+            [
+                AccountManagerProfile(user=user)
+                for user in create_users(
+                    'account_manager', volumes.account_managers, prefix, (start, end), rng, password, batch_size
+                )
+            ],
+            batch_size=batch_size,
+        )
+        service_providers = ServiceProviderProfile.objects.bulk_create(
+            [
+                ServiceProviderProfile(user=user)
+                for user in create_users(
+                    'service_provider', volumes.service_providers, prefix, (start, end), rng, password, batch_size
+                )
+            ],
+            batch_size=batch_size,
+        )
+        customers = CustomerProfile.objects.bulk_create(
+            [
+                CustomerProfile(user=user)
+                for user in create_users(
+                    'customer', volumes.customers, prefix, (start, end), rng, password, batch_size
+                )
+            ],
+            batch_size=batch_size,
+        )
+
+        # every service provider and customer has one or two account managers
+        provider_links = {
+            (account_manager.id, service_provider.id): (account_manager, service_provider)
+            for service_provider in service_providers
+            for account_manager in rng.sample(account_managers, min(2, len(account_managers)))
+        }
+        customer_links = {
+            (customer.id, account_manager.id): (customer, account_manager)
+            for customer in customers
+            for account_manager in rng.sample(account_managers, rng.randint(1, min(2, len(account_managers))))
+        }
+        AccountManagerServiceProvider.objects.bulk_create(
+            [
+                AccountManagerServiceProvider(account_manager=account_manager, service_provider=service_provider)
+                for account_manager, service_provider in provider_links.values()
+            ],
+            batch_size=batch_size,
+        )
+        CustomerAccountManager.objects.bulk_create(
+            [
+                CustomerAccountManager(customer=customer, account_manager=account_manager)
+                for customer, account_manager in customer_links.values()
+            ],
+            batch_size=batch_size,
+        )
+
+        products = ProductAndService.objects.bulk_create(
+            [
+                ProductAndService(
+                    type=rng.choice(ProductAndService.TYPE_CHOICES)[0],
+                    name=f'Product {service_provider.id}-{index}',
+                    price=Decimal(rng.randint(100, 100000)) / 100,
+                    service_provider=service_provider,
+                )
+                for service_provider in service_providers
+                for index in range(volumes.products_per_provider)
+            ],
+            batch_size=batch_size,
+        )
+        products_by_provider = {}
+        for product in products:
+            products_by_provider.setdefault(product.service_provider_id, []).append(product)
+        products_by_account_manager = {}
+        for account_manager, service_provider in provider_links.values():
+            products_by_account_manager.setdefault(account_manager.id, []).extend(
+                products_by_provider.get(service_provider.id, [])
+            )
+
+        orders = []
+        order_items = []
+        account_managers_by_customer = {}
+        for customer, account_manager in customer_links.values():
+            account_managers_by_customer.setdefault(customer, []).append(account_manager)
+        for customer, customer_account_managers in account_managers_by_customer.items():
+            for _ in range(volumes.orders_per_customer):
+                account_manager = rng.choice(customer_account_managers)
+                order = Order(
+                    customer=customer,
+                    account_manager=account_manager,
+                    description=f'Synthetic order of {customer.user.username}',
+                    amount=0,
+                )
+                order.created_at = random_datetime(rng, start, end)
+                available_products = products_by_account_manager.get(account_manager.id, [])
+                for product in rng.sample(available_products, min(volumes.items_per_order, len(available_products))):
+                    item = OrderItem(order=order, product=product, quantity=rng.randint(1, 10))
+                    order.amount += product.price * item.quantity
+                    order_items.append(item)
+                orders.append(order)
+        created_at = [order.created_at for order in orders]
+        orders = Order.objects.bulk_create(orders, batch_size=batch_size)
+        # `created_at` is set on insert, restore the generated dates
+        for order, order_created_at in zip(orders, created_at):
+            order.created_at = order.updated_at = order_created_at
+        Order.objects.bulk_update(orders, ['created_at', 'updated_at'], batch_size=batch_size)
+        for item in order_items:
+            item.order_id = item.order.id
+        OrderItem.objects.bulk_create(order_items, batch_size=batch_size)
+
+        order_states = []
+        for order in orders:
+            state_date = order.created_at
+            order_states.append(OrderState(order=order, state='new', state_date=state_date))
+            for state in rng.choice([[], ['pending'], ['pending', 'completed'], ['closed']]):
+                state_date = random_datetime(rng, state_date, end) if state_date < end else end
+                order_states.append(OrderState(order=order, state=state, state_date=state_date))
+        state_dates = [order_state.state_date for order_state in order_states]
+        order_states = OrderState.objects.bulk_create(order_states, batch_size=batch_size)
+        for order_state, state_date in zip(order_states, state_dates):
+            order_state.state_date = state_date
+        OrderState.objects.bulk_update(order_states, ['state_date'], batch_size=batch_size)
+
+        jobs = []
+        job_states = []
+        for service_provider in service_providers:
+            for index in range(volumes.jobs_per_provider):
+                job = Job(
+                    job_name=f'Synthetic job {service_provider.id}-{index}',
+                    job_type=rng.choice(Job.JOB_TYPE_CHOICES)[0],
+                    service_provider=service_provider,
+                )
+                state_date = random_datetime(rng, start, end)
+                job_states.append(JobState(job=job, state='created', state_date=state_date))
+                for state in rng.choice([[], ['active'], ['active', 'completed']]):
+                    state_date = random_datetime(rng, state_date, end) if state_date < end else end
+                    job_states.append(JobState(job=job, state=state, state_date=state_date))
+                if job_states[-1].state == 'completed':
+                    job.completion_time = (state_date - job_states[-3].state_date).total_seconds() / 86400
+                jobs.append(job)
+        jobs = Job.objects.bulk_create(jobs, batch_size=batch_size)
+        for job_state in job_states:
+            job_state.job_id = job_state.job.id
+        JobState.objects.bulk_create(job_states, batch_size=batch_size)
+
+        Order.objects.filter(id__in=[order.id for order in orders]).update(**Order.lifecycle_values())
+        Job.objects.filter(id__in=[job.id for job in jobs]).update(**Job.lifecycle_values())
+
+        relationships.invalidate()
+        catalog.invalidate()
+
+    rebuild_rollups(batch_size=batch_size)
+
+    return {
+        'users': len(account_managers) + len(service_providers) + len(customers),
+        'account_manager_links': len(provider_links) + len(customer_links),
+        'products': len(products),
+        'orders': len(orders),
+        'order_items': len(order_items),
+        'order_states': len(order_states),
+        'jobs': len(jobs),
+        'job_states': len(job_states),
+    }
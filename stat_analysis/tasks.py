@@ -0,0 +1,248 @@
+"""stat_analysis.tasks.py
+
+Background computation of Reports.
+
+Saving a Report only queues a ReportTask. The tasks are claimed and
+computed by a pool of local worker threads started with the
+`run_report_worker` management command, so that big reporting ranges
+do not block the admin request. A single report can further be computed
+by several processes, see `REPORT_COMPUTATION_PROCESSES` and
+`stat_analysis.parallel`, or with NumPy from the source tables, see
+`stat_analysis.vectorized`.
+
+The worker running a task beats on every progress update of its report,
+a running task without a heartbeat for `REPORT_TASK_TIMEOUT` seconds,
+e.g. because its worker was killed, is queued again on the next poll.
+"""
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from stat_analysis import vectorized
+from stat_analysis.models import Report, ReportTask, OrderQuarterResult, OrderReportResult, UserReportResult
+from stat_analysis.parallel import calculate_report_stats
+from stat_analysis.pdf import update_report_pdf
+from stat_analysis.stat_utils import (
+    calculate_job_stats,
+    calculate_order_stats,
+    calculate_quarter_stats,
+    calculate_user_stats,
+    get_data_watermark,
+)
+
+
+logger = logging.getLogger(__name__)
+
+REPORT_CALCULATORS = [
+    calculate_job_stats,
+    calculate_order_stats,
+    calculate_user_stats,
+    calculate_quarter_stats,
+]
+
+
+def has_results(report):
+    return (
+        OrderReportResult.objects.filter(report=report).exists()
+        and UserReportResult.objects.filter(report=report).exists()
+        # reports computed before the per-quarter breakdown was added
+        and OrderQuarterResult.objects.filter(report=report).exists()
+    )
+
+
+def compute_report(report):
+    """
+    Run every statistics calculation of a report and track its progress,
+    then render its PDF. The calculation is skipped when the data
+    watermark of the report did not change since its results were
+    computed, and the rendering when its results did not change.
+    """
+    # Only a running report is updated, so that a report re-saved while it
+    # is being computed stays pending for its next task.
+    running_report = Report.objects.filter(pk=report.pk, status='running')
+
+    def set_progress(progress):
+        running_report.update(progress=progress)
+        ReportTask.objects.filter(report=report, status='running').update(heartbeat_at=timezone.now())
+
+    Report.objects.filter(pk=report.pk).update(
+        status='running',
+        progress=0,
+        started_at=timezone.now(),
+        finished_at=None,
+        error=None,
+    )
+
+    # The watermark is taken before the calculation, so that data written
+    # during the calculation invalidates the results on the next run.
+    data_watermark = get_data_watermark(
+        quarter_from=report.quarter_from,
+        year_from=report.year_from,
+        quarter_to=report.quarter_to,
+        year_to=report.year_to,
+    )
+    data_watermark['backend'] = report.backend
+    if report.data_watermark == data_watermark and has_results(report):
+        logger.info("Reusing the results of report #%s", report.pk)
+        update_report_pdf(report)
+        running_report.update(
+            status='completed',
+            progress=100,
+            finished_at=timezone.now(),
+            cache_hit=True,
+        )
+        return
+
+    workers = settings.REPORT_COMPUTATION_PROCESSES
+    if report.backend == 'numpy':
+        vectorized.calculate_report_stats(
+            report,
+            on_progress=set_progress,
+        )
+    elif workers > 1:
+        calculate_report_stats(
+            report,
+            workers,
+            on_progress=set_progress,
+        )
+    else:
+        for step, calculator in enumerate(REPORT_CALCULATORS, start=1):
+            calculator(
+                quarter_from=report.quarter_from,
+                year_from=report.year_from,
+                quarter_to=report.quarter_to,
+                year_to=report.year_to,
+                report=report,
+            )
+            set_progress(100 * step // len(REPORT_CALCULATORS))
+    update_report_pdf(report)
+    running_report.update(
+        status='completed',
+        finished_at=timezone.now(),
+        data_watermark=data_watermark,
+        cache_hit=False,
+    )
+
+
+def claim_next_task(worker_name):
+    """
+    Claim the oldest pending task. The claim is a conditional UPDATE,
+    so that concurrent workers never run the same task twice.
+    """
+    while True:
+        task = ReportTask.objects.filter(status='pending').select_related('report').first()
+        if task is None:
+            return None
+        claimed = ReportTask.objects.filter(pk=task.pk, status='pending').update(
+            status='running',
+            claimed_by=worker_name,
+            claimed_at=timezone.now(),
+            heartbeat_at=timezone.now(),
+        )
+        if claimed:
+            task.claimed_by = worker_name
+            return task
+
+
+def requeue_stale_tasks():
+    """
+    Queue again the running tasks whose worker did not beat for
+    `REPORT_TASK_TIMEOUT` seconds, returns the number of tasks queued again.
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.REPORT_TASK_TIMEOUT)
+    stale_tasks = ReportTask.objects.filter(
+        Q(heartbeat_at__lt=stale_before) | Q(heartbeat_at__isnull=True, claimed_at__lt=stale_before),
+        status='running',
+    )
+    count = 0
+    for task in stale_tasks.values('pk', 'report_id', 'claimed_by', 'heartbeat_at'):
+        # conditional, so that a task beating in between is left alone
+        requeued = ReportTask.objects.filter(
+            pk=task['pk'],
+            status='running',
+            heartbeat_at=task['heartbeat_at'],
+        ).update(status='pending', claimed_by=None, claimed_at=None, heartbeat_at=None)
+        if not requeued:
+            continue
+        logger.warning("Queuing again report #%s, its worker %s stopped", task['report_id'], task['claimed_by'])
+        Report.objects.filter(pk=task['report_id'], status='running').update(
+            status='pending',
+            progress=0,
+            started_at=None,
+        )
+        count += 1
+    return count
+
+
+def run_task(task):
+    # a task queued again meanwhile is no longer this worker's
+    claimed_task = ReportTask.objects.filter(pk=task.pk, status='running', claimed_by=task.claimed_by)
+    try:
+        compute_report(task.report)
+    except Exception:
+        logger.exception("Computation of report #%s failed", task.report_id)
+        Report.objects.filter(pk=task.report_id, status='running').update(
+            status='failed',
+            finished_at=timezone.now(),
+            error=traceback.format_exc(),
+        )
+        claimed_task.update(status='failed')
+    else:
+        claimed_task.update(status='done')
+
+
+def run_pending_tasks(worker_name=None):
+    """Run queued tasks until the queue is empty, returns the number of tasks run."""
+    worker_name = worker_name or f"{socket.gethostname()}:{os.getpid()}"
+    requeue_stale_tasks()
+    count = 0
+    while (task := claim_next_task(worker_name)) is not None:
+        run_task(task)
+        count += 1
+    return count
+
+
+def run_worker(workers=1, poll_interval=5.0, once=False, stop_event=None):
+    """
+    Run a pool of worker threads processing the report queue.
+    With `once`, the workers exit as soon as the queue is empty.
+    """
+    stop_event = stop_event or threading.Event()
+
+    def work(worker_name):
+        try:
+            while not stop_event.is_set():
+                run_pending_tasks(worker_name)
+                if once:
+                    break
+                stop_event.wait(poll_interval)
+        finally:
+            # Every thread has its own database connection
+            connection.close()
+
+    threads = [
+        threading.Thread(
+            target=work,
+            args=(f"{socket.gethostname()}:{os.getpid()}:{index}",),
+            daemon=True,
+        )
+        for index in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=1)
+    except KeyboardInterrupt:
+        stop_event.set()
+        for thread in threads:
+            thread.join()
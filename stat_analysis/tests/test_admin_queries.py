@@ -0,0 +1,156 @@
+"""
+Query budget tests of the admin.
+
+The changelist of every registered ModelAdmin is rendered with a small
+data set and with one ten times larger, and must take the same number of
+queries, i.e. the relations it displays must be loaded with the rows.
+"""
+import datetime
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from registrar.models import ServiceProviderProfile
+from stat_analysis.models import (
+    JobQuarterResult,
+    JobReportResult,
+    OrderQuarterResult,
+    OrderReportResult,
+    Report,
+    UserQuarterResult,
+    UserReportResult,
+)
+from stat_analysis.synthetic_data import DataVolumes, generate_data
+
+
+User = get_user_model()
+
+
+class AdminQueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        self.user_admin = User.objects.create_superuser(
+            username='admin_1',
+            email="admin_1@tue.nl",
+            password="password123",
+        )
+
+    def add_rows(self, scale, seed):
+        """Add rows to every model registered in the admin, about `scale` times a small data set."""
+        generate_data(
+            DataVolumes(
+                account_managers=scale,
+                service_providers=scale,
+                customers=2 * scale,
+                products_per_provider=2,
+                orders_per_customer=2,
+                items_per_order=2,
+                jobs_per_provider=2,
+            ),
+            datetime.date(2024, 1, 1),
+            datetime.date(2024, 12, 31),
+            seed=seed,
+        )
+        # a result of every new service provider, so that the choices of
+        # the service provider filter grow with the rows too
+        for service_provider in ServiceProviderProfile.objects.order_by('-id')[:scale]:
+            index = Group.objects.count()
+            Group.objects.create(name=f'Group {index}')
+            # creating a report also queues its task
+            report = Report.objects.create(
+                title=f'Report {index}',
+                created_by=self.user_admin,
+                quarter_from='Q1',
+                year_from=2024,
+                quarter_to='Q4',
+                year_to=2024,
+            )
+            JobReportResult.objects.create(report=report, service_provider=service_provider, total_jobs=1)
+            OrderReportResult.objects.create(
+                report=report,
+                total_orders=1,
+                total_amount=1,
+                average_amount=1,
+                order_new=1,
+                order_pending=0,
+                order_completed=0,
+                order_closed=0,
+            )
+            UserReportResult.objects.create(
+                report=report,
+                total_users=1,
+                total_customers=1,
+                total_account_managers=0,
+                total_service_providers=0,
+                average_orders_per_user=1,
+                average_customers_per_account_manager=1,
+            )
+            quarter = datetime.date(2024, 1, 1)
+            JobQuarterResult.objects.create(
+                report=report, quarter=quarter, service_provider=service_provider, total_jobs=1,
+            )
+            OrderQuarterResult.objects.create(
+                report=report,
+                quarter=quarter,
+                total_orders=1,
+                total_amount=1,
+                average_amount=1,
+                order_new=1,
+                order_pending=0,
+                order_completed=0,
+                order_closed=0,
+            )
+            UserQuarterResult.objects.create(
+                report=report,
+                quarter=quarter,
+                total_users=1,
+                total_customers=1,
+                total_account_managers=0,
+                total_service_providers=0,
+                average_orders_per_user=1,
+                average_customers_per_account_manager=1,
+            )
+
+    def get_changelist_queries(self):
+        """Number of queries of the changelist of every registered model."""
+        queries = {}
+        for model in admin.site._registry:
+            url = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertTrue(response.context['cl'].result_list, url)
+            queries[model._meta.label] = len(captured)
+        return queries
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.client.force_login(self.user_admin)
+        self.add_rows(1, seed=0)
+        queries = self.get_changelist_queries()
+
+        self.add_rows(9, seed=1)
+        more_queries = self.get_changelist_queries()
+        for label, count in queries.items():
+            with self.subTest(model=label):
+                self.assertEqual(more_queries[label], count)
+
+    def test_service_provider_filter(self):
+        self.client.force_login(self.user_admin)
+        self.add_rows(3, seed=0)
+        service_provider = JobReportResult.objects.first().service_provider
+        url = reverse('admin:stat_analysis_jobreportresult_changelist')
+
+        response = self.client.get(url)
+        self.assertContains(response, f'?service_provider={service_provider.pk}')
+        self.assertContains(response, service_provider.user.email)
+
+        response = self.client.get(url, {'service_provider': service_provider.pk})
+        result_list = response.context['cl'].result_list
+        self.assertTrue(result_list)
+        self.assertEqual({result.service_provider for result in result_list}, {service_provider})
@@ -0,0 +1,87 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase
+
+from execution.models import Job, JobState
+from order import catalog
+from order.models import Order, OrderItem, OrderState
+from registrar import relationships
+from registrar.models import CustomerProfile
+from stat_analysis.benchmarks import run_benchmarks
+from stat_analysis.models import JobQuarterRollup, OrderQuarterRollup
+from stat_analysis.synthetic_data import DataVolumes, generate_data
+
+
+User = get_user_model()
+
+
+class SyntheticDataTests(TestCase):
+
+    def generate(self, seed=0):
+        return generate_data(
+            DataVolumes.for_size(10),
+            datetime.date(2024, 1, 1),
+            datetime.date(2024, 12, 31),
+            seed=seed,
+        )
+
+    def test_generate_data(self):
+        rows = self.generate()
+
+        self.assertEqual(rows['users'], User.objects.count())
+        self.assertEqual(CustomerProfile.objects.count(), 10)
+        self.assertEqual(rows['orders'], Order.objects.count())
+        self.assertEqual(rows['order_items'], OrderItem.objects.count())
+        self.assertEqual(rows['order_states'], OrderState.objects.count())
+        self.assertEqual(rows['jobs'], Job.objects.count())
+        self.assertEqual(rows['job_states'], JobState.objects.count())
+
+        # state histories are backdated into the requested period
+        self.assertFalse(OrderState.objects.exclude(state_date__year=2024).exists())
+        self.assertFalse(Order.objects.exclude(created_at__year=2024).exists())
+        # de-normalized columns and rollups are filled
+        self.assertFalse(Order.objects.filter(current_state__isnull=True).exists())
+        self.assertFalse(Job.objects.filter(started_at__isnull=True).exists())
+        self.assertFalse(
+            Job.objects.filter(current_state='completed', completion_time__isnull=True).exists()
+        )
+        self.assertTrue(JobQuarterRollup.objects.exists())
+        self.assertTrue(OrderQuarterRollup.objects.exists())
+
+    def test_generate_data_invalidates_caches(self):
+        """The bulk inserts skip the signal handlers, the cached graph and catalogs are invalidated explicitly."""
+        versions = relationships.get_version(), catalog.get_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.generate()
+        self.assertNotEqual(relationships.get_version(), versions[0])
+        self.assertNotEqual(catalog.get_version(), versions[1])
+
+    def test_generate_data_is_reproducible(self):
+        first = self.generate(seed=1)
+        first_amounts = list(Order.objects.order_by('id').values_list('amount', flat=True))
+        second = self.generate(seed=1)
+
+        self.assertEqual(first, second)
+        self.assertEqual(
+            list(Order.objects.order_by('id').values_list('amount', flat=True)[len(first_amounts):]),
+            first_amounts,
+        )
+
+
+class BenchmarkTests(TransactionTestCase):
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks([5], repeat=1)
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['size'], 5)
+        self.assertIn('calculate_job_stats', results[0]['benchmarks'])
+        self.assertIn('admin_order_changelist', results[0]['benchmarks'])
+        for timing in results[0]['benchmarks'].values():
+            self.assertGreaterEqual(timing['median'], 0)
+            self.assertGreater(timing['queries'], 0)
+            self.assertGreater(timing['peak_memory'], 0)
+        self.assertIn('calculate_report_stats_rollups', results[0]['benchmarks'])
+        # the database is flushed after every size
+        self.assertFalse(Order.objects.exists())
@@ -0,0 +1,136 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from order.models import Order
+from registrar.models import AccountManagerProfile, CustomerAccountManager, CustomerProfile
+from stat_analysis import exports
+from stat_analysis.models import OrderReportResult, Report
+
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        self.user_admin = User.objects.create_superuser(
+            username='admin_1',
+            email="admin_1@tue.nl",
+            password="password123",
+        )
+        self.user_account_manager = User.objects.create_user(
+            username='account_manager_1',
+            email="account_manager_1@tue.nl",
+            password="password123",
+            role='account_manager',
+            is_staff=True,
+        )
+        other_user_account_manager = User.objects.create_user(
+            username='account_manager_2',
+            email="account_manager_2@tue.nl",
+            password="password123",
+            role='account_manager',
+            is_staff=True,
+        )
+        self.user_customer = User.objects.create_user(
+            username='customer_1',
+            email="customer_1@tue.nl",
+            password="password123",
+            role='customer',
+        )
+        other_user_customer = User.objects.create_user(
+            username='customer_2',
+            email="customer_2@tue.nl",
+            password="password123",
+            role='customer',
+        )
+        for user_customer, user_account_manager in [
+            (self.user_customer, self.user_account_manager),
+            (other_user_customer, other_user_account_manager),
+        ]:
+            customer = CustomerProfile.objects.get(user=user_customer)
+            account_manager = AccountManagerProfile.objects.get(user=user_account_manager)
+            CustomerAccountManager.objects.create(customer=customer, account_manager=account_manager)
+            for index in range(3):
+                Order.objects.create(
+                    customer=customer,
+                    account_manager=account_manager,
+                    description=f"Order, {index}",
+                )
+        self.customer = CustomerProfile.objects.get(user=self.user_customer)
+
+    def get_export(self, name, file_format, **params):
+        response = self.client.get(
+            reverse('export', kwargs={'name': name, 'file_format': file_format}),
+            params,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        self.client.force_login(self.user_admin)
+        rows = list(csv.DictReader(io.StringIO(self.get_export('orders', 'csv'))))
+        self.assertEqual(
+            [int(row['id']) for row in rows],
+            list(Order.objects.order_by('id').values_list('id', flat=True)),
+        )
+        self.assertEqual(rows[0]['description'], "Order, 0")
+        self.assertEqual(rows[0]['current_state'], 'new')
+
+    def test_jsonl_export_in_chunks(self):
+        self.client.force_login(self.user_admin)
+        with mock.patch.object(exports, 'CHUNK_SIZE', 2):
+            content = self.get_export('order_states', 'jsonl')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(set(rows[0]), {'id', 'order', 'state', 'state_date'})
+
+    def test_export_scoped_like_admin(self):
+        self.client.force_login(self.user_account_manager)
+        rows = list(csv.DictReader(io.StringIO(self.get_export('orders', 'csv'))))
+        self.assertEqual(
+            {int(row['id']) for row in rows},
+            set(self.customer.orders.values_list('id', flat=True)),
+        )
+
+        # results over all customers are only exported to admins
+        report = Report.objects.create(
+            title="Q4 2024", quarter_from='Q4', year_from=2024, quarter_to='Q4', year_to=2024,
+        )
+        OrderReportResult.objects.create(
+            report=report, total_orders=6, total_amount=0, average_amount=0,
+            order_new=6, order_pending=0, order_completed=0, order_closed=0,
+        )
+        self.assertEqual(self.get_export('order_report_results', 'jsonl', report=report.id), '')
+        self.client.force_login(self.user_admin)
+        self.assertEqual(
+            json.loads(self.get_export('order_report_results', 'jsonl', report=report.id))['total_orders'],
+            6,
+        )
+
+    def test_export_not_for_customers(self):
+        self.client.force_login(self.user_customer)
+        response = self.client.get(reverse('export', kwargs={'name': 'orders', 'file_format': 'csv'}))
+        self.assertEqual(response.status_code, 302)
+
+    def test_export_data_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'orders.jsonl')
+            call_command('export_data', 'orders', path, format='jsonl', user='account_manager_1', stdout=io.StringIO())
+            with open(path, encoding='utf-8') as file:
+                rows = [json.loads(line) for line in file]
+        self.assertEqual(
+            {row['id'] for row in rows},
+            set(self.customer.orders.values_list('id', flat=True)),
+        )
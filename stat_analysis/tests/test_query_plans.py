@@ -0,0 +1,172 @@
+"""
+Query plan regression tests.
+
+The hot queries of the reports, the customer portal and the admin
+permission mixins are run through `EXPLAIN QUERY PLAN`, and fail if
+SQLite has to scan a whole table instead of searching an index.
+"""
+import datetime
+import re
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from execution.models import Job
+from order.models import Order, OrderItem, ProductAndService
+from registrar.models import (
+    AccountManagerProfile,
+    AccountManagerServiceProvider,
+    CustomerAccountManager,
+    CustomerProfile,
+    ServiceProviderProfile,
+)
+from stat_analysis import rollups, stat_utils
+
+
+User = get_user_model()
+
+
+class QueryPlanTestCase(TestCase):
+
+    def get_query_plan(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def get_table_scans(self, plan):
+        """Steps of a query plan scanning a table, rather than a subquery or CTE."""
+        subqueries = {
+            match.group(1)
+            for step in plan
+            for match in [re.match(r'(?:CO-ROUTINE|MATERIALIZE) (\S+)', step)]
+            if match
+        }
+        return [
+            step for step in plan
+            if step.startswith('SCAN ')
+            and not step.startswith('SCAN (')
+            and step.split()[1] not in subqueries
+        ]
+
+    def assertNoTableScan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        plan = self.get_query_plan(sql, params)
+        self.assertEqual(self.get_table_scans(plan), [], f'{sql}\n' + '\n'.join(plan))
+
+    def assertNoTableScanInQueries(self, queries):
+        """Check every SELECT captured with `CaptureQueriesContext`."""
+        self.assertTrue(queries)
+        for query in queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            plan = self.get_query_plan(query['sql'])
+            self.assertEqual(self.get_table_scans(plan), [], f"{query['sql']}\n" + '\n'.join(plan))
+
+
+class QueryPlanTests(QueryPlanTestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        self.user_service_provider = User.objects.create_user(
+            username='service_provider_1',
+            email="service_1@tue.nl",
+            password="password123",
+            role='service_provider',
+            is_staff=True,
+        )
+        self.user_customer = User.objects.create_user(
+            username='customer_1',
+            email="customer_1@tue.nl",
+            password="password123",
+            role='customer',
+        )
+        self.user_account_manager = User.objects.create_user(
+            username='account_manager_1',
+            email="account_manager_1@tue.nl",
+            password="password123",
+            role='account_manager',
+            is_staff=True,
+        )
+        self.service_provider = ServiceProviderProfile.objects.get(user=self.user_service_provider)
+        self.customer = CustomerProfile.objects.get(user=self.user_customer)
+        self.account_manager = AccountManagerProfile.objects.get(user=self.user_account_manager)
+        CustomerAccountManager.objects.create(
+            customer=self.customer,
+            account_manager=self.account_manager,
+        )
+        AccountManagerServiceProvider.objects.create(
+            account_manager=self.account_manager,
+            service_provider=self.service_provider,
+        )
+        self.product = ProductAndService.objects.create(
+            name="Product 1",
+            price=10,
+            service_provider=self.service_provider,
+        )
+        self.order = Order.objects.create(
+            customer=self.customer,
+            account_manager=self.account_manager,
+            description="Order 1 description",
+        )
+        OrderItem.objects.create(order=self.order, product=self.product, quantity=2)
+        self.job = Job.objects.create(
+            job_name="Job 1",
+            job_type="regular",
+            service_provider=self.service_provider,
+        )
+
+        self.start_date = datetime.date(2024, 1, 1)
+        self.end_date = datetime.date(2024, 12, 31)
+
+    def test_job_states_as_of(self):
+        range_start, range_end = stat_utils.get_datetime_range(self.start_date, self.end_date)
+        latest_states = stat_utils.job_states_model.objects.filter(
+            job__service_provider=self.service_provider,
+            state_date__lt=range_end,
+        ).as_of(range_end, since=range_start)
+        self.assertNoTableScan(latest_states)
+
+    def test_order_states_as_of(self):
+        range_start, range_end = stat_utils.get_datetime_range(self.start_date, self.end_date)
+        latest_states = stat_utils.order_states_model.objects.filter(
+            state_date__lt=range_end,
+        ).as_of(range_end, since=range_start)
+        self.assertNoTableScan(latest_states)
+
+    def test_report_stats(self):
+        with CaptureQueriesContext(connection) as queries:
+            stat_utils.get_job_stats_by_provider(self.start_date, self.end_date)
+            stat_utils.get_order_stats(self.start_date, self.end_date)
+            stat_utils.get_user_stats(self.start_date, self.end_date)
+        self.assertNoTableScanInQueries(queries)
+
+    def test_refresh_job_rollups(self):
+        quarter = rollups.get_quarter(self.job.started_at)
+        with CaptureQueriesContext(connection) as queries:
+            rollups.refresh_job_rollups(self.service_provider.id, [quarter])
+        self.assertNoTableScanInQueries(queries)
+
+    def test_customer_portal_views(self):
+        self.client.force_login(self.user_customer)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('customer_order_list'))
+            self.client.get(reverse('customer_order_detail', kwargs={'order_id': self.order.id}))
+            self.client.get(
+                reverse('customer_order_available_items_to_add', kwargs={'order_id': self.order.id})
+            )
+        self.assertNoTableScanInQueries(queries)
+
+    def test_admin_permission_mixins(self):
+        request = RequestFactory().get('/admin/')
+        request.user = self.user_account_manager
+        for model in [Order, OrderItem, ProductAndService, User]:
+            with self.subTest(model=model.__name__):
+                model_admin = admin.site._registry[model]
+                self.assertNoTableScan(model_admin.get_queryset(request))
+
+        request.user = self.user_service_provider
+        self.assertNoTableScan(admin.site._registry[ProductAndService].get_queryset(request))
@@ -0,0 +1,321 @@
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from execution.ingest import import_jobs
+from execution.models import Job
+from order.models import Order
+from registrar.models import (
+    AccountManagerProfile,
+    CustomerAccountManager,
+    CustomerProfile,
+    ServiceProviderProfile,
+)
+from stat_analysis import rollups, stat_utils
+from stat_analysis.models import JobQuarterRollup, OrderQuarterRollup, Report, OrderReportResult
+from stat_analysis.sketch import CompletionTimeSketch
+
+
+User = get_user_model()
+
+
+def aware(*args):
+    return timezone.make_aware(datetime.datetime(*args))
+
+
+class RollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        user_service_provider = User.objects.create_user(
+            username='service_provider_1',
+            email="service_1@tue.nl",
+            password="password123",
+            role='service_provider',
+        )
+        user_customer = User.objects.create_user(
+            username='customer_1',
+            email="customer_1@tue.nl",
+            password="password123",
+            role='customer',
+        )
+        user_account_manager = User.objects.create_user(
+            username='account_manager_1',
+            email="account_manager_1@tue.nl",
+            password="password123",
+            role='account_manager',
+        )
+        self.service_provider = ServiceProviderProfile.objects.get(user=user_service_provider)
+        self.customer = CustomerProfile.objects.get(user=user_customer)
+        self.account_manager = AccountManagerProfile.objects.get(user=user_account_manager)
+        CustomerAccountManager.objects.create(
+            customer=self.customer,
+            account_manager=self.account_manager,
+        )
+
+    def snapshot(self):
+        job_rollups = {
+            (rollup.quarter, rollup.service_provider_id): tuple(
+                getattr(rollup, field) for field in rollups.JOB_ROLLUP_FIELDS
+            )
+            for rollup in JobQuarterRollup.objects.all()
+            if any(getattr(rollup, field) for field in rollups.JOB_ROLLUP_FIELDS)
+        }
+        order_rollups = {
+            (rollup.quarter, rollup.state): (rollup.orders, rollup.total_amount)
+            for rollup in OrderQuarterRollup.objects.all()
+            if rollup.orders or rollup.total_amount
+        }
+        return job_rollups, order_rollups
+
+    def assertRollupsMatchRebuild(self):
+        incremental = self.snapshot()
+        rollups.rebuild_rollups()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_job_rollups(self):
+        job = Job.objects.create(
+            job_name="Job 1",
+            job_type="regular",
+            service_provider=self.service_provider,
+            completion_time=40,
+        )
+        job.job_states.all().delete()
+        job.job_states.create(state_date=aware(2024, 9, 26), state='created')
+        completed = job.job_states.create(state_date=aware(2024, 12, 26), state='completed')
+
+        rollup = JobQuarterRollup.objects.get(quarter=datetime.date(2024, 10, 1))
+        self.assertEqual(rollup.completed_regular, 1)
+        self.assertEqual(rollup.completion_time_regular, 40)
+        self.assertEqual(rollup.jobs_completed, 1)
+        self.assertEqual(JobQuarterRollup.objects.get(quarter=datetime.date(2024, 7, 1)).jobs_started, 1)
+        self.assertRollupsMatchRebuild()
+
+        # moving the completion to another quarter moves the completion time
+        completed.state_date = aware(2025, 1, 5)
+        completed.save()
+        self.assertEqual(JobQuarterRollup.objects.get(quarter=datetime.date(2024, 10, 1)).completed_regular, 0)
+        self.assertEqual(JobQuarterRollup.objects.get(quarter=datetime.date(2025, 1, 1)).completed_regular, 1)
+        self.assertRollupsMatchRebuild()
+
+        job.completion_time = 20
+        job.save()
+        self.assertEqual(JobQuarterRollup.objects.get(quarter=datetime.date(2025, 1, 1)).completion_time_regular, 20)
+        self.assertRollupsMatchRebuild()
+
+        job.delete()
+        self.assertEqual(self.snapshot(), ({}, {}))
+
+    def test_completion_time_distribution(self):
+        # ten jobs completed in each of two quarters
+        for index in range(20):
+            quarter_start = aware(2024, 7, 1) if index < 10 else aware(2024, 10, 1)
+            job = Job.objects.create(
+                job_name=f"Job {index}",
+                job_type="regular",
+                service_provider=self.service_provider,
+                completion_time=index + 1,
+            )
+            job.job_states.all().delete()
+            job.job_states.create(state_date=quarter_start, state='created')
+            job.job_states.create(state_date=quarter_start + datetime.timedelta(days=30), state='completed')
+
+        rollup = JobQuarterRollup.objects.get(quarter=datetime.date(2024, 7, 1))
+        self.assertEqual(rollup.completion_time_sketches['regular']['count'], 10)
+        self.assertRollupsMatchRebuild()
+
+        # the report merges the sketches of its quarters
+        job_stats = stat_utils.get_job_stats_by_provider(datetime.date(2024, 7, 1), datetime.date(2024, 12, 31))
+        distribution = job_stats[self.service_provider.id]['completion_time_distribution']['regular']
+        self.assertEqual(distribution['count'], 20)
+        self.assertEqual(distribution['mean'], 10.5)
+        self.assertAlmostEqual(distribution['p50'], 10, delta=0.1)
+        self.assertAlmostEqual(distribution['p90'], 18, delta=0.2)
+        self.assertAlmostEqual(distribution['p99'], 19, delta=0.2)
+        self.assertEqual(sum(distribution['histogram']), 20)
+
+        quarter_stats = stat_utils.get_job_stats_by_quarter(datetime.date(2024, 7, 1), datetime.date(2024, 12, 31))
+        distribution = quarter_stats[(datetime.date(2024, 7, 1), self.service_provider.id)][
+            'completion_time_distribution'
+        ]['regular']
+        self.assertAlmostEqual(distribution['p99'], 9, delta=0.1)
+
+    def test_job_write_moves_its_completion_time(self):
+        """Writing a job updates the sketches with its completion time only, not those of the whole bucket."""
+        jobs = []
+        for completion_time in [5, 10, 15, 20, 25]:
+            job = Job.objects.create(
+                job_name=f"Job {completion_time}",
+                job_type="regular",
+                service_provider=self.service_provider,
+                completion_time=completion_time,
+            )
+            job.job_states.all().delete()
+            job.job_states.create(state_date=aware(2024, 10, 1), state='created')
+            job.job_states.create(state_date=aware(2024, 11, 1), state='completed')
+            jobs.append(job)
+
+        job = jobs[2]
+        with mock.patch.object(CompletionTimeSketch, 'add', autospec=True, side_effect=CompletionTimeSketch.add) as add:
+            job.job_states.create(state_date=aware(2025, 1, 3), state='completed')
+            job.completion_time = 12
+            job.save()
+        self.assertEqual(add.call_count, 2)
+
+        rollup = JobQuarterRollup.objects.get(quarter=datetime.date(2024, 10, 1))
+        self.assertEqual(rollup.completed_regular, 4)
+        self.assertEqual(rollup.completion_time_sketches['regular']['count'], 4)
+        self.assertEqual(
+            JobQuarterRollup.objects.get(quarter=datetime.date(2025, 1, 1)).completion_time_sketches['regular']['total'],
+            12,
+        )
+        self.assertRollupsMatchRebuild()
+
+        # removing the largest completion time of a bucket narrows its max
+        jobs[4].completion_time = 8
+        jobs[4].save()
+        rollup = JobQuarterRollup.objects.get(quarter=datetime.date(2024, 10, 1))
+        self.assertEqual(rollup.completion_time_sketches['regular']['max'], 20)
+        self.assertRollupsMatchRebuild()
+
+    def test_reassigned_job_rollups(self):
+        """Reassigning a job moves its states in every quarter to the new service provider."""
+        other_service_provider = ServiceProviderProfile.objects.get(user=User.objects.create_user(
+            username='service_provider_2',
+            email="service_2@tue.nl",
+            password="password123",
+            role='service_provider',
+        ))
+        job = Job.objects.create(
+            job_name="Job 1",
+            job_type="regular",
+            service_provider=self.service_provider,
+            completion_time=40,
+        )
+        job.job_states.all().delete()
+        job.job_states.create(state_date=aware(2024, 7, 10), state='created')
+        job.job_states.create(state_date=aware(2024, 10, 10), state='active')
+        job.job_states.create(state_date=aware(2025, 1, 10), state='completed')
+        self.assertRollupsMatchRebuild()
+
+        job.service_provider = other_service_provider
+        job.save()
+        rollup = JobQuarterRollup.objects.get(quarter=datetime.date(2024, 10, 1), service_provider=self.service_provider)
+        self.assertEqual(rollup.jobs_active, 0)
+        rollup = JobQuarterRollup.objects.get(quarter=datetime.date(2024, 10, 1), service_provider=other_service_provider)
+        self.assertEqual(rollup.jobs_active, 1)
+        self.assertRollupsMatchRebuild()
+
+    def test_bulk_imported_job_rollups(self):
+        import_jobs([
+            {
+                'job_name': "Job 1",
+                'job_type': 'regular',
+                'service_provider': self.service_provider.id,
+                'completion_time': 40,
+                'states': [
+                    {'state': 'created', 'state_date': '2024-09-26'},
+                    {'state': 'completed', 'state_date': '2024-12-26'},
+                ],
+            },
+            {
+                'job_name': "Job 2",
+                'job_type': 'wafer_run',
+                'service_provider': self.service_provider.id,
+                'states': [{'state': 'active', 'state_date': '2024-11-02'}],
+            },
+        ])
+
+        rollup = JobQuarterRollup.objects.get(quarter=datetime.date(2024, 10, 1))
+        self.assertEqual(rollup.completed_regular, 1)
+        self.assertEqual(rollup.jobs_started, 1)
+        self.assertEqual(rollup.jobs_active, 1)
+        self.assertRollupsMatchRebuild()
+
+    def test_order_rollups(self):
+        order = Order.objects.create(
+            customer=self.customer,
+            account_manager=self.account_manager,
+            amount=100,
+        )
+        pending = order.order_states.create(state='pending')
+        self.assertRollupsMatchRebuild()
+
+        order.amount = 250
+        order.save()
+        self.assertRollupsMatchRebuild()
+
+        pending.delete()
+        self.assertRollupsMatchRebuild()
+
+        quarter = rollups.get_quarter(order.starting_date)
+        rollup = OrderQuarterRollup.objects.get(quarter=quarter, state='new')
+        self.assertEqual(rollup.orders, 1)
+        self.assertEqual(rollup.total_amount, Decimal('250'))
+
+    def test_order_counted_once_per_bucket(self):
+        """As jobs, an order entering a state several times in a quarter is counted once."""
+        order = Order.objects.create(
+            customer=self.customer,
+            account_manager=self.account_manager,
+            amount=100,
+        )
+        order.order_states.all().delete()
+
+        def add_state(state, state_date):
+            # the state date is set on insert
+            order_state = order.order_states.create(state=state)
+            order_state.state_date = state_date
+            order_state.save()
+            return order_state
+
+        add_state('new', aware(2024, 10, 2))
+        first_pending = add_state('pending', aware(2024, 10, 5))
+        add_state('new', aware(2024, 10, 8))
+        second_pending = add_state('pending', aware(2024, 11, 5))
+        rollup = OrderQuarterRollup.objects.get(quarter=datetime.date(2024, 10, 1), state='pending')
+        self.assertEqual((rollup.orders, rollup.total_amount), (1, Decimal('100')))
+        self.assertRollupsMatchRebuild()
+
+        order.amount = 250
+        order.save()
+        self.assertRollupsMatchRebuild()
+
+        # moving the first of the pending states keeps the order in the bucket
+        first_pending.state_date = aware(2025, 1, 5)
+        first_pending.save()
+        self.assertEqual(OrderQuarterRollup.objects.get(quarter=datetime.date(2024, 10, 1), state='pending').orders, 1)
+        self.assertRollupsMatchRebuild()
+
+        second_pending.delete()
+        self.assertEqual(OrderQuarterRollup.objects.get(quarter=datetime.date(2024, 10, 1), state='pending').orders, 0)
+        self.assertRollupsMatchRebuild()
+
+        order.delete()
+        self.assertEqual(self.snapshot(), ({}, {}))
+
+    def test_calculate_order_stats(self):
+        Order.objects.create(customer=self.customer, account_manager=self.account_manager, amount=100)
+        Order.objects.create(customer=self.customer, account_manager=self.account_manager, amount=200)
+        today = timezone.localdate()
+        quarter = f"Q{(today.month - 1) // 3 + 1}"
+        report = Report.objects.create(
+            title="Current quarter",
+            quarter_from=quarter,
+            year_from=today.year,
+            quarter_to=quarter,
+            year_to=today.year,
+        )
+
+        stat_utils.calculate_order_stats(quarter, today.year, quarter, today.year, report=report)
+
+        result = OrderReportResult.objects.get(report=report)
+        self.assertEqual(result.total_orders, 2)
+        self.assertEqual(result.total_amount, Decimal('300'))
+        self.assertEqual(result.average_amount, Decimal('150'))
+        self.assertEqual(result.order_new, 2)
@@ -0,0 +1,72 @@
+import json
+import random
+
+from django.test import SimpleTestCase
+
+from stat_analysis.sketch import HISTOGRAM_EDGES, RELATIVE_ACCURACY, CompletionTimeSketch, merge_sketches
+
+
+class CompletionTimeSketchTests(SimpleTestCase):
+
+    def setUp(self):
+        generator = random.Random(0)
+        self.values = [generator.lognormvariate(2, 1) for _ in range(5000)]
+
+    def exact_quantile(self, values, q):
+        return sorted(values)[int(q * (len(values) - 1))]
+
+    def test_percentiles_within_relative_accuracy(self):
+        sketch = CompletionTimeSketch()
+        for value in self.values:
+            sketch.add(value)
+
+        for q in [0, 0.5, 0.9, 0.99, 1]:
+            exact = self.exact_quantile(self.values, q)
+            self.assertAlmostEqual(sketch.quantile(q), exact, delta=exact * RELATIVE_ACCURACY)
+        distribution = sketch.get_distribution()
+        self.assertEqual(distribution['count'], len(self.values))
+        self.assertAlmostEqual(distribution['mean'], sum(self.values) / len(self.values))
+        self.assertEqual(len(distribution['histogram']), len(HISTOGRAM_EDGES) + 1)
+        self.assertEqual(
+            distribution['histogram'][0],
+            sum(1 for value in self.values if value <= HISTOGRAM_EDGES[0]),
+        )
+
+    def test_merge_equals_single_sketch(self):
+        single = CompletionTimeSketch()
+        parts = [CompletionTimeSketch() for _ in range(4)]
+        for index, value in enumerate(self.values):
+            single.add(value)
+            parts[index % 4].add(value)
+
+        # as stored in the rollups
+        stored = [{'regular': json.loads(json.dumps(part.to_dict()))} for part in parts]
+        merged = merge_sketches(stored)['regular']
+        self.assertEqual(merged.bins, single.bins)
+        self.assertEqual(merged.histogram, single.histogram)
+        self.assertEqual(merged.get_distribution()['p99'], single.get_distribution()['p99'])
+
+    def test_remove(self):
+        sketch = CompletionTimeSketch()
+        kept = CompletionTimeSketch()
+        for index, value in enumerate(self.values):
+            sketch.add(value)
+            if index % 3:
+                kept.add(value)
+        for value in self.values[::3]:
+            sketch.remove(value)
+
+        self.assertEqual(sketch.count, kept.count)
+        self.assertAlmostEqual(sketch.total, kept.total)
+        self.assertEqual(sketch.bins, kept.bins)
+        self.assertEqual(sketch.histogram, kept.histogram)
+
+        for value in self.values[1::3] + self.values[2::3]:
+            sketch.remove(value)
+        self.assertEqual(sketch.to_dict(), CompletionTimeSketch().to_dict())
+
+    def test_empty_sketch(self):
+        sketch = CompletionTimeSketch()
+        self.assertIsNone(sketch.quantile(0.5))
+        self.assertEqual(sketch.merge(CompletionTimeSketch()).count, 0)
+        self.assertIsNone(sketch.get_distribution()['mean'])
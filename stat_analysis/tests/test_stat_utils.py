@@ -1,5 +1,6 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 import datetime
 
 from registrar.models import (
@@ -10,6 +11,7 @@ from registrar.models import (
     CustomerAccountManager,
 )
 from execution.models import Job
+from stat_analysis.models import Report, JobReportResult
 from stat_analysis import stat_utils
 
 
@@ -115,17 +117,17 @@ class StatUtilsTests(TestCase):
         self.job_1.job_states.all().delete()
         self.job_1.job_states.create(
             job=self.job_1,
-            state_date=datetime.datetime(2024, 10, 26),
+            state_date=timezone.make_aware(datetime.datetime(2024, 10, 26)),
             state='created',
         )
         self.job_1.job_states.create(
             job=self.job_1,
-            state_date=datetime.datetime(2024, 10, 28),
+            state_date=timezone.make_aware(datetime.datetime(2024, 10, 28)),
             state='active',
         )
         self.job_1.job_states.create(
             job=self.job_1,
-            state_date=datetime.datetime(2024, 12, 26),
+            state_date=timezone.make_aware(datetime.datetime(2024, 12, 26)),
             state='completed',
         )
 
@@ -138,17 +140,17 @@ class StatUtilsTests(TestCase):
         self.job_2.job_states.all().delete()
         self.job_2.job_states.create(
             job=self.job_2,
-            state_date=datetime.datetime(2024, 10, 26),
+            state_date=timezone.make_aware(datetime.datetime(2024, 10, 26)),
             state='created',
         )
         self.job_2.job_states.create(
             job=self.job_2,
-            state_date=datetime.datetime(2024, 10, 28),
+            state_date=timezone.make_aware(datetime.datetime(2024, 10, 28)),
             state='active',
         )
         self.job_2.job_states.create(
             job=self.job_2,
-            state_date=datetime.datetime(2024, 11, 26),
+            state_date=timezone.make_aware(datetime.datetime(2024, 11, 26)),
             state='completed',
         )
 
@@ -161,12 +163,12 @@ class StatUtilsTests(TestCase):
         self.job_3.job_states.all().delete()
         self.job_3.job_states.create(
             job=self.job_3,
-            state_date=datetime.datetime(2024, 10, 26),
+            state_date=timezone.make_aware(datetime.datetime(2024, 10, 26)),
             state='created',
         )
         self.job_3.job_states.create(
             job=self.job_3,
-            state_date=datetime.datetime(2024, 10, 26),
+            state_date=timezone.make_aware(datetime.datetime(2024, 10, 26)),
             state='active',
         )
 
@@ -179,12 +181,12 @@ class StatUtilsTests(TestCase):
         self.job_4.job_states.all().delete()
         self.job_4.job_states.create(
             job=self.job_4,
-            state_date=datetime.datetime(2024, 11, 26),
+            state_date=timezone.make_aware(datetime.datetime(2024, 11, 26)),
             state='created',
         )
         self.job_4.job_states.create(
             job=self.job_4,
-            state_date=datetime.datetime(2024, 11, 26),
+            state_date=timezone.make_aware(datetime.datetime(2024, 11, 26)),
             state='active',
         )
 
@@ -207,45 +209,61 @@ class StatUtilsTests(TestCase):
             amount=200.00,
         )
 
-    def test_get_average_completion_time(self):
-        """Test the average completion time for regular jobs."""
-        avg_completion_time_sp_1 = stat_utils.get_average_completion_time(
-            job_type='regular',
-            start_date=datetime.date(2024, 9, 1),
-            end_date=datetime.date(2024, 12, 31),
-            service_provider=self.service_provider_1,
-        )
-        self.assertAlmostEqual(avg_completion_time_sp_1, 30.0, places=2)
+    def test_calculate_job_stats(self):
+        """Test the job statistics written for every service provider."""
+        report = Report.objects.create(
+            title="Q4 2024",
+            quarter_from='Q4',
+            year_from=2024,
+            quarter_to='Q4',
+            year_to=2024,
+        )
+        stat_utils.calculate_job_stats('Q4', 2024, 'Q4', 2024, report=report)
+        results = {
+            result.service_provider_id: result
+            for result in JobReportResult.objects.filter(report=report)
+        }
+        self.assertEqual(set(results), {self.service_provider_1.id, self.service_provider_2.id})
 
-    def test_get_average_completion_time_no_jobs(self):
-        """Test the average completion time when no jobs are present in the given job type"""
-        avg_completion_time_sp_1 = stat_utils.get_average_completion_time(
-            job_type='wafer_run',
-            start_date=datetime.date(2024, 9, 1),
-            end_date=datetime.date(2024, 12, 31),
-            service_provider=self.service_provider_1,
-        )
-        self.assertEqual(avg_completion_time_sp_1, 0.0)
+        result_sp_1 = results[self.service_provider_1.id]
+        self.assertEqual(result_sp_1.total_jobs, 3)
+        self.assertAlmostEqual(result_sp_1.average_completion_time_regular, 30.0, places=2)
+        self.assertEqual(result_sp_1.average_completion_time_wafer_run, 0.0)
+        # number of jobs which entered each state in the period
+        self.assertEqual(result_sp_1.jobs_created, 3)
+        self.assertEqual(result_sp_1.jobs_active, 3)
+        self.assertEqual(result_sp_1.jobs_completed, 2)
 
-    def test_get_average_completion_time_no_completed_jobs(self):
-        """Test the average completion time when no jobs have a completion time"""
-        avg_completion_time_sp_2 = stat_utils.get_average_completion_time(
-            job_type='regular',
-            start_date=datetime.date(2024, 9, 1),
-            end_date=datetime.date(2024, 12, 31),
-            service_provider=self.service_provider_2,
-        )
-        self.assertEqual(avg_completion_time_sp_2, 0.0)
+        result_sp_2 = results[self.service_provider_2.id]
+        self.assertEqual(result_sp_2.total_jobs, 1)
+        self.assertEqual(result_sp_2.average_completion_time_regular, 0.0)
+        self.assertEqual(result_sp_2.jobs_created, 1)
+        self.assertEqual(result_sp_2.jobs_active, 1)
+        self.assertEqual(result_sp_2.jobs_completed, 0)
+
+    def test_calculate_job_stats_query_count(self):
+        """The number of queries should not grow with the number of service providers."""
+        Report.objects.create(
+            title="Q4 2024",
+            quarter_from='Q4',
+            year_from=2024,
+            quarter_to='Q4',
+            year_to=2024,
+        )
+        with self.assertNumQueries(4):
+            stat_utils.calculate_job_stats('Q4', 2024, 'Q4', 2024)
+
+        for i in range(3, 8):
+            User.objects.create_user(
+                username=f'service_provider_{i}',
+                email=f"service_{i}@tue.nl",
+                password="password123",
+                role='service_provider',
+            )
+        with self.assertNumQueries(4):
+            stat_utils.calculate_job_stats('Q4', 2024, 'Q4', 2024)
+        self.assertEqual(JobReportResult.objects.count(), 7)
 
-    def test_job_state_count(self):
-        job_state_count = stat_utils.get_job_state_count(
-            start_date=datetime.date(2024, 10, 1),
-            end_date=datetime.date(2024, 12, 31),
-            service_provider=self.service_provider_1,
-        )
-        self.assertEqual(job_state_count['created'], 0)
-        self.assertEqual(job_state_count['active'], 1)
-        self.assertEqual(job_state_count['completed'], 2)
 
 # extend the unit test cases for actual production environment.
 # not gonna spend all my time on this for now :-)
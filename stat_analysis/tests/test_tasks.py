@@ -0,0 +1,545 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from unittest import mock, skipUnless
+import datetime
+import os
+import re
+import sqlite3
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from execution.models import Job
+from order.models import Order
+from registrar.models import (
+    AccountManagerProfile,
+    CustomerAccountManager,
+    CustomerProfile,
+    ServiceProviderProfile,
+)
+from stat_analysis import parallel, pdf, stat_utils, tasks
+from stat_analysis.models import (
+    Report,
+    ReportTask,
+    JobQuarterResult,
+    JobReportResult,
+    OrderQuarterResult,
+    OrderReportResult,
+    UserQuarterResult,
+    UserReportResult,
+)
+
+
+User = get_user_model()
+
+# the report PDFs rendered by the tests
+media_root = tempfile.TemporaryDirectory()
+
+
+def tearDownModule():
+    media_root.cleanup()
+
+
+@override_settings(MEDIA_ROOT=media_root.name)
+class ReportTaskTests(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        User.objects.create_user(
+            username='service_provider_1',
+            email="service_1@tue.nl",
+            password="password123",
+            role='service_provider',
+        )
+
+    def create_report(self):
+        return Report.objects.create(
+            title="Q4 2024",
+            quarter_from='Q4',
+            year_from=2024,
+            quarter_to='Q4',
+            year_to=2024,
+        )
+
+    def test_save_queues_report(self):
+        """Saving a report only queues its computation."""
+        report = self.create_report()
+        self.assertEqual(report.status, 'pending')
+        self.assertEqual(ReportTask.objects.filter(report=report, status='pending').count(), 1)
+        self.assertFalse(JobReportResult.objects.filter(report=report).exists())
+
+        # saving again while pending does not queue a second task
+        report.title = "Q4 2024 (renamed)"
+        report.save()
+        self.assertEqual(ReportTask.objects.filter(report=report).count(), 1)
+
+    def test_run_pending_tasks(self):
+        report = self.create_report()
+
+        self.assertEqual(tasks.run_pending_tasks(), 1)
+
+        report.refresh_from_db()
+        self.assertEqual(report.status, 'completed')
+        self.assertEqual(report.progress, 100)
+        self.assertIsNotNone(report.started_at)
+        self.assertIsNotNone(report.finished_at)
+        self.assertEqual(JobReportResult.objects.filter(report=report).count(), 1)
+        self.assertTrue(OrderReportResult.objects.filter(report=report).exists())
+        self.assertTrue(UserReportResult.objects.filter(report=report).exists())
+        self.assertEqual(ReportTask.objects.get(report=report).status, 'done')
+
+    def test_reports_with_same_range(self):
+        """Each report gets its own results, even for the same range."""
+        report_1 = self.create_report()
+        report_2 = self.create_report()
+
+        self.assertEqual(tasks.run_pending_tasks(), 2)
+
+        self.assertTrue(OrderReportResult.objects.filter(report=report_1).exists())
+        self.assertTrue(OrderReportResult.objects.filter(report=report_2).exists())
+
+    def test_unchanged_report_reuses_results(self):
+        report = self.create_report()
+        tasks.run_pending_tasks()
+        report.refresh_from_db()
+        self.assertFalse(report.cache_hit)
+        self.assertIsNotNone(report.data_watermark)
+
+        report.title = "Q4 2024 (renamed)"
+        report.save()
+        with mock.patch.object(tasks, 'REPORT_CALCULATORS', []):
+            tasks.run_pending_tasks()
+
+        report.refresh_from_db()
+        self.assertEqual(report.status, 'completed')
+        self.assertTrue(report.cache_hit)
+
+    def test_changed_data_recomputes_report(self):
+        report = self.create_report()
+        tasks.run_pending_tasks()
+
+        User.objects.create_user(
+            username='service_provider_2',
+            email="service_2@tue.nl",
+            password="password123",
+            role='service_provider',
+        )
+        report.save()
+        tasks.run_pending_tasks()
+
+        report.refresh_from_db()
+        self.assertFalse(report.cache_hit)
+        self.assertEqual(JobReportResult.objects.filter(report=report).count(), 2)
+
+    def test_changed_job_in_period_recomputes_report(self):
+        report = self.create_report()
+        tasks.run_pending_tasks()
+
+        job = Job.objects.create(
+            job_name="Job 1",
+            job_type="regular",
+            service_provider=ServiceProviderProfile.objects.get(),
+        )
+        job.job_states.create(state_date=timezone.make_aware(datetime.datetime(2024, 11, 1)), state='active')
+        report.save()
+        tasks.run_pending_tasks()
+
+        report.refresh_from_db()
+        self.assertFalse(report.cache_hit)
+        self.assertEqual(JobReportResult.objects.get(report=report).jobs_active, 1)
+
+    def test_changed_user_recomputes_report(self):
+        """Users have no update date, editing their date joined or role still recomputes the report."""
+        report = self.create_report()
+        tasks.run_pending_tasks()
+        user = User.objects.get(username='service_provider_1')
+
+        User.objects.filter(pk=user.pk).update(date_joined=timezone.make_aware(datetime.datetime(2024, 11, 1)))
+        report.save()
+        tasks.run_pending_tasks()
+        report.refresh_from_db()
+        self.assertFalse(report.cache_hit)
+        self.assertEqual(UserReportResult.objects.get(report=report).total_service_providers, 1)
+
+        User.objects.filter(pk=user.pk).update(role='customer')
+        report.save()
+        tasks.run_pending_tasks()
+        report.refresh_from_db()
+        self.assertFalse(report.cache_hit)
+        self.assertEqual(UserReportResult.objects.get(report=report).total_customers, 1)
+
+    def test_failed_task(self):
+        report = self.create_report()
+
+        with mock.patch.object(tasks, 'REPORT_CALCULATORS', [mock.Mock(side_effect=RuntimeError("boom"))]), \
+                self.assertLogs('stat_analysis.tasks', level='ERROR'):
+            tasks.run_pending_tasks()
+
+        report.refresh_from_db()
+        self.assertEqual(report.status, 'failed')
+        self.assertIn("boom", report.error)
+        self.assertEqual(ReportTask.objects.get(report=report).status, 'failed')
+
+    def test_stale_task_is_requeued(self):
+        """A task left running by a killed worker is queued again once its heartbeat is too old."""
+        report = self.create_report()
+        task = tasks.claim_next_task('killed-worker')
+        Report.objects.filter(pk=report.pk).update(status='running', progress=25)
+
+        # still beating
+        self.assertEqual(tasks.requeue_stale_tasks(), 0)
+
+        ReportTask.objects.filter(pk=task.pk).update(heartbeat_at=timezone.now() - datetime.timedelta(hours=2))
+        with self.assertLogs('stat_analysis.tasks', level='WARNING'):
+            self.assertEqual(tasks.run_pending_tasks('worker'), 1)
+
+        report.refresh_from_db()
+        self.assertEqual(report.status, 'completed')
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'done')
+        self.assertEqual(task.claimed_by, 'worker')
+
+        # the killed worker coming back does not touch the task anymore
+        ReportTask.objects.filter(pk=task.pk).update(status='running', claimed_by='worker')
+        stale_task = ReportTask.objects.get(pk=task.pk)
+        stale_task.claimed_by = 'killed-worker'
+        with mock.patch.object(tasks, 'compute_report'):
+            tasks.run_task(stale_task)
+        self.assertEqual(ReportTask.objects.get(pk=task.pk).status, 'running')
+
+    def test_save_keeps_worker_fields(self):
+        """Saving a stale instance of a report does not overwrite the results of the worker."""
+        report = self.create_report()
+        tasks.run_pending_tasks()
+        computed = Report.objects.get(pk=report.pk)
+
+        report.title = "Q4 2024 (renamed)"
+        report.save()
+
+        report.refresh_from_db()
+        self.assertEqual(report.title, "Q4 2024 (renamed)")
+        self.assertEqual(report.status, 'pending')
+        self.assertEqual(report.data_watermark, computed.data_watermark)
+        self.assertEqual(report.pdf_hash, computed.pdf_hash)
+        self.assertEqual(report.pdf_report.name, computed.pdf_report.name)
+
+
+@override_settings(MEDIA_ROOT=media_root.name)
+class ReportWorkerCommandTests(TransactionTestCase):
+    """The worker threads use their own database connections."""
+
+    def test_run_report_worker_command(self):
+        report = Report.objects.create(
+            title="Q4 2024",
+            quarter_from='Q4',
+            year_from=2024,
+            quarter_to='Q4',
+            year_to=2024,
+        )
+
+        call_command('run_report_worker', once=True, stdout=mock.Mock())
+
+        report.refresh_from_db()
+        self.assertEqual(report.status, 'completed')
+
+
+@override_settings(MEDIA_ROOT=media_root.name)
+@skipUnless(connection.vendor == 'sqlite', "The process pool test copies the SQLite test database")
+class ParallelReportTests(TransactionTestCase):
+    """
+    The shards run in threads, except in `test_process_pool`, as worker
+    processes cannot open the in-memory test database.
+    """
+
+    def setUp(self):
+        for index in range(5):
+            User.objects.create_user(
+                username=f'service_provider_{index}',
+                email=f"service_{index}@tue.nl",
+                password="password123",
+                role='service_provider',
+            )
+        for index, service_provider in enumerate(ServiceProviderProfile.objects.all()):
+            job = Job.objects.create(
+                job_name=f"Job {index}",
+                job_type="regular",
+                service_provider=service_provider,
+                completion_time=10 * (index + 1),
+            )
+            job.job_states.all().delete()
+            job.job_states.create(state_date=timezone.make_aware(datetime.datetime(2024, 10, 1)), state='created')
+            job.job_states.create(state_date=timezone.make_aware(datetime.datetime(2024, 11, index + 1)), state='completed')
+
+    def results(self, report):
+        return (
+            sorted(JobReportResult.objects.filter(report=report).values_list(
+                'service_provider', 'total_jobs', 'average_completion_time_regular',
+                'jobs_created', 'jobs_active', 'jobs_completed',
+            )),
+            OrderReportResult.objects.filter(report=report).values().get() | {'id': None, 'report_id': None},
+            UserReportResult.objects.filter(report=report).values().get() | {'id': None, 'report_id': None},
+            [
+                list(model.objects.filter(report=report).order_by('id').values_list(*fields))
+                for model, fields in [
+                    (JobQuarterResult, ['quarter', 'service_provider', 'total_jobs', 'jobs_completed']),
+                    (OrderQuarterResult, ['quarter', 'total_orders', 'total_amount']),
+                    (UserQuarterResult, ['quarter', 'total_users', 'total_service_providers']),
+                ]
+            ],
+        )
+
+    def test_parallel_results_match_serial(self):
+        serial_report = Report.objects.create(
+            title="Serial", quarter_from='Q4', year_from=2024, quarter_to='Q4', year_to=2024,
+        )
+        parallel_report = Report.objects.create(
+            title="Parallel", quarter_from='Q4', year_from=2024, quarter_to='Q4', year_to=2024,
+        )
+        for calculator in tasks.REPORT_CALCULATORS:
+            calculator('Q4', 2024, 'Q4', 2024, report=serial_report)
+
+        progress = []
+        parallel.calculate_report_stats(
+            parallel_report,
+            workers=3,
+            executor=ThreadPoolExecutor(max_workers=3),
+            on_progress=progress.append,
+        )
+
+        self.assertEqual(self.results(serial_report), self.results(parallel_report))
+        self.assertEqual(JobReportResult.objects.filter(report=parallel_report).count(), 5)
+        self.assertEqual(progress[-1], 100)
+
+    def test_process_pool(self):
+        """
+        The shards run in spawned processes, on a copy of the test
+        database in a file, which the worker processes can open.
+        """
+        serial_report = Report.objects.create(
+            title="Serial", quarter_from='Q4', year_from=2024, quarter_to='Q4', year_to=2024,
+        )
+        for calculator in tasks.REPORT_CALCULATORS:
+            calculator('Q4', 2024, 'Q4', 2024, report=serial_report)
+        parallel_report = Report.objects.create(
+            title="Parallel", quarter_from='Q4', year_from=2024, quarter_to='Q4', year_to=2024,
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            database_file = os.path.join(directory, 'db.sqlite3')
+            connection.ensure_connection()
+            with sqlite3.connect(database_file) as copy:
+                connection.connection.backup(copy)
+            copy.close()
+            # only the workers read the copy, the results are saved through
+            # the in-memory connection of the test, which stays open
+            with mock.patch.dict(connection.settings_dict, {'NAME': database_file}):
+                executor = parallel.create_executor(2)
+            parallel.calculate_report_stats(parallel_report, workers=2, executor=executor)
+
+        self.assertEqual(self.results(serial_report), self.results(parallel_report))
+        self.assertEqual(JobReportResult.objects.filter(report=parallel_report).count(), 5)
+
+
+class QuarterBreakdownTests(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        user_service_provider = User.objects.create_user(
+            username='service_provider_1',
+            email="service_1@tue.nl",
+            password="password123",
+            role='service_provider',
+        )
+        user_customer = User.objects.create_user(
+            username='customer_1',
+            email="customer_1@tue.nl",
+            password="password123",
+            role='customer',
+        )
+        user_account_manager = User.objects.create_user(
+            username='account_manager_1',
+            email="account_manager_1@tue.nl",
+            password="password123",
+            role='account_manager',
+        )
+        self.service_provider = ServiceProviderProfile.objects.get(user=user_service_provider)
+        customer = CustomerProfile.objects.get(user=user_customer)
+        account_manager = AccountManagerProfile.objects.get(user=user_account_manager)
+        CustomerAccountManager.objects.create(customer=customer, account_manager=account_manager)
+        for amount in [100, 200]:
+            Order.objects.create(customer=customer, account_manager=account_manager, amount=amount)
+
+        # a job in the current and in the previous quarter
+        today = timezone.localdate()
+        self.current_quarter = datetime.date(today.year, 3 * ((today.month - 1) // 3) + 1, 1)
+        self.previous_quarter = stat_utils.get_quarters(
+            self.current_quarter - datetime.timedelta(days=1), self.current_quarter,
+        )[0]
+        for quarter, completion_time in [(self.previous_quarter, 10), (self.current_quarter, 30)]:
+            job = Job.objects.create(
+                job_name=f"Job {quarter}",
+                job_type="regular",
+                service_provider=self.service_provider,
+                completion_time=completion_time,
+            )
+            job.job_states.all().delete()
+            started = timezone.make_aware(datetime.datetime.combine(quarter, datetime.time(12)))
+            job.job_states.create(state_date=started, state='created')
+            job.job_states.create(state_date=started + datetime.timedelta(days=1), state='completed')
+
+    def create_report(self, quarter_from):
+        return Report.objects.create(
+            title="Breakdown",
+            quarter_from=f"Q{(quarter_from.month - 1) // 3 + 1}",
+            year_from=quarter_from.year,
+            quarter_to=f"Q{(self.current_quarter.month - 1) // 3 + 1}",
+            year_to=self.current_quarter.year,
+        )
+
+    def calculate(self, report):
+        for calculator in tasks.REPORT_CALCULATORS:
+            calculator(report.quarter_from, report.year_from, report.quarter_to, report.year_to, report=report)
+
+    def test_quarter_breakdown(self):
+        report = self.create_report(self.previous_quarter)
+        self.calculate(report)
+
+        job_results = JobQuarterResult.objects.filter(report=report).order_by('quarter')
+        self.assertEqual(
+            list(job_results.values_list('quarter', 'service_provider', 'total_jobs', 'jobs_completed')),
+            [
+                (self.previous_quarter, self.service_provider.id, 1, 1),
+                (self.current_quarter, self.service_provider.id, 1, 1),
+            ],
+        )
+        self.assertEqual(
+            [result.average_completion_time_regular for result in job_results],
+            [10, 30],
+        )
+        self.assertEqual(JobReportResult.objects.get(report=report).average_completion_time_regular, 20)
+
+        # every quarter has an order and a user row, which add up to the totals
+        order_results = OrderQuarterResult.objects.filter(report=report).order_by('quarter')
+        self.assertEqual(
+            list(order_results.values_list('quarter', 'total_orders', 'total_amount')),
+            [(self.previous_quarter, 0, 0), (self.current_quarter, 2, 300)],
+        )
+        self.assertEqual(order_results[1].average_amount, 150)
+        self.assertEqual(
+            sum(result.total_orders for result in order_results),
+            OrderReportResult.objects.get(report=report).total_orders,
+        )
+        user_results = UserQuarterResult.objects.filter(report=report).order_by('quarter')
+        self.assertEqual([result.quarter for result in user_results], [self.previous_quarter, self.current_quarter])
+        self.assertEqual(
+            sum(result.total_users for result in user_results),
+            UserReportResult.objects.get(report=report).total_users,
+        )
+
+        # recomputing replaces the breakdown
+        self.calculate(report)
+        self.assertEqual(OrderQuarterResult.objects.filter(report=report).count(), 2)
+
+    def test_queries_do_not_grow_with_quarters(self):
+        queries = []
+        for quarter_from in [self.current_quarter, self.current_quarter.replace(year=self.current_quarter.year - 2)]:
+            report = self.create_report(quarter_from)
+            start_date, end_date = stat_utils.get_period_dates(
+                report.quarter_from, report.year_from, report.quarter_to, report.year_to,
+            )
+            with CaptureQueriesContext(connection) as captured:
+                stat_utils.get_job_stats_by_quarter(start_date, end_date)
+                stat_utils.get_order_stats_by_quarter(start_date, end_date)
+                stat_utils.get_user_stats_by_quarter(start_date, end_date)
+            queries.append(len(captured))
+        self.assertEqual(queries, [4, 4])
+
+    def test_admin_shows_breakdown(self):
+        report = self.create_report(self.previous_quarter)
+        self.calculate(report)
+        self.client.force_login(User.objects.create_superuser(
+            username='admin_1',
+            email="admin_1@tue.nl",
+            password="password123",
+        ))
+
+        response = self.client.get(reverse('admin:stat_analysis_report_change', args=[report.id]))
+        self.assertEqual(len(response.context['inline_admin_formsets']), 2)
+        self.assertContains(response, "300")
+
+        response = self.client.get(reverse('admin:stat_analysis_jobquarterresult_changelist'))
+        self.assertEqual(len(response.context['cl'].result_list), 2)
+
+
+@override_settings(MEDIA_ROOT=media_root.name)
+class ReportPDFTests(TestCase):
+
+    @classmethod
+    def setUpTestData(self):
+        for index in range(3):
+            User.objects.create_user(
+                username=f'service_provider_{index}',
+                email=f"service_{index}@tue.nl",
+                password="password123",
+                role='service_provider',
+            )
+        self.report = Report.objects.create(
+            title="Q4 2024 (draft)",
+            quarter_from='Q4',
+            year_from=2024,
+            quarter_to='Q4',
+            year_to=2024,
+        )
+
+    def test_pdf_writer(self):
+        file = BytesIO()
+        writer = pdf.PDFWriter(file)
+        for page in range(3):
+            writer.add_page([f"Page {page}", "(parentheses) and \\ backslashes"])
+        writer.close()
+        data = file.getvalue()
+
+        self.assertTrue(data.startswith(b'%PDF-1.4'))
+        self.assertIn(b'/Count 3', data)
+        self.assertIn(b'(\\(parentheses\\) and \\\\ backslashes) Tj', data)
+        # every entry of the cross-reference table points to its object
+        xref_position = int(re.search(rb'startxref\n(\d+)', data).group(1))
+        offsets = re.findall(rb'(\d{10}) 00000 n ', data[xref_position:])
+        self.assertEqual(len(offsets), 9)
+        for object_id, offset in enumerate(offsets, start=1):
+            self.assertTrue(data[int(offset):].startswith(b'%d 0 obj' % object_id))
+
+    def test_report_pdf(self):
+        tasks.run_pending_tasks()
+        self.report.refresh_from_db()
+        self.assertTrue(self.report.pdf_report.name.startswith('reports_pdf/'))
+        with default_storage.open(self.report.pdf_report.name) as file:
+            data = file.read()
+        self.assertTrue(data.startswith(b'%PDF-1.4'))
+        self.assertIn(b'(  service_2@tue.nl: 0, 0.00 / 0.00, 0 / 0 / 0) Tj', data)
+        self.assertIn(b'(Report: Q4 2024 \\(draft\\)) Tj', data)
+
+        # an unchanged report is not rendered again
+        self.report.save()
+        with mock.patch.object(pdf, 'write_report_pdf') as write_report_pdf:
+            tasks.run_pending_tasks()
+        write_report_pdf.assert_not_called()
+        pdf_report = self.report.pdf_report.name
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.pdf_report.name, pdf_report)
+
+        # a changed one is, and replaces the previous PDF
+        self.report.title = "Q4 2024"
+        self.report.save()
+        tasks.run_pending_tasks()
+        self.report.refresh_from_db()
+        self.assertNotEqual(self.report.pdf_report.name, pdf_report)
+        self.assertTrue(default_storage.exists(self.report.pdf_report.name))
+        self.assertFalse(default_storage.exists(pdf_report))
@@ -0,0 +1,98 @@
+import datetime
+import tempfile
+import unittest
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from stat_analysis import stat_utils, tasks, vectorized
+from stat_analysis.models import JobReportResult, OrderQuarterResult, OrderReportResult, Report
+from stat_analysis.synthetic_data import DataVolumes, generate_data
+
+
+# the report PDFs rendered by the tests
+media_root = tempfile.TemporaryDirectory()
+
+
+def tearDownModule():
+    media_root.cleanup()
+
+
+def rounded(value):
+    """Floats rounded, as the backends add them up in different orders."""
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, dict):
+        return {key: rounded(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [rounded(item) for item in value]
+    return value
+
+
+@override_settings(MEDIA_ROOT=media_root.name)
+class VectorizedBackendTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        generate_data(
+            DataVolumes.for_size(20),
+            datetime.date(2024, 1, 1),
+            datetime.date(2024, 12, 31),
+            seed=0,
+        )
+        cls.start_date, cls.end_date = stat_utils.get_period_dates('Q2', 2024, 'Q4', 2024)
+
+    def create_report(self, backend):
+        return Report.objects.create(
+            title=f"Q2-Q4 2024 ({backend})",
+            quarter_from='Q2',
+            year_from=2024,
+            quarter_to='Q4',
+            year_to=2024,
+            backend=backend,
+        )
+
+    @unittest.skipIf(vectorized.np is None, "NumPy is not installed")
+    def test_job_stats_match_rollups(self):
+        job_stats = vectorized.get_job_stats_by_provider(self.start_date, self.end_date)
+        self.assertTrue(job_stats)
+        self.assertEqual(
+            rounded(dict(job_stats)),
+            rounded(dict(stat_utils.get_job_stats_by_provider(self.start_date, self.end_date))),
+        )
+
+    @unittest.skipIf(vectorized.np is None, "NumPy is not installed")
+    def test_order_stats_match_rollups(self):
+        order_stats = vectorized.get_order_stats(self.start_date, self.end_date)
+        self.assertGreater(order_stats['total_orders'], 0)
+        self.assertEqual(order_stats, stat_utils.get_order_stats(self.start_date, self.end_date))
+
+    @unittest.skipIf(vectorized.np is None, "NumPy is not installed")
+    def test_report_with_numpy_backend(self):
+        rollups_report = self.create_report('rollups')
+        numpy_report = self.create_report('numpy')
+        self.assertEqual(tasks.run_pending_tasks(), 2)
+
+        numpy_report.refresh_from_db()
+        self.assertEqual(numpy_report.status, 'completed')
+        self.assertEqual(numpy_report.data_watermark['backend'], 'numpy')
+        for model, fields in [
+            (JobReportResult, ['service_provider', 'total_jobs', 'jobs_created', 'jobs_active', 'jobs_completed']),
+            (OrderReportResult, ['total_orders', 'total_amount', 'order_new', 'order_completed']),
+            (OrderQuarterResult, ['quarter', 'total_orders', 'total_amount']),
+        ]:
+            with self.subTest(model=model.__name__):
+                self.assertEqual(
+                    list(model.objects.filter(report=numpy_report).order_by('id').values_list(*fields)),
+                    list(model.objects.filter(report=rollups_report).order_by('id').values_list(*fields)),
+                )
+
+    def test_numpy_backend_without_numpy(self):
+        report = self.create_report('numpy')
+        with mock.patch.object(vectorized, 'np', None), \
+                self.assertLogs('stat_analysis.tasks', level='ERROR'):
+            tasks.run_pending_tasks()
+
+        report.refresh_from_db()
+        self.assertEqual(report.status, 'failed')
+        self.assertIn("requires NumPy", report.error)
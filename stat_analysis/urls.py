@@ -0,0 +1,8 @@
+from django.urls import path
+
+from stat_analysis import views as stat_analysis_views
+
+
+urlpatterns = [
+    path('exports/<slug:name>.<slug:file_format>', stat_analysis_views.export, name='export'),
+]
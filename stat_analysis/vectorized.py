@@ -0,0 +1,184 @@
+"""stat_analysis.vectorized.py
+
+NumPy backend of the Report statistics, selected per report with
+`Report.backend`.
+
+Rather than assembling the statistics from the per-quarter rollups, the
+job and order statistics are computed from the Job, JobState and
+OrderState tables. Only the needed columns are read, a chunk of rows at
+a time, into compact structured arrays, and every per-service-provider
+and per-state aggregate is a vectorized group-by over them. The results
+are the same as with the rollups, so the backend doubles as a check of
+the rollups without rebuilding them.
+
+NumPy is an optional dependency, reports with this backend fail with
+ImproperlyConfigured when it is not installed.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+
+from execution.models import Job, JobState
+from order.models import OrderState
+from stat_analysis import stat_utils
+from stat_analysis.rollups import quarter_of
+from stat_analysis.sketch import HISTOGRAM_EDGES, LOG_GAMMA, CompletionTimeSketch, get_distributions
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# rows read from the database at once
+CHUNK_SIZE = 10000
+
+
+def fetch_array(rows, dtype):
+    """Read the rows of a values_list queryset into a structured array, a chunk at a time."""
+    chunks = []
+    chunk = []
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            chunks.append(np.array(chunk, dtype=dtype))
+            chunk = []
+    if chunk:
+        chunks.append(np.array(chunk, dtype=dtype))
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+
+
+def group_by(keys, values):
+    """(key, values) of every distinct key, the values of a key being an array."""
+    order = np.argsort(keys, kind='stable')
+    keys, values = keys[order], values[order]
+    unique_keys, starts = np.unique(keys, return_index=True)
+    return zip(unique_keys.tolist(), np.split(values, starts[1:]))
+
+
+def count_by(keys):
+    unique_keys, counts = np.unique(keys, return_counts=True)
+    return dict(zip(unique_keys.tolist(), counts.tolist()))
+
+
+def build_sketch(values):
+    """The CompletionTimeSketch of an array of values, see `stat_analysis.sketch`."""
+    sketch = CompletionTimeSketch()
+    if not len(values):
+        return sketch
+    sketch.count = len(values)
+    sketch.total = float(values.sum())
+    sketch.min = float(values.min())
+    sketch.max = float(values.max())
+    positive = values[values > 0]
+    sketch.zero_count = len(values) - len(positive)
+    sketch.bins = count_by(np.ceil(np.log(positive) / LOG_GAMMA).astype(np.int64))
+    # the bucket of a value is the first edge it is not over
+    sketch.histogram = np.bincount(
+        np.searchsorted(HISTOGRAM_EDGES, values, side='left'),
+        minlength=len(HISTOGRAM_EDGES) + 1,
+    ).tolist()
+    return sketch
+
+
+def get_job_stats_by_provider(start_date, end_date):
+    """
+    Job statistics of every service provider in the given period, as
+    `stat_utils.get_job_stats_by_provider` returns them from the rollups.
+    """
+    range_start, range_end = stat_utils.get_datetime_range(start_date, end_date)
+    job_stats = defaultdict(stat_utils.empty_job_stats)
+
+    started = fetch_array(
+        Job.objects.filter(started_at__gte=range_start, started_at__lt=range_end)
+        .values_list('service_provider'),
+        [('service_provider', 'i8')],
+    )
+    for service_provider_id, count in count_by(started['service_provider']).items():
+        job_stats[service_provider_id]['total_jobs'] = count
+
+    completed = fetch_array(
+        Job.objects.filter(
+            ended_at__gte=range_start,
+            ended_at__lt=range_end,
+            current_state='completed',
+            completion_time__isnull=False,
+        )
+        .exclude(completion_time=0)
+        .values_list('service_provider', 'job_type', 'completion_time'),
+        [('service_provider', 'i8'), ('job_type', 'U20'), ('completion_time', 'f8')],
+    )
+    sketches = defaultdict(dict)
+    for job_type, _ in Job.JOB_TYPE_CHOICES:
+        of_type = completed[completed['job_type'] == job_type]
+        for service_provider_id, completion_times in group_by(of_type['service_provider'], of_type['completion_time']):
+            sketch = sketches[service_provider_id][job_type] = build_sketch(completion_times)
+            job_stats[service_provider_id][f'average_completion_time_{job_type}'] = sketch.total / sketch.count
+    for service_provider_id, job_sketches in sketches.items():
+        job_stats[service_provider_id]['completion_time_distribution'] = get_distributions(job_sketches)
+
+    # as in the rollups, a job is counted once per state and quarter
+    transitions = np.unique(fetch_array(
+        JobState.objects.filter(state_date__gte=range_start, state_date__lt=range_end)
+        .annotate(quarter=quarter_of('state_date'))
+        .values_list('job__service_provider', 'state', 'quarter', 'job'),
+        [('service_provider', 'i8'), ('state', 'U20'), ('quarter', 'datetime64[D]'), ('job', 'i8')],
+    ))
+    for state in np.unique(transitions['state']).tolist():
+        if f'jobs_{state}' not in stat_utils.JOB_STATS_FIELDS:
+            continue
+        counts = count_by(transitions['service_provider'][transitions['state'] == state])
+        for service_provider_id, count in counts.items():
+            job_stats[service_provider_id][f'jobs_{state}'] = count
+
+    return job_stats
+
+
+def get_order_stats(start_date, end_date):
+    """Order statistics of the given period, as `stat_utils.get_order_stats` returns them from the rollups."""
+    range_start, range_end = stat_utils.get_datetime_range(start_date, end_date)
+    # as in the rollups, an order is counted once per state and quarter
+    transitions = np.unique(fetch_array(
+        OrderState.objects.filter(state_date__gte=range_start, state_date__lt=range_end)
+        .annotate(quarter=quarter_of('state_date'), order_amount=Coalesce('order__amount', Value(Decimal(0))))
+        .values_list('order', 'state', 'quarter', 'order_amount'),
+        [('order', 'i8'), ('state', 'U20'), ('quarter', 'datetime64[D]'), ('amount', 'f8')],
+    ))
+    states, inverse = np.unique(transitions['state'], return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(states))
+    amounts = np.bincount(inverse, weights=transitions['amount'], minlength=len(states))
+    return stat_utils.get_order_stats_from_states(
+        dict(zip(states.tolist(), counts.tolist())),
+        # the amounts have two decimal places
+        {state: Decimal(f'{amount:.2f}') for state, amount in zip(states.tolist(), amounts.tolist())},
+    )
+
+
+def calculate_report_stats(report, on_progress=None):
+    """
+    Calculate the job, order and user statistics of a report and their
+    per-quarter breakdown with the NumPy backend. The user statistics and
+    the breakdown are counted in SQL, as with the rollups.
+    """
+    if np is None:
+        raise ImproperlyConfigured("The NumPy backend of the reports requires NumPy, which is not installed.")
+    period = (report.quarter_from, report.year_from, report.quarter_to, report.year_to)
+    start_date, end_date = stat_utils.get_period_dates(*period)
+    service_provider_ids = stat_utils.service_provider_model.objects.values_list('id', flat=True)
+
+    job_stats = get_job_stats_by_provider(start_date, end_date)
+    if on_progress:
+        on_progress(50)
+    order_stats = get_order_stats(start_date, end_date)
+    user_stats = stat_utils.get_user_stats(start_date, end_date)
+    with transaction.atomic():
+        stat_utils.save_job_stats(report, job_stats, service_provider_ids)
+        stat_utils.order_stats_model.objects.update_or_create(report=report, defaults=order_stats)
+        stat_utils.user_stats_model.objects.update_or_create(report=report, defaults=user_stats)
+        stat_utils.calculate_quarter_stats(*period, report=report)
+    if on_progress:
+        on_progress(100)
@@ -1,3 +1,25 @@
-from django.shortcuts import render
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, StreamingHttpResponse
 
-# Create your views here.
+from registrar.scope import get_admin_scope
+from stat_analysis.exports import EXPORTS, FORMATS, stream_export
+
+
+@staff_member_required
+def export(request, name, file_format):
+    """
+    Stream an export as CSV or JSONL, scoped like the admin, optionally
+    only the results of the report given with the `report` parameter.
+    """
+    if name not in EXPORTS or file_format not in FORMATS:
+        raise Http404("Unknown export.")
+    report_id = request.GET.get('report')
+    if report_id is not None and not report_id.isdigit():
+        raise Http404("Invalid report.")
+
+    response = StreamingHttpResponse(
+        stream_export(name, file_format, get_admin_scope(request), report_id),
+        content_type=FORMATS[file_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{name}.{file_format}"'
+    return response